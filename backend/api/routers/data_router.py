@@ -5,11 +5,14 @@ import shutil
 import time
 from typing import List
 
+import cv2
 import requests
 import torch
 from api.services.data_service import parse_videos_multithreaded
+from api.services.frame_service import FrameIndex, RawFrameStore
 from fastapi import (APIRouter, Depends, FastAPI, File, Form, HTTPException, UploadFile, status)
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 from interface.request.user_input_request import UserInput
 from utils.log_sync.adjust_log import do_sync
 from utils.remove_glare import remove_glare
@@ -19,6 +22,7 @@ os.makedirs('test', exist_ok=True)
 video_path = os.path.abspath(os.path.join("test", "video_origin"))
 processed_video_path = os.path.abspath(os.path.join("test", "video_origin_remove"))
 frame_path = os.path.abspath(os.path.join("test", "frame_origin"))
+frame_store_path = os.path.abspath(os.path.join("test", "frame_store"))
 csv_path = os.path.abspath(os.path.join("test", "csv"))
 srt_path = os.path.abspath(os.path.join("test", "srt"))
 sync_path = os.path.abspath(os.path.join("test", "sync_csv"))
@@ -26,13 +30,17 @@ input_path = os.path.abspath(os.path.join("test", "input"))
 
 
 @router.post("/video/")
-async def upload_video(file: UploadFile = File(...), preprocess: bool = Form(...)):
+async def upload_video(file: UploadFile = File(...), preprocess: bool = Form(...), export_jpeg: bool = Form(True), store_frames: bool = Form(False)):
     """
         사용자가 업로드한 비디오를 저장합니다.
+
+        비디오는 한 번만 디코딩되며, 프레임은 JPEG 파일(frame_origin)과 메모리 맵 프레임 저장소(frame_store) 중 요청된 곳에 저장됩니다.
     
         Args
             - file (fastapi.UploadFile): 사용자로부터 업로드되는 파일
             - preprocess (bool): 빛반사 제거와 같은 전처리 기능 사용 여부
+            - export_jpeg (bool): 프레임을 JPEG 파일로 저장할지 여부
+            - store_frames (bool): 프레임을 RawFrameStore(메모리 맵 원본 프레임 저장소)로 저장할지 여부
         Raise
             - fastapi.HTTPException: 비디오 전처리 또는 저장과정에서 에러가 발생할 경우 서버 에러(500) 발생
         Return
@@ -62,17 +70,17 @@ async def upload_video(file: UploadFile = File(...), preprocess: bool = Form(...
                 processed_video_path, lowercase_extensions(file.filename)
             )
             remover = remove_glare.RGLARE(file_location, save_path, 4, True, True)
-            remover.video_gpu()
+            remover.video_stream()
             # TODO@jh: GPU cache clear 확인 필요
             process_f_time = time.time()
             print(
                 f"removing glare time: {round(process_f_time - process_s_time, 0)} sec"
             )
-            parse_videos_multithreaded(processed_video_path, frame_path)
+            parse_videos_multithreaded(processed_video_path, frame_path, frame_store_path if store_frames else None, export_jpeg)
             print(f"frame parsing time: {round(time.time() - process_f_time)} sec")
         else:
             frame_s_time = time.time()
-            parse_videos_multithreaded(video_path, frame_path)
+            parse_videos_multithreaded(video_path, frame_path, frame_store_path if store_frames else None, export_jpeg)
             print(f"frame parsing time: {round(time.time() - frame_s_time)} sec")
 
         print(f"total video upload time: {round(time.time() - s_time)} sec")
@@ -118,22 +126,26 @@ async def get_frame(frame_number: int):
     """
         사용자로부터 입력받은 프레임 번호에 해당하는 이미지를 반환합니다.
 
+        JPEG 프레임이 없으면 프레임 저장소(RawFrameStore)에서 읽어 JPEG로 인코딩하여 반환합니다.
+
         Args
             - frame_number (int): 프레임 번호
         Raise
             - fastapi.HTTPException: 프레임 번호에 해당하는 이미지를 찾지 못하는 경우 서버 에러(500)을 발생
         Return
             - fastapi.responses.FileResponse: 프레임 번호에 해당하는 이미지
+            - fastapi.responses.Response: 프레임 저장소에서 읽어 인코딩한 JPEG 이미지
     """
 
     try:
-        frames = glob.glob(os.path.join(frame_path, "*.jpg"))
-        image_path = [
-            x for x in frames if int(x.split("_")[-1].split(".")[0]) == frame_number
-        ]
-        if not len(image_path):
-            return JSONResponse(status_code=404, content={"message": "Frame not found"})
-        return FileResponse(image_path[0])
+        image_path = FrameIndex.load(frame_path).path(frame_number)
+        if image_path is None:
+            frame = read_stored_frame(frame_number)
+            if frame is None:
+                return JSONResponse(status_code=404, content={"message": "Frame not found"})
+            _, encoded = cv2.imencode(".jpg", frame)
+            return Response(content=encoded.tobytes(), media_type="image/jpeg")
+        return FileResponse(image_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error accessing frame: {e}")
 
@@ -206,7 +218,8 @@ async def sync_log():
     os.makedirs(sync_path, exist_ok=True)
     # delete_files_in_folder(sync_path)
     try:
-        do_sync(video_path, csv_path, srt_path, sync_path)
+        # 동기화는 요청 스레드 풀에서 수행하여 이벤트 루프를 막지 않습니다.
+        await run_in_threadpool(do_sync, video_path, csv_path, srt_path, sync_path)
         return {"message": "synchronized csv saved successfully"}
     except Exception as e:
         raise HTTPException(
@@ -235,25 +248,29 @@ async def save_input(request: UserInput):
     # delete_files_in_folder(input_path)
     frame_number = request.frame_number
     point_distances = request.point_distances
-    frame_file = [
-        x
-        for x in glob.glob(os.path.join(frame_path, "*.jpg"))
-        if int(x.split("_")[-1].split(".")[0]) == frame_number
-    ][0]
+    frame_file = FrameIndex.load(frame_path).path(frame_number)
+    if frame_file is None:
+        raise HTTPException(status_code=404, detail=f"Frame {frame_number} not found")
     # print(point_distances)
     try:
         gsds = []
         pixelsizes = []
         inputs = []
+        items = []
         for pd in point_distances:
-            # print(pd)
             inputs.append(f'{frame_number} {pd.point1.x} {pd.point1.y} {pd.point2.x} {pd.point2.y} {pd.distance}')
-            # print(inputs)
-            gsd, pixelsize = get_gsd(frame_number, frame_file, pd.point1.x, pd.point1.y, pd.point2.x, pd.point2.y, pd.distance)
-            print(gsd, pixelsize)
-            if gsd != 0:
-                gsds.append(gsd)
-                pixelsizes.append(pixelsize)
+            items.append({
+                "frame_num": frame_number,
+                "frame_path": frame_file,
+                "points": [[pd.point1.x, pd.point1.y, pd.point2.x, pd.point2.y]],
+                "realdistance": pd.distance,
+            })
+        # 점 쌍마다 /bev1을 호출하지 않고 한 번의 배치 요청으로 계산
+        for result in get_bev_batch(items):
+            print(result["gsd"], result["pixel_size"])
+            if result["rst"] == 0 and result["pixel_size"] is not None:
+                gsds.append(result["gsd"])
+                pixelsizes.append(result["pixel_size"])
         gsd_mean = sum(gsds) / len(gsds)
         pixelsize_mean = sum(pixelsizes) / len(pixelsizes)
         with open(os.path.join("test", "GSD.txt"), "w") as f:
@@ -265,6 +282,37 @@ async def save_input(request: UserInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def get_bev_batch(items, realdistance=None, gsd=0, dst_dir=None):
+    """
+        여러 프레임의 점 쌍을 http://localhost/bev/batch로 한 번에 요청하고, 스트리밍(NDJSON)되는 프레임별 결과를 차례로 반환합니다.
+
+        Args
+            - items (list): 프레임별 요청 [{"frame_num", "frame_path", "points": N x [x1, y1, x2, y2], "realdistance"}]
+            - realdistance (float): 첫 번째 점 쌍의 실제 거리 (item에 없는 경우 사용)
+            - gsd (float): BEV 이미지의 GSD, 0이면 프레임별 메타데이터 GSD
+            - dst_dir (str): BEV 이미지를 저장할 디렉터리 경로, None이면 저장하지 않음
+        Raise
+            - requests.HTTPError: BEV 서버가 에러를 반환한 경우
+        Return
+            - results (generator): 프레임별 {"frame_num", "rst", "points", "gsd", "pixel_size", "boundary_rows", "boundary_cols", "img_dst"}
+    """
+
+    url = "http://112.216.237.124:8001/bev/batch"
+    headers = {"accept": "application/x-ndjson", "Content-Type": "application/json"}
+    data = {
+        "items": items,
+        "csv_path": "/home/dva4/DVA_LAB/backend/test/sync_csv/sync_log.csv",
+        "gsd": gsd,
+        "realdistance": realdistance,
+        "dst_dir": dst_dir,
+    }
+    with requests.post(url, headers=headers, data=json.dumps(data), stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
 def get_gsd(frame_number, frame_file, x1, y1, x2, y2, m_distance):
     """
         사용자 입력 값을 기반으로 http://localhost/bev1로 POST를 요청한 뒤 GSD 값과 픽셀거리 값을 가져옵니다.
@@ -345,6 +393,30 @@ def calculate_average_distance(distances):
     return sum(distances) / len(distances)
 
 
+def read_stored_frame(frame_number):
+    """
+        프레임 저장소(frame_store)에서 프레임 번호에 해당하는 프레임을 읽습니다.
+
+        Args
+            - frame_number (int): 프레임 번호
+
+        Return
+            - frame (np.ndarray | None): 프레임, 저장소에 없으면 None
+    """
+
+    if not os.path.isdir(frame_store_path):
+        return None
+    for name in sorted(os.listdir(frame_store_path)):
+        store_dir = os.path.join(frame_store_path, name)
+        try:
+            store = RawFrameStore.load(store_dir)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if frame_number in store:
+            return store[frame_number]
+    return None
+
+
 def delete_files_in_folder(folder_path):
     """
         인자에 해당하는 경로의 모든 파일을 제거합니다.
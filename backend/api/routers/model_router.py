@@ -202,7 +202,7 @@ async def inference_merge(
 - `result_path`: /home/dva4/DVA_LAB/backend/test/model/tracking/result.txt
 """,
 )
-async def inference_tracking(detection_path, save_path):
+async def inference_tracking(detection_path, save_path, frame_path: Optional[str] = None):
     """
         ByteTrack을 활용하여 객체추적 인퍼런스 결과를 요청후 파일 저장 성공 메시지를 반환합니다.
 
@@ -211,6 +211,7 @@ async def inference_tracking(detection_path, save_path):
         Args
             - detection_path (str): 객체탐지 결과경로
             - save_path (str): 객체추적 결과파일 저장경로
+            - frame_path (str, optional): 이미지 크기를 읽을 프레임 경로. Optional.
 
         Raise
             - fastapi.HTTPException: 서버의 이상 탐지 결과가 200 OK가 아닌 경우 HTTP 예외를 발생
@@ -224,7 +225,7 @@ async def inference_tracking(detection_path, save_path):
         "accept": "application/json",
         "Content-Type": "application/json",
     }
-    data = {"det_result_path": detection_path, "result_path": save_path}
+    data = {"det_result_path": detection_path, "result_path": save_path, "frame_path": frame_path}
     response = requests.post(url, headers=headers, data=json.dumps(data))
     if response.status_code != 200:
         raise HTTPException(
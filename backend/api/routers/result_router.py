@@ -10,6 +10,7 @@ import requests
 from autologging import logged
 from fastapi import (APIRouter, Depends, FastAPI, File, Form, HTTPException, UploadFile, status)
 from fastapi.responses import FileResponse, JSONResponse
+from api.services.frame_service import FrameIndex
 from interface.request import VisRequest, VisRequestBev
 from utils.visualizing import visualize
 import asyncio
@@ -75,55 +76,55 @@ async def get_all_gsd(body: VisRequestBev):
                 - tracking_result (str): 객체추적 결과 파일이 담긴 경로
                 - GSD_path (str): GSD 파일 경로
                 - GSD_save_path (str): 모든 GSD가 담긴 파일 경로
+                  (줄마다 frame_no gsd pixel_size pixel_size_low pixel_size_high)
 
         Return
             - 결과 메시지 스트링을 반환합니다.
     """
 
     s_time = time.time()
-    gsds = dict()
+    # TODO@jh: user_input이 올바르게 저장되어 있지 않아서 임의로 가장 가까운 5의 배수로 수정함
     with open(body.GSD_path, "r") as f:
         initial_frame, initial_gsd, initial_p_size = f.read().split(" ")
 
-    # TODO@jh: user_input이 올바르게 저장되어 있지 않아서 임의로 가장 가까운 5의 배수로 수정함
-    gsds[int(initial_frame)] = [float(initial_gsd), float(initial_p_size)]
-
     with open(body.user_input, "r") as f:
         distance = float(f.read().split(" ")[-1])
 
     r_s_time = time.time()
     ships_size = get_ship_size(body.user_input, body.frame_path, body.tracking_result)
     r_f_time = time.time()
-    frame_nos = [
-        int(x.split("_")[-1].split(".")[0])
-        for x in glob.glob(os.path.join(body.frame_path, "*.jpg"))
-    ]
+    frame_index = FrameIndex.load(body.frame_path)
+    frame_nos = sorted(frame_index.frame_numbers())
 
+    # 선박이 측정된 프레임마다 /bev1을 호출하지 않고, 키프레임만 계산해 보간하는 배치 요청 한 번으로 모든 프레임의 GSD를 구함
     g_s_time = time.time()
-    for (
-        ship_size
-    ) in ships_size:  # [frame_no, point[0][0], point[0][1], point[1][0], point[1][0]]
-        try:
-            frame = int(ship_size[0])
-            x1, y1, x2, y2 = ship_size[1:]
-            frame_file = [
-                x
-                for x in glob.glob(os.path.join(body.frame_path, "*.jpg"))
-                if int(x.split("_")[-1].split(".")[0]) == int(frame)
-            ][0]
-            gsd, pixelsize = get_gsd(frame, frame_file, x1, y1, x2, y2, distance)
-            gsds[frame] = [gsd, pixelsize]
-        except Exception as e:
-            print(e)
+    gsds = dict()  # frame_no -> [gsd, pixel_size, pixel_size_low, pixel_size_high]
+    num_keyframes = 0
+    try:
+        frame_file = frame_index.path(frame_nos[0])
+        rst, keyframes, results = get_gsd_batch(
+            frame_file,
+            ships_size,  # [frame_no, point[0][0], point[0][1], point[1][0], point[1][0]]
+            distance,
+            anchors=[[int(initial_frame), float(initial_gsd), float(initial_p_size)]],
+            frames=frame_nos,
+        )
+        num_keyframes = len(keyframes)
+        if rst == 0:
+            gsds = {int(result[0]): result[1:] for result in results}
+    except Exception as e:
+        print(e)
+    if not gsds:
+        gsds[int(initial_frame)] = [float(initial_gsd)] + [float(initial_p_size)] * 3
     g_f_time = time.time()
 
     with open(body.GSD_save_path, "w") as file:
         result = []
-        for frame_no in sorted(frame_nos):
-            try:
-                result.append(f"{frame_no} {gsds[frame_no][0]} {gsds[frame_no][1]}")
-            except:
-                result.append(f"{frame_no} {0} {0}")
+        for frame_no in frame_nos:
+            if frame_no in gsds:
+                result.append(" ".join(map(str, [frame_no, *gsds[frame_no]])))
+            else:
+                result.append(f"{frame_no} {0} {0} {0} {0}")
         file.write("\n".join(result))
 
     return (
@@ -132,6 +133,7 @@ async def get_all_gsd(body: VisRequestBev):
         f"refiner 모듈이 계산한 선박 개수: {len(ships_size)}",
         f"refiner 계산에 소요된 시간: {round(r_f_time - r_s_time, 0)} sec",
         f"추가 gsd 계산에 소요된 시간: {round(g_f_time - g_s_time, 0)} sec",
+        f"gsd를 계산한 키프레임 개수: {num_keyframes}",
     )
 
 
@@ -201,6 +203,41 @@ def get_ship_size(user_input, frame_path, tracking_result):
     return response_data
 
 
+def get_gsd_batch(frame_file, measurements, m_distance, anchors=(), frames=None):
+    """
+        선박 측정값으로 키프레임의 GSD를 계산하고 키프레임 사이를 보간한 프레임별 GSD를 반환합니다.
+
+        요청 URL: http://localhost:8001/bev1/batch
+
+        Args
+            - frame_file (str): 프레임 크기를 읽을 대표 프레임 경로
+            - measurements (list): 선박 측정값 N x [frame_no, x1, y1, x2, y2]
+            - m_distance (float): 실제 거리
+            - anchors (list): 이미 계산된 GSD M x [frame_no, gsd, pixel_size]
+            - frames (list): 결과를 구할 프레임 번호, None이면 로그의 모든 프레임
+
+        Return
+            - rst (int): 0: 성공, 2: 유효한 측정값이 없음
+            - keyframes (list): 키프레임 번호
+            - results (list): 프레임별 [frame_no, gsd, pixel_size, pixel_size_low, pixel_size_high]
+    """
+
+    url = "http://112.216.237.124:8001/bev1/batch"
+    headers = {"accept": "application/json", "Content-Type": "application/json"}
+    data = {
+        "frame_path": frame_file,
+        "csv_path": "/home/dva4/DVA_LAB/backend/test/sync_csv/sync_log.csv",
+        "measurements": [list(measurement[:5]) for measurement in measurements],
+        "realdistance": m_distance,
+        "anchors": [list(anchor) for anchor in anchors],
+        "frames": frames,
+    }
+    response = requests.post(url, headers=headers, data=json.dumps(data))
+    response.raise_for_status()
+    rst, keyframes, results = response.json()
+    return rst, keyframes, results
+
+
 def get_gsd(frame_number, frame_file, x1, y1, x2, y2, m_distance):
     """
         특정 프레임에서의 GSD 값을 계산 후 반환합니다.
@@ -1 +1,2 @@
 from . import data_service
+from . import frame_service
@@ -1,9 +1,26 @@
 import os
-import cv2
 import threading
 
+from .frame_service import decode_video_chunked
 
-def parse_video_to_frames(video_path, output_base_folder_path, frame_interval=1):
+
+def print_progress(name, step=10):
+    """
+        진행률이 step(%) 단위로 바뀔 때마다 출력하는 progress 함수를 반환합니다.
+    """
+
+    last = [-step]
+
+    def progress(done, total):
+        percent = int(done * 100 / total) if total else 100
+        if percent >= last[0] + step:
+            last[0] = percent - percent % step
+            print(f"Parsing video {name}: {done}/{total} frames ({percent}%)")
+
+    return progress
+
+
+def parse_video_to_frames(video_path, output_base_folder_path, frame_interval=1, store_dir=None, max_size=None, workers=None):
     """
         비디오 파일을 파싱하여 프레임으로 추출합니다. 
         
@@ -11,67 +28,74 @@ def parse_video_to_frames(video_path, output_base_folder_path, frame_interval=1)
 
         Args
             - video_path (str): 프레임을 파싱할 비디오 파일 경로
-            - output_base_folder_path (str): 파싱된 프레임이 저장될 경로
+            - output_base_folder_path (str | None): 파싱된 프레임이 저장될 경로, None이면 JPEG를 저장하지 않음
+            - frame_interval (int): frame_interval 프레임마다 하나씩 저장
+            - store_dir (str | None): RawFrameStore 경로, None이면 저장소를 만들지 않음
+            - max_size (int | None): 저장할 프레임의 긴 변 최대 크기, None이면 원본 크기
+            - workers (int | None): 비디오를 나눠 디코딩할 프로세스 수, None이면 CPU 코어 수
     """
 
     filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
-    output_folder_path = output_base_folder_path
 
-    # Create a subdirectory for the current video if it doesn't exist
-    if not os.path.exists(output_folder_path):
-        os.makedirs(output_folder_path)
-
-    cap = cv2.VideoCapture(video_path)
-
-    if not cap.isOpened():
+    try:
+        decode_video_chunked(
+            video_path,
+            jpeg_dir=output_base_folder_path,
+            store_dir=store_dir,
+            frame_interval=frame_interval,
+            max_size=max_size,
+            workers=workers,
+            progress=print_progress(filename_without_ext),
+        )
+    except IOError:
         print(f"Error opening video file: {filename_without_ext}")
         return
 
-    frame_count = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Save frame with padded frame number
-        if frame_count % frame_interval == 0:
-            padded_frame_number = str(frame_count).zfill(5)
-            frame_filename = f"{filename_without_ext}_{padded_frame_number}.jpg"
-            cv2.imwrite(os.path.join(output_folder_path, frame_filename), frame)
-
-        frame_count += 1
-
-    cap.release()
     print(f"Completed parsing video: {filename_without_ext}")
 
 
-def parse_videos_multithreaded(video_folder_path, output_base_folder_path):
+def parse_videos_multithreaded(video_folder_path, output_base_folder_path, store_base_folder_path=None, export_jpeg=True):
     """
         멀티쓰레드를 활용하여 비디오 파일을 프레임으로 추출합니다.
 
+        비디오마다 한 번만 디코딩하며, 디코딩된 프레임은 JPEG 파일과 RawFrameStore 중 요청된 곳에 저장됩니다.
+        각 비디오는 CPU 코어를 비디오 수로 나눈 만큼의 프로세스에서 구간별로 나눠 디코딩됩니다.
+        RawFrameStore는 store_base_folder_path 아래 '원본파일명' 디렉터리에 만들어집니다.
+
         Args
             - video_folder_path (str): 프레임을 파싱할 비디오 파일 경로
-            - output_base_folder_path (str): 파싱된 프레임이 저장될 경로
+            - output_base_folder_path (str): 파싱된 프레임(JPEG)이 저장될 경로
+            - store_base_folder_path (str | None): RawFrameStore가 저장될 경로, None이면 저장소를 만들지 않음
+            - export_jpeg (bool): JPEG 프레임 저장 여부
     """
 
     threads = []
 
     # Ensure base output folder exists
-    if not os.path.exists(output_base_folder_path):
+    if export_jpeg and not os.path.exists(output_base_folder_path):
         os.makedirs(output_base_folder_path)
 
+    # Handles both lowercase and uppercase extensions
+    filenames = [
+        filename for filename in os.listdir(video_folder_path)
+        if filename.lower().endswith((".mp4", ".avi", ".mov", ".mkv"))
+    ]
+    workers = max(1, (os.cpu_count() or 1) // max(len(filenames), 1))
+
     # Create a thread for each video file
-    for filename in os.listdir(video_folder_path):
-        if filename.lower().endswith(
-            (".mp4", ".avi", ".mov", ".mkv")
-        ):  # Handles both lowercase and uppercase extensions
-            video_path = os.path.join(video_folder_path, filename)
-            thread = threading.Thread(
-                target=parse_video_to_frames, args=(video_path, output_base_folder_path)
-            )
-            threads.append(thread)
-            thread.start()
+    for filename in filenames:
+        video_path = os.path.join(video_folder_path, filename)
+        jpeg_dir = output_base_folder_path if export_jpeg else None
+        store_dir = (
+            os.path.join(store_base_folder_path, os.path.splitext(filename)[0])
+            if store_base_folder_path is not None
+            else None
+        )
+        thread = threading.Thread(
+            target=parse_video_to_frames, args=(video_path, jpeg_dir, 1, store_dir, None, workers)
+        )
+        threads.append(thread)
+        thread.start()
 
     # Wait for all threads to complete
     for thread in threads:
@@ -0,0 +1,797 @@
+import json
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+import cv2
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+        디코딩된 프레임을 생산자(디코더)에서 소비자로 전달하는 고정 크기 링 버퍼입니다.
+
+        프레임 배열은 capacity 개의 슬롯을 재사용하므로 프레임마다 메모리를 새로 할당하지 않습니다.
+        소비자가 받은 프레임은 다음 프레임을 요청하기 전까지만 유효하며, 더 오래 보관하려면 복사해야 합니다.
+
+        Args
+            - capacity (int): 슬롯 개수 (2 이상). 소비자가 들고 있는 1개를 제외한 나머지가 디코딩 선행분
+    """
+
+    def __init__(self, capacity=8):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        for slot in range(capacity):
+            self._free.put(slot)
+
+    def acquire(self, stop_event=None):
+        """
+            비어 있는 슬롯 번호를 반환합니다. stop_event가 설정되면 None을 반환합니다.
+        """
+
+        while True:
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                if stop_event is not None and stop_event.is_set():
+                    return None
+
+    def publish(self, slot, frame_number):
+        self._filled.put((slot, frame_number))
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def close(self, error=None):
+        self._filled.put(error)
+
+    def get(self):
+        """
+            채워진 슬롯을 반환합니다.
+
+            Return
+                - (slot, frame_number) 또는 생산이 끝난 경우 None
+            Raise
+                - 생산자에서 발생한 예외
+        """
+
+        item = self._filled.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def drain(self):
+        while True:
+            try:
+                item = self._filled.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, tuple):
+                self._free.put(item[0])
+
+
+class VideoFrameSource:
+    """
+        비디오를 한 번만 디코딩하여 프레임을 스트리밍으로 제공합니다.
+
+        디코딩은 백그라운드 쓰레드에서 수행되며 FrameRingBuffer를 통해 소비자에게 전달되므로,
+        소비자가 느리면 디코더는 버퍼가 빌 때까지 대기합니다(메모리 사용량은 capacity 프레임으로 제한).
+
+            for frame_number, frame in VideoFrameSource(video_path):
+                ...
+
+        Args
+            - video_path (str): 비디오 파일 경로
+            - capacity (int): 링 버퍼 슬롯 개수
+            - frame_interval (int): frame_interval 프레임마다 하나씩 전달
+    """
+
+    def __init__(self, video_path, capacity=8, frame_interval=1):
+        self.video_path = video_path
+        self.capacity = capacity
+        self.frame_interval = frame_interval
+
+    def __iter__(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise IOError(f"Error opening video file: {self.video_path}")
+
+        buffer = FrameRingBuffer(self.capacity)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self._decode, args=(cap, buffer, stop_event), daemon=True)
+        producer.start()
+
+        slot = None
+        try:
+            while True:
+                item = buffer.get()
+                if item is None:
+                    break
+                slot, frame_number = item
+                yield frame_number, buffer.slots[slot]
+                buffer.release(slot)
+                slot = None
+        finally:
+            stop_event.set()
+            if slot is not None:
+                buffer.release(slot)
+            buffer.drain()
+            producer.join()
+            cap.release()
+
+    def _decode(self, cap, buffer, stop_event):
+        frame_count = 0
+        try:
+            while not stop_event.is_set():
+                if frame_count % self.frame_interval:
+                    # Skipped frames are only grabbed, not decoded
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    continue
+
+                slot = buffer.acquire(stop_event)
+                if slot is None:
+                    break
+                ret, frame = cap.read(buffer.slots[slot])
+                if not ret:
+                    buffer.release(slot)
+                    break
+                buffer.slots[slot] = frame
+                buffer.publish(slot, frame_count)
+                frame_count += 1
+            buffer.close()
+        except Exception as e:
+            buffer.close(e)
+
+
+class RawFrameStore:
+    """
+        디코딩된 프레임을 원본(raw) 그대로 저장하는 메모리 맵 프레임 저장소입니다.
+
+        서비스 간에 프레임을 주고받을 때 JPEG 인코딩/디코딩 없이 같은 파일을 메모리 맵으로 공유합니다.
+
+            - frames.raw: 프레임 배열을 순서대로 이어 붙인 파일
+            - index.json: {"shape", "dtype", "frame_bytes", "frames": {프레임 번호: 바이트 오프셋}}
+
+        Args
+            - store_dir (str): 저장소 디렉터리 경로
+    """
+
+    data_name = "frames.raw"
+    index_name = "index.json"
+    _instances = {}  # store_dir -> (index.json mtime, RawFrameStore)
+    _instances_lock = threading.Lock()
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, self.index_name), "r") as f:
+            index = json.load(f)
+
+        self.shape = tuple(index["shape"])
+        self.dtype = np.dtype(index["dtype"])
+        self.frame_bytes = index["frame_bytes"]
+        self.offsets = {int(frame_number): offset for frame_number, offset in index["frames"].items()}
+
+        data_path = os.path.join(store_dir, self.data_name)
+        if self.offsets and os.path.getsize(data_path):
+            self._data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+
+    @staticmethod
+    def exists(store_dir):
+        return os.path.isfile(os.path.join(store_dir, RawFrameStore.index_name))
+
+    @classmethod
+    def load(cls, store_dir):
+        """
+            저장소에 대한 RawFrameStore를 반환합니다. 같은 저장소에 대해서는 같은 객체를 공유하며,
+            저장소가 다시 디코딩되어 index.json이 바뀐 경우에만 새로 엽니다.
+
+            Raise
+                - FileNotFoundError: 인덱스가 없는 경우 (디코딩 중이거나 저장소가 없는 경우)
+        """
+
+        store_dir = os.path.abspath(store_dir)
+        with cls._instances_lock:
+            cached = cls._instances.get(store_dir)
+            try:
+                index_mtime = os.stat(os.path.join(store_dir, cls.index_name)).st_mtime_ns
+            except FileNotFoundError:
+                # 다시 디코딩하는 중에는 frames.raw가 새로 쓰이므로 이전 메모리 맵을 버립니다.
+                cls._instances.pop(store_dir, None)
+                raise
+            if cached is not None and cached[0] == index_mtime:
+                return cached[1]
+            store = cls(store_dir)
+            cls._instances[store_dir] = (index_mtime, store)
+        return store
+
+    @classmethod
+    def create(cls, store_dir):
+        """
+            새 저장소를 만들고 RawFrameStoreWriter를 반환합니다. 기존 저장소는 덮어씁니다.
+        """
+
+        return RawFrameStoreWriter(store_dir)
+
+    @staticmethod
+    def write_index(store_dir, shape, dtype, offsets):
+        """
+            저장소 인덱스를 기록합니다. 인덱스가 기록된 뒤에만 저장소를 읽을 수 있습니다.
+
+            Args
+                - store_dir (str): 저장소 디렉터리 경로
+                - shape (tuple | None): 프레임 shape
+                - dtype (np.dtype | None): 프레임 dtype
+                - offsets (dict): 프레임 번호 -> frames.raw 안의 바이트 오프셋
+        """
+
+        dtype = np.dtype(dtype or np.uint8)
+        index = {
+            "shape": list(shape or ()),
+            "dtype": str(dtype),
+            "frame_bytes": int(np.prod(shape)) * dtype.itemsize if shape else 0,
+            "frames": {str(frame_number): offset for frame_number, offset in offsets.items()},
+        }
+        index_path = os.path.join(store_dir, RawFrameStore.index_name)
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, frame_number):
+        return frame_number in self.offsets
+
+    def frame_numbers(self):
+        return sorted(self.offsets)
+
+    def __getitem__(self, frame_number):
+        """
+            프레임 번호에 해당하는 프레임을 반환합니다. 반환값은 파일에 대한 읽기 전용 뷰이므로 수정하려면 복사해야 합니다.
+
+            Raise
+                - KeyError: 저장소에 없는 프레임 번호인 경우
+        """
+
+        offset = self.offsets[frame_number]
+        return self._data[offset:offset + self.frame_bytes].view(self.dtype).reshape(self.shape)
+
+    def close(self):
+        self._data = None
+
+
+class RawFrameStoreWriter:
+    """
+        RawFrameStore에 프레임을 순서대로 추가합니다. 인덱스는 close 시점에 기록되므로
+        close 되기 전의 저장소는 읽을 수 없습니다.
+
+        Args
+            - store_dir (str): 저장소 디렉터리 경로
+    """
+
+    def __init__(self, store_dir):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        index_path = os.path.join(store_dir, RawFrameStore.index_name)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        self._file = open(os.path.join(store_dir, RawFrameStore.data_name), "wb")
+        self.shape = None
+        self.dtype = None
+        self.offsets = {}
+        self._offset = 0
+
+    def append(self, frame_number, frame):
+        """
+            Raise
+                - ValueError: 첫 프레임과 shape/dtype이 다른 경우
+        """
+
+        if self.shape is None:
+            self.shape = frame.shape
+            self.dtype = frame.dtype
+        elif frame.shape != self.shape or frame.dtype != self.dtype:
+            raise ValueError(f"frame {frame_number} has shape {frame.shape}, expected {self.shape}")
+
+        self._file.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        self.offsets[frame_number] = self._offset
+        self._offset += frame.nbytes
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+
+        RawFrameStore.write_index(self.store_dir, self.shape, self.dtype, self.offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FrameIndex:
+    """
+        JPEG 프레임 디렉터리의 영속 인덱스입니다 (프레임 번호 -> 경로, 파일 크기, 수정 시각).
+
+        인덱스는 프레임 디렉터리 옆의 '<프레임 디렉터리>.index.json'에 저장되며, 프레임 파싱 시 add로 등록됩니다.
+        (프레임 디렉터리에는 JPEG 파일만 두어 디렉터리를 그대로 읽는 다른 서비스에 영향을 주지 않습니다.)
+        조회 시에는 디렉터리 수정 시각이 바뀐 경우에만 디렉터리를 다시 읽고, 새로 생긴 파일만 stat 하는 방식으로 갱신합니다.
+        파일명 형식은 '원본파일명_프레임번호.jpg' 입니다.
+
+            index = FrameIndex.load(frame_path)
+            frame_file = index.path(frame_number)
+
+        Args
+            - frame_dir (str): JPEG 프레임 디렉터리 경로
+    """
+
+    index_suffix = ".index.json"
+    legacy_index_name = "frame_index.json"
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, frame_dir):
+        self.frame_dir = os.path.abspath(frame_dir)
+        self.index_path = self.frame_dir + self.index_suffix
+        self._lock = threading.RLock()
+        self._frames = {}  # frame_number -> [path, size, mtime]
+        self._dir_mtime = None  # the first refresh re-lists the directory, but only stats files missing from the saved index
+
+        # Indexes of older versions were written inside the frame directory; read once and remove them
+        legacy_path = os.path.join(self.frame_dir, self.legacy_index_name)
+        for index_path in (self.index_path, legacy_path):
+            if os.path.isfile(index_path):
+                try:
+                    with open(index_path, "r") as f:
+                        index = json.load(f)
+                    self._frames = {int(frame_number): entry for frame_number, entry in index["frames"].items()}
+                    break
+                except (ValueError, KeyError):
+                    self._frames = {}
+        if os.path.isfile(legacy_path):
+            try:
+                os.remove(legacy_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, frame_dir):
+        """
+            프레임 디렉터리에 대한 FrameIndex를 반환합니다. 같은 디렉터리에 대해서는 같은 객체를 공유합니다.
+        """
+
+        frame_dir = os.path.abspath(frame_dir)
+        with cls._instances_lock:
+            index = cls._instances.get(frame_dir)
+            if index is None:
+                index = cls(frame_dir)
+                cls._instances[frame_dir] = index
+        return index
+
+    @staticmethod
+    def parse_frame_number(filename):
+        return int(filename.split("_")[-1].split(".")[0])
+
+    def add(self, frame_number, path, save=True):
+        stat = os.stat(path)
+        with self._lock:
+            self._frames[int(frame_number)] = [os.path.abspath(path), stat.st_size, stat.st_mtime]
+            if save:
+                self.save()
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.frame_dir, exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"frames": {str(k): v for k, v in self._frames.items()}}, f)
+            os.replace(tmp_path, self.index_path)
+            self._dir_mtime = os.stat(self.frame_dir).st_mtime_ns
+
+    def refresh(self):
+        """
+            디렉터리가 바뀐 경우에만 인덱스를 갱신합니다. 새 파일만 stat 하고, 사라진 파일은 인덱스에서 제거합니다.
+        """
+
+        with self._lock:
+            if not os.path.isdir(self.frame_dir):
+                self._frames = {}
+                return
+            dir_mtime = os.stat(self.frame_dir).st_mtime_ns
+            if dir_mtime == self._dir_mtime:
+                return
+
+            known = {entry[0]: frame_number for frame_number, entry in self._frames.items()}
+            frames = {}
+            for entry in os.scandir(self.frame_dir):
+                if not entry.name.lower().endswith(".jpg"):
+                    continue
+                path = os.path.abspath(entry.path)
+                frame_number = known.get(path)
+                if frame_number is not None:
+                    frames[frame_number] = self._frames[frame_number]
+                    continue
+                try:
+                    frame_number = self.parse_frame_number(entry.name)
+                except ValueError:
+                    continue
+                stat = entry.stat()
+                frames[frame_number] = [path, stat.st_size, stat.st_mtime]
+            self._frames = frames
+            self.save()
+
+    def get(self, frame_number):
+        """
+            Return
+                - [path, size, mtime] 또는 인덱스에 없는 경우 None
+        """
+
+        self.refresh()
+        entry = self._frames.get(int(frame_number))
+        if entry is not None and not os.path.exists(entry[0]):
+            self._dir_mtime = None
+            self.refresh()
+            entry = self._frames.get(int(frame_number))
+        return entry
+
+    def path(self, frame_number):
+        entry = self.get(frame_number)
+        return None if entry is None else entry[0]
+
+    def frame_numbers(self):
+        self.refresh()
+        return sorted(self._frames)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._frames)
+
+    def __contains__(self, frame_number):
+        return self.get(frame_number) is not None
+
+
+def limit_frame_size(width, height, max_size=None):
+    """
+        긴 변이 max_size를 넘지 않도록 비율을 유지한 출력 프레임 크기를 반환합니다.
+
+        Args
+            - width (int): 원본 프레임 가로 크기
+            - height (int): 원본 프레임 세로 크기
+            - max_size (int | None): 출력 프레임의 긴 변 최대 크기, None이면 원본 크기
+
+        Return
+            - (width, height): 출력 프레임 크기
+    """
+
+    if not max_size or max(width, height) <= max_size:
+        return width, height
+    scale = max_size / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def resize_frame(frame, max_size=None):
+    if not max_size:
+        return frame
+    height, width = frame.shape[:2]
+    size = limit_frame_size(width, height, max_size)
+    if size == (width, height):
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def jpeg_frame_path(jpeg_dir, filename_without_ext, frame_number):
+    return os.path.join(jpeg_dir, f"{filename_without_ext}_{str(frame_number).zfill(5)}.jpg")
+
+
+def decode_video(video_path, jpeg_dir=None, store_dir=None, frame_interval=1, capacity=8, max_size=None, progress=None):
+    """
+        비디오를 한 번 디코딩하여 각 프레임을 JPEG 파일 그리고/또는 RawFrameStore로 저장합니다.
+
+        JPEG 파일명 형식은 '원본파일명_프레임번호.jpg'이며 프레임번호는 제로 패딩된 5자리 숫자 입니다.
+        저장한 JPEG 프레임은 jpeg_dir의 FrameIndex에 등록됩니다.
+
+        Args
+            - video_path (str): 비디오 파일 경로
+            - jpeg_dir (str | None): JPEG 프레임이 저장될 경로, None이면 JPEG를 저장하지 않음
+            - store_dir (str | None): RawFrameStore 경로, None이면 저장소를 만들지 않음
+            - frame_interval (int): frame_interval 프레임마다 하나씩 저장
+            - capacity (int): 링 버퍼 슬롯 개수
+            - max_size (int | None): 저장할 프레임의 긴 변 최대 크기, None이면 원본 크기
+            - progress (callable | None): progress(저장한 프레임 수, 전체 프레임 수)로 진행 상황을 전달받을 함수
+
+        Return
+            - frame_count (int): 저장한 프레임 수
+    """
+
+    filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
+    frame_index = None
+    if jpeg_dir is not None:
+        os.makedirs(jpeg_dir, exist_ok=True)
+        frame_index = FrameIndex.load(jpeg_dir)
+
+    writer = RawFrameStore.create(store_dir) if store_dir is not None else None
+    total = count_output_frames(video_path, frame_interval) if progress is not None else 0
+    frame_count = 0
+    try:
+        for frame_number, frame in VideoFrameSource(video_path, capacity, frame_interval):
+            frame = resize_frame(frame, max_size)
+            if jpeg_dir is not None:
+                frame_file = jpeg_frame_path(jpeg_dir, filename_without_ext, frame_number)
+                cv2.imwrite(frame_file, frame)
+                frame_index.add(frame_number, frame_file, save=False)
+            if writer is not None:
+                writer.append(frame_number, frame)
+            frame_count += 1
+            if progress is not None:
+                progress(frame_count, total)
+    finally:
+        if writer is not None:
+            writer.close()
+        if frame_index is not None:
+            frame_index.save()
+
+    return frame_count
+
+
+def count_output_frames(video_path, frame_interval=1):
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return math.ceil(max(frame_count, 0) / frame_interval)
+
+
+def probe_keyframes(video_path):
+    """
+        ffprobe로 비디오 스트림의 패킷 플래그만 읽어 (디코딩 없이) 키프레임 번호와 전체 프레임 수를 구합니다.
+
+        Args
+            - video_path (str): 비디오 파일 경로
+
+        Return
+            - keyframes (list): 키프레임 번호, ffprobe를 사용할 수 없으면 None
+            - frame_count (int): 전체 프레임 수, ffprobe를 사용할 수 없으면 None
+    """
+
+    if shutil.which("ffprobe") is None:
+        return None, None
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=flags", "-of", "csv=p=0", video_path,
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    flags = [line for line in output.splitlines() if line.strip()]
+    keyframes = [frame_number for frame_number, flag in enumerate(flags) if "K" in flag]
+    return keyframes, len(flags)
+
+
+def split_frame_ranges(frame_count, num_chunks, keyframes=None):
+    """
+        프레임 구간 [0, frame_count)를 num_chunks개 이하의 연속 구간으로 나눕니다.
+        키프레임 번호가 주어지면 구간 경계를 균등 분할 지점에 가장 가까운 키프레임으로 맞춰, 각 구간이 탐색 없이 키프레임부터 디코딩되도록 합니다.
+
+        Args
+            - frame_count (int): 전체 프레임 수
+            - num_chunks (int): 나눌 구간 수
+            - keyframes (list | None): 키프레임 번호
+
+        Return
+            - ranges (list): [(start, end), ...]
+    """
+
+    if frame_count <= 0:
+        return []
+    num_chunks = max(1, min(num_chunks, frame_count))
+    targets = [round(frame_count * i / num_chunks) for i in range(1, num_chunks)]
+    if keyframes:
+        keyframes = np.asarray(keyframes)
+        targets = [int(keyframes[np.abs(keyframes - target).argmin()]) for target in targets]
+    bounds = sorted({0, frame_count, *[target for target in targets if 0 < target < frame_count]})
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _decode_range(video_path, start, end, frame_interval, max_size, jpeg_dir, store_path, store_shape, messages, chunk):
+    """
+        프로세스 하나에서 [start, end) 구간의 프레임을 디코딩하여 JPEG 파일과 미리 할당된 메모리 맵에 저장합니다.
+        end가 None이면 (마지막 구간) 더 읽을 프레임이 없을 때까지 디코딩하며, 메모리 맵 크기를 넘는 프레임은 파일 뒤에 이어 씁니다.
+
+        진행 상황은 messages 큐로 ("progress", chunk, 저장한 프레임 수)를 보내고,
+        끝나면 ("done", chunk, 저장한 프레임 번호 목록) 또는 ("error", chunk, 메시지)를 보냅니다.
+    """
+
+    cap = None
+    store = None
+    store_fd = None
+    frame_numbers = []
+    try:
+        # 프로세스 단위로 병렬화하므로 OpenCV 내부 스레드 풀은 사용하지 않습니다.
+        cv2.setNumThreads(1)
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Error opening video file: {video_path}")
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        if store_path is not None:
+            store = np.memmap(store_path, dtype=np.uint8, mode="r+", shape=store_shape)
+        filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
+
+        frame_number = start
+        while end is None or frame_number < end:
+            if frame_number % frame_interval:
+                if not cap.grab():
+                    break
+                frame_number += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = resize_frame(frame, max_size)
+            if jpeg_dir is not None:
+                cv2.imwrite(jpeg_frame_path(jpeg_dir, filename_without_ext, frame_number), frame)
+            if store is not None:
+                slot = frame_number // frame_interval
+                if frame.shape != store.shape[1:]:
+                    raise ValueError(f"frame {frame_number} has shape {frame.shape}, expected {store.shape[1:]}")
+                if slot < len(store):
+                    store[slot] = frame
+                else:
+                    # CAP_PROP_FRAME_COUNT가 실제보다 적은 경우 남은 프레임을 파일 뒤에 이어 씁니다.
+                    if store_fd is None:
+                        store_fd = os.open(store_path, os.O_WRONLY)
+                    os.pwrite(store_fd, np.ascontiguousarray(frame).tobytes(), slot * frame.nbytes)
+            frame_numbers.append(frame_number)
+            if len(frame_numbers) % 10 == 0:
+                messages.put(("progress", chunk, len(frame_numbers)))
+            frame_number += 1
+        if store is not None:
+            store.flush()
+        messages.put(("done", chunk, frame_numbers))
+    except Exception as e:
+        messages.put(("error", chunk, f"{type(e).__name__}: {e}"))
+    finally:
+        if cap is not None:
+            cap.release()
+        if store_fd is not None:
+            os.close(store_fd)
+        del store
+
+
+def decode_video_chunked(video_path, jpeg_dir=None, store_dir=None, frame_interval=1, max_size=None, workers=None,
+                         progress=None):
+    """
+        비디오를 키프레임 기준의 시간 구간으로 나눠 구간마다 별도 프로세스에서 디코딩하고,
+        각 프레임을 JPEG 파일 그리고/또는 RawFrameStore로 저장합니다.
+
+        RawFrameStore의 frames.raw는 출력 프레임 수만큼 미리 할당한 메모리 맵이며, 각 프로세스가 자기 프레임 위치에 직접 씁니다.
+        JPEG 파일명과 FrameIndex 등록 방식은 decode_video와 같습니다.
+        프레임 수를 알 수 없거나 구간이 하나뿐이면 decode_video로 순차 처리합니다.
+        마지막 구간은 decode_video와 같이 비디오 끝까지 읽으므로, 예상 프레임 수가 실제와 달라도 프레임이 빠지지 않으며
+        frames.raw는 실제로 저장한 프레임 수에 맞게 늘리거나 줄입니다.
+
+        Args
+            - video_path (str): 비디오 파일 경로
+            - jpeg_dir (str | None): JPEG 프레임이 저장될 경로, None이면 JPEG를 저장하지 않음
+            - store_dir (str | None): RawFrameStore 경로, None이면 저장소를 만들지 않음
+            - frame_interval (int): frame_interval 프레임마다 하나씩 저장
+            - max_size (int | None): 저장할 프레임의 긴 변 최대 크기, None이면 원본 크기
+            - workers (int | None): 디코딩 프로세스 수, None이면 CPU 코어 수
+            - progress (callable | None): progress(저장한 프레임 수, 전체 프레임 수)로 진행 상황을 전달받을 함수
+
+        Raise
+            - IOError: 비디오 파일을 열 수 없는 경우
+            - RuntimeError: 디코딩 프로세스에서 오류가 발생한 경우
+
+        Return
+            - frame_count (int): 저장한 프레임 수
+    """
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Error opening video file: {video_path}")
+    width, height = limit_frame_size(
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), max_size
+    )
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    keyframes, probed_count = probe_keyframes(video_path)
+    if probed_count:
+        frame_count = probed_count
+    ranges = split_frame_ranges(frame_count, workers or os.cpu_count() or 1, keyframes)
+    if len(ranges) <= 1:
+        return decode_video(video_path, jpeg_dir, store_dir, frame_interval, max_size=max_size, progress=progress)
+    # 프레임 수는 추정값일 수 있으므로 (VFR 등) 마지막 구간은 끝까지 읽습니다.
+    ranges[-1] = (ranges[-1][0], None)
+
+    frame_index = None
+    if jpeg_dir is not None:
+        os.makedirs(jpeg_dir, exist_ok=True)
+        frame_index = FrameIndex.load(jpeg_dir)
+
+    total = math.ceil(frame_count / frame_interval)
+    store_path = store_shape = None
+    if store_dir is not None:
+        # 기존 인덱스를 지워 디코딩이 끝나기 전에는 저장소를 읽을 수 없도록 합니다.
+        os.makedirs(store_dir, exist_ok=True)
+        index_path = os.path.join(store_dir, RawFrameStore.index_name)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        store_path = os.path.join(store_dir, RawFrameStore.data_name)
+        store_shape = (total, height, width, 3)
+        np.memmap(store_path, dtype=np.uint8, mode="w+", shape=store_shape).flush()
+
+    # 서버의 다른 스레드가 잡고 있던 lock이 자식 프로세스에 복제되지 않도록 fork 대신 forkserver(없으면 spawn)로 시작합니다.
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(start_method)
+    messages = context.Queue()
+    processes = [
+        context.Process(
+            target=_decode_range,
+            args=(video_path, start, end, frame_interval, max_size, jpeg_dir, store_path, store_shape, messages, chunk),
+            daemon=True,
+        )
+        for chunk, (start, end) in enumerate(ranges)
+    ]
+    for process in processes:
+        process.start()
+
+    done = {}
+    errors = []
+    counts = [0] * len(ranges)
+    try:
+        while len(done) + len(errors) < len(processes):
+            try:
+                kind, chunk, payload = messages.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    errors.append("decoding process exited without a result")
+                continue
+            if kind == "progress":
+                counts[chunk] = payload
+            elif kind == "done":
+                done[chunk] = payload
+                counts[chunk] = len(payload)
+            else:
+                errors.append(payload)
+            if progress is not None:
+                progress(sum(counts), total)
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+    if errors:
+        raise RuntimeError(f"Error decoding {video_path}: {errors[0]}")
+
+    frame_numbers = [frame_number for chunk in sorted(done) for frame_number in done[chunk]]
+    if store_dir is not None:
+        frame_bytes = int(np.prod(store_shape[1:]))
+        num_slots = frame_numbers[-1] // frame_interval + 1 if frame_numbers else 0
+        os.truncate(store_path, num_slots * frame_bytes)
+        offsets = {frame_number: frame_number // frame_interval * frame_bytes for frame_number in frame_numbers}
+        RawFrameStore.write_index(store_dir, store_shape[1:], np.uint8, offsets)
+
+    if frame_index is not None:
+        filename_without_ext = os.path.splitext(os.path.basename(video_path))[0]
+        for frame_number in frame_numbers:
+            frame_index.add(frame_number, jpeg_frame_path(jpeg_dir, filename_without_ext, frame_number), save=False)
+        frame_index.save()
+
+    return len(frame_numbers)
@@ -0,0 +1,54 @@
+import importlib.util
+import os
+
+import numpy as np
+
+# utils.log_sync 패키지는 외부 의존성이 있는 모듈을 함께 import 하므로 sync_engine만 직접 읽습니다.
+_backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location(
+    'sync_engine', os.path.join(_backend_dir, 'utils', 'log_sync', 'sync_engine.py'))
+sync_engine = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sync_engine)
+
+
+def segment_edges_loop(is_video):
+    """
+        기존 get_mov_idx의 행 단위 루프 구현입니다.
+    """
+
+    start_idx, end_idx = [], []
+    for idx in range(len(is_video)):
+        if idx == 0:
+            if is_video[idx]:
+                start_idx.append(idx)
+        elif idx == len(is_video) - 1:
+            if is_video[idx - 1] and is_video[idx]:
+                end_idx.append(idx)
+        else:
+            if not is_video[idx - 1] and is_video[idx]:
+                start_idx.append(idx)
+            if is_video[idx - 1] and not is_video[idx]:
+                end_idx.append(idx)
+    return start_idx, end_idx
+
+
+def test_segment_edges_starts_on_last_row():
+    starts, ends = sync_engine.segment_edges([False, True, True, False, False, True])
+    assert starts.tolist() == [1]
+    assert ends.tolist() == [3]
+
+
+def test_segment_edges_matches_loop():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        is_video = rng.random(rng.integers(2, 30)) < rng.random()
+        starts, ends = sync_engine.segment_edges(is_video)
+        assert len(starts) == len(ends)
+
+        loop_starts, loop_ends = segment_edges_loop(is_video.tolist())
+        if len(is_video) > 1 and is_video[-2] and not is_video[-1]:
+            # 마지막 행의 True -> False도 구간의 끝으로 봅니다.
+            # (기존 루프는 이 끝을 빠뜨려 시작과 끝의 길이가 맞지 않았음)
+            loop_ends.append(len(is_video) - 1)
+        assert starts.tolist() == loop_starts
+        assert ends.tolist() == loop_ends
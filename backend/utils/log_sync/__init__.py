@@ -1 +1 @@
-from . import adjust_height, adjust_log
\ No newline at end of file
+from . import adjust_height, adjust_log, geoid, sync_engine, tide
\ No newline at end of file
@@ -1,39 +1,35 @@
-from urllib.request import urlopen
-import xmltodict
-import json
 from haversine import haversine
-import pandas as pd
+import numpy as np
+from utils.log_sync.geoid import GEOID_PATH, GeoidModel
+from utils.log_sync.sync_engine import haversine_km
+from utils.log_sync.tide import KhoaTideProvider, TideLevelCache
 
 
 # DT_0023 : moseul-po, DT_0010 : seogwi-po, DT_0020 : seongsan-po, DT_0004 : jeju
 khoa_coord = {'DT_0023': [33.214, 126.251], 'DT_0004': [33.527, 126.543],
               'DT_0022': [33.474, 126.927], 'DT_0010': [33.24, 126.561]}
 
+# tide level cache used by get_level (replace the provider to sync without network)
+tide_levels = TideLevelCache(KhoaTideProvider())
+
 
 # get geoid height from KNGeoid18 data
-# input target point must be two column list type of [latitude, longitude]
+# input target point must be [latitude, longitude] or N x 2 array of [latitude, longitude]
 def get_geoid_hgt(target_pt):
     """
         국토지리정보원에서 제공하는 KNGeoid18 데이터로부터 geoid의 높이를 구합니다.
 
+        KNGeoid18 격자는 GeoidModel로 한 번만 읽으며, 주변 격자점 사이를 이중선형 보간합니다.
+
         Args
-            - target_pt (list): [latitude, longitude]의 두 컬럼으로 구성된 입력 포인트
+            - target_pt (list or np.ndarray): [latitude, longitude] 또는 N x [latitude, longitude]의 입력 포인트
 
         Return
-            - hgt_geoid (list): geoid의 높이 정보 리스트
+            - hgt_geoid (float or np.ndarray): geoid의 높이, 입력이 N개의 포인트이면 N개의 배열
     """
 
-    with open('utils/log_sync/KNGeoid18.dat') as geoid_dir:
-        geoid_file = geoid_dir.read()
-    geoid = [file.split('\t') for file in geoid_file.split('\n')]
-
-    dist_list = []
-    for point in geoid[:-1]:
-        dist_list.append([haversine(target_pt, [float(coord) for coord in point[:2]]), float(point[2])])
-
-    hgt_geoid = sorted(dist_list, key=lambda x: x[0])[0][-1]
-
-    return hgt_geoid
+    target_pt = np.asarray(target_pt, dtype=np.float64)
+    return GeoidModel.load(GEOID_PATH).height(target_pt[..., 0], target_pt[..., 1])
 
 
 # get adjacent khoa observation point
@@ -62,6 +58,9 @@ def get_level(date, obs_code='DT_0023'):
     """
         국립해양조사원(khao)의 OpenAPI를 활용하여 조위를 구합니다.
 
+        조위는 tide_levels 캐시를 거쳐 조회하므로, 이미 조회한 (관측점, 시간)은 네트워크 요청 없이 디스크 캐시에서 읽습니다.
+        오프라인 환경에서는 tide_levels의 provider를 LocalTideProvider 또는 ConstantTideProvider로 교체하여 사용합니다.
+
         Args
             - date (str): 날짜
             - obs_code (str): 관측코드
@@ -70,22 +69,58 @@ def get_level(date, obs_code='DT_0023'):
             - 특정 시간에서의 조위 값 (int)
     """
 
-    khoa_url = "http://www.khoa.go.kr/api/oceangrid/tideObs/search.do?" + \
-               "ServiceKey=JXRQtwmuwRIKOblp9dTWww==" + \
-               "&ObsCode=" + obs_code + "&Date=" + date[:8] + "&ResultType=xml"
+    return tide_levels.get_level(date, obs_code)
+
+
+def prefetch_levels(target_pt, start, end):
+    """
+        입력 좌표에서 가장 가까운 관측점의 비행 시간 범위 조위를 미리 캐시에 저장합니다.
+
+        Args
+            - target_pt (list): [latitude, longitude]
+            - start (str): 비행 시작 시각 ('%Y%m%d%H%M%S')
+            - end (str): 비행 종료 시각 ('%Y%m%d%H%M%S')
+
+        Return
+            - hours (list): 캐시된 시간 목록 ('%Y%m%d%H')
+    """
+
+    return tide_levels.prefetch(get_obs(target_pt), start, end)
+
+
+def get_offsets(osd_lat, osd_lon, home_lat, home_lon, date):
+    """
+        여러 프레임의 해수면으로부터의 드론 높이 보정값을 한 번에 계산합니다.
+
+        프레임마다 가장 가까운 관측점을 고르고, 조위는 관측점별로 한 번만 조회합니다.
+
+        Args
+            - osd_lat (np.ndarray): 프레임별 OSD.latitude
+            - osd_lon (np.ndarray): 프레임별 OSD.longitude
+            - home_lat (np.ndarray): 프레임별 HOME.latitude
+            - home_lon (np.ndarray): 프레임별 HOME.longitude
+            - date (str): 비행 날짜
+
+        Return
+            - osd_hgt_offset (np.ndarray): 프레임별 해수면으로부터의 드론 높이 보정값
+    """
 
-    resp = urlopen(khoa_url)
-    resp_body = resp.read().decode("utf-8")
-    xml_parse = xmltodict.parse(resp_body)
-    xml_dict = json.loads(json.dumps(xml_parse))
+    osd_lat, osd_lon, home_lat, home_lon = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64).ravel()
+                                                                 for value in (osd_lat, osd_lon, home_lat, home_lon)))
 
-    df_tide = pd.DataFrame(columns=['time', 'tide_level'])
-    for idx, case in enumerate(xml_dict['result']['data']):
-        df_tide.loc[idx] = [case['record_time'].split(' ')[-1], case['tide_level']]
+    obs_names = list(khoa_coord)
+    obs_coord = np.array([khoa_coord[obs] for obs in obs_names], dtype=np.float64)
+    obs_dist = np.stack([haversine_km(lat, lon, osd_lat, osd_lon) for lat, lon in obs_coord])
+    obs_idx = np.argmin(obs_dist, axis=0)
 
-    q_time = date[8:10] + ':' + date[10:12] + ':' + '00'
+    # same formula as get_offset, evaluated for every frame
+    obs_geoid = get_geoid_hgt(obs_coord)
+    obs_level = np.zeros(len(obs_names))
+    for idx in np.unique(obs_idx):
+        obs_level[idx] = get_level(date, obs_names[idx])
 
-    return int(df_tide[df_tide['time'] == q_time]['tide_level'])
+    return (get_geoid_hgt(np.column_stack([home_lat, home_lon])) - obs_geoid[obs_idx]) + \
+        (400 - obs_level[obs_idx]) / 100.
 
 
 # execute main function
@@ -2,17 +2,13 @@ import os
 import sys
 import glob
 import cv2
-import datetime
+import numpy as np
 import pandas as pd
-from haversine import haversine
-from utils.log_sync.adjust_height import get_offset
+from utils.log_sync.adjust_height import get_offsets, prefetch_levels
+from utils.log_sync.sync_engine import (FlightLog, match_segment, non_numeric_cols, read_srt, resample_rows,
+                                        segment_edges, time_diff_seconds, use_cols)
 # from log_sync import adjust_height
 
-use_cols = ['OSD.latitude', 'OSD.longitude', 'OSD.height [ft]', 'OSD.altitude [ft]',
-            'OSD.xSpeed [MPH]', 'OSD.ySpeed [MPH]', 'OSD.zSpeed [MPH]', 'OSD.directionOfTravel',
-            'OSD.pitch', 'OSD.roll', 'OSD.yaw', 'OSD.droneType', 'GIMBAL.pitch', 'GIMBAL.roll', 'GIMBAL.yaw',
-            'HOME.longitude', 'HOME.latitude', 'CAMERA.isVideo', 'OSD.flyTime [s]']
-
 drone_type = {'Mavic 2':'mavic2zoom', 'Mavic Pro':'mavicpro', 'Mavic 3':'mavic2procine', 'Mavic Mini':'mavicmini'}
 
 
@@ -28,21 +24,8 @@ def get_log(csv_path):
             - base_time (datetime): csv 파일명에서 추출한 시간 정보
     """
 
-    pd_log = pd.read_csv(csv_path, encoding='utf-8', low_memory=False).reset_index(drop=False)
-    pd_log.columns = list(pd_log.iloc[0])
-
-    pd_use_log = pd_log[1:][use_cols].reset_index(drop=True)
-
-    # get date info from file name
-    str_time = os.path.basename(csv_path)[16:-4].replace('_', ' ').replace('[', '').replace(']', '')
-    base_time = datetime.datetime.strptime(str_time, '%Y-%m-%d %H-%M-%S')
-    # convert record time based on the fly time info
-    record_time = [base_time+datetime.timedelta(seconds=float(diff_time)) for diff_time in pd_use_log['OSD.flyTime [s]']]
-
-    pd_use_log.insert(0, 'CUSTOM.date [local]', record_time)
-    pd_use_log = pd_use_log.drop(columns='OSD.flyTime [s]')
-    #print(pd_use_log)
-    return pd_use_log, base_time.strftime('%Y%m%d%H%M%S')
+    log = FlightLog.load(csv_path)
+    return log.to_frame(), log.flight_date
 
 
 def get_srt(srt_path, osd_typ='mavic2zoom'):
@@ -59,35 +42,7 @@ def get_srt(srt_path, osd_typ='mavic2zoom'):
             ex) pd.DataFrame({'time_now': df_time, 'latitude': df_lat, 'longitude': df_lon, 'focal_length': df_fl})
     """
 
-    srt_file = open(srt_path, 'r', encoding='utf-8')
-    txt_srt = srt_file.readlines()
-    srt_file.close()
-
-    df_time, df_lat, df_lon, df_fl = [], [], [], []
-
-    if osd_typ=='mavic2zoom':
-        for idx, line in enumerate(txt_srt):
-            line = line.strip()
-            if idx % 6 == 3:
-                df_time.append(datetime.datetime.strptime(line[:19], '%Y-%m-%d %H:%M:%S'))
-            elif idx % 6 == 4:
-                divide = line.split('] [')
-                df_fl.append(float(divide[6].split(': ')[-1]))
-                df_lat.append(float(divide[7].split(': ')[-1]))
-                df_lon.append(float(divide[8].split(': ')[-1]))
-
-    elif osd_typ=='mavicpro':
-        for idx, line in enumerate(txt_srt):
-            line = line.strip()
-            if idx % 6 == 2:
-                df_time.append(datetime.datetime.strptime(line.split(') ')[-1], '%Y.%m.%d %H:%M:%S'))
-            elif idx % 6 == 3:
-                divide = line.split(') ')[0][4:].split(',')
-                df_lat.append(float(divide[1]))
-                df_lon.append(float(divide[0]))
-        df_fl += [280]*len(df_time) # focal length value of mavic2 drone is 28 mm
-
-    pd_srt = pd.DataFrame({'time_now': df_time, 'latitude': df_lat, 'longitude': df_lon, 'focal_length': df_fl})
+    pd_srt = pd.DataFrame(read_srt(srt_path, osd_typ))
 
     return pd_srt
 
@@ -105,24 +60,7 @@ def get_mov_idx(pd_log):
             ex) pd.DataFrame({'idx_start': start_idx, 'idx_end': end_idx})
     """
 
-    mov_status = list(pd_log['CAMERA.isVideo'])
-    start_idx = []
-    end_idx = []
-
-    for idx in range(len(mov_status)):
-        if idx == 0:
-            if mov_status[idx] == 'True':
-                start_idx.append(idx)
-        elif idx == len(mov_status) - 1:
-            if mov_status[idx - 1] == 'True' and mov_status[idx] == 'True':
-                end_idx.append(idx)
-        else:
-            if mov_status[idx - 1] == 'False' and mov_status[idx] == 'True':
-                start_idx.append(idx)
-
-            if mov_status[idx - 1] == 'True' and mov_status[idx] == 'False':
-                end_idx.append(idx)
-
+    start_idx, end_idx = segment_edges(pd_log['CAMERA.isVideo'].astype(str).to_numpy() == 'True')
     pd_idx = pd.DataFrame({'idx_start': start_idx, 'idx_end': end_idx})
 
     return pd_idx
@@ -140,12 +78,7 @@ def get_time_diff(time1, time2):
             - 두 타임스탬프 간의 차이를 초 단위로 나타낸 값
     """
 
-    if time1 > time2:
-        return (time1 - time2).seconds
-    elif time1 < time2:
-        return (time2 - time1).seconds
-    else:
-        return 0
+    return int(time_diff_seconds(time1, [time2])[0])
 
 
 def get_num_frame(mov_path):
@@ -181,30 +114,16 @@ def match_srt(pd_log, pd_srt, pd_idx):
             - end_idx (?): ?
     """
 
-    # get lat/lon info of start & end point in input SRT file
-    start_point = list(pd_srt[['time_now','latitude','longitude']].iloc[0])
-
-    # get lat/lon info of start & end point in entire CSV file
-    coord_start = pd_log[['CUSTOM.date [local]','OSD.latitude','OSD.longitude']].iloc[list(pd_idx['idx_start'])]
-    coord_end = pd_log[['CUSTOM.date [local]','OSD.latitude','OSD.longitude']].iloc[list(pd_idx['idx_end'])]
-
-    # calculate time & distance of start point
-    start_dist, start_time = [], []
-    for idx in range(len(coord_start)):
-        start_dist.append(haversine(start_point[1:],
-                                    [float(coord_start['OSD.latitude'].iloc[idx]),
-                                     float(coord_start['OSD.longitude'].iloc[idx])]))
-        start_time.append(get_time_diff(start_point[0], coord_start['CUSTOM.date [local]'].iloc[idx]))
-
-    # get SRT matching region based on time (major) & distance (minor)
-    if min(start_time) <= 60:
-        start_idx = coord_start.index[start_time.index(min(start_time))]
-        end_idx = coord_end.index[start_time.index(min(start_time))]
-        print('match type: time')
-    else:
-        start_idx = coord_start.index[start_dist.index(min(start_dist))]
-        end_idx = coord_end.index[start_dist.index(min(start_dist))]
-        print('match type: distance')
+    srt = {col: pd_srt[col].to_numpy() for col in ['time_now', 'latitude', 'longitude']}
+    start_idx, end_idx, match_type = match_segment(
+        pd_log['CUSTOM.date [local]'].to_numpy(),
+        pd_log['OSD.latitude'].to_numpy(dtype=np.float64),
+        pd_log['OSD.longitude'].to_numpy(dtype=np.float64),
+        pd_idx['idx_start'].to_numpy(),
+        pd_idx['idx_end'].to_numpy(),
+        srt,
+    )
+    print(f'match type: {match_type}')
 
     return pd_log[start_idx:end_idx+1], start_idx, end_idx
 
@@ -256,7 +175,7 @@ def adjust_csv_w_srt(pd_log, pd_srt, cnt_frame):
     """
 
     pd_log_adjust = pd_log.copy()
-    pd_log_adjust = pd_log_adjust.drop(['CUSTOM.date [local]','CAMERA.isVideo','OSD.droneType'], axis='columns')
+    pd_log_adjust = pd_log_adjust.drop(non_numeric_cols, axis='columns')
 
     print("video length:", cnt_frame, ' ', "srt length:", len(pd_srt))
 
@@ -269,16 +188,8 @@ def adjust_csv_w_srt(pd_log, pd_srt, cnt_frame):
         print("Thus, we set the final length of log file into the length of video")
         len_log = cnt_frame
 
-    pd_log_final = pd.DataFrame(index=range(len_log), columns=pd_log_adjust.columns)
-
-    cnt = 0.
-    cnt_inc = len_log / len(pd_log_adjust)
-    for idx in range(len(pd_log_adjust)):
-        pd_log_final.iloc[int(cnt)] = pd_log_adjust.iloc[idx]
-        cnt += cnt_inc
-
-    pd_log_final = pd_log_final.astype('float')
-    pd_log_final = pd_log_final.interpolate(method='values')
+    pd_log_final = pd.DataFrame(resample_rows(pd_log_adjust.to_numpy(dtype=np.float64), len_log),
+                                columns=pd_log_adjust.columns)
 
     pd_log_final.insert(0, 'FrameCnt', [idx+1 for idx in range(len_log)])
     pd_log_final.insert(1, 'focal_length', pd_srt['focal_length'])
@@ -300,24 +211,37 @@ def adjust_csv_wo_srt(pd_log, cnt_frame):
             - pd_log_final (pd.DataFrame): ?
     """
     pd_log_adjust = pd_log.copy()
-    pd_log_adjust = pd_log_adjust.drop(['CUSTOM.date [local]','CAMERA.isVideo','OSD.droneType'], axis='columns')
+    pd_log_adjust = pd_log_adjust.drop(non_numeric_cols, axis='columns')
 
-    pd_log_final = pd.DataFrame(index=range(cnt_frame), columns=pd_log_adjust.columns)
-
-    cnt = 0.
-    cnt_inc = cnt_frame / len(pd_log_adjust)
-    for idx in range(len(pd_log_adjust)):
-        pd_log_final.iloc[int(cnt)] = pd_log_adjust.iloc[idx]
-        cnt += cnt_inc
-
-    pd_log_final = pd_log_final.astype('float')
-    pd_log_final = pd_log_final.interpolate(method='values')
+    pd_log_final = pd.DataFrame(resample_rows(pd_log_adjust.to_numpy(dtype=np.float64), cnt_frame),
+                                columns=pd_log_adjust.columns)
 
     pd_log_final.insert(0, 'FrameCnt', [idx+1 for idx in range(cnt_frame)])
 
     return pd_log_final
 
 
+def prefetch_flight_levels(pd_log, flight_date):
+    """
+        비행 시간 범위의 조위를 비행 시작 지점에서 가장 가까운 관측점에 대해 미리 캐시에 저장합니다.
+
+        조회에 실패해도 높이 보정 시 다시 조회하므로 경고만 출력합니다.
+
+        Args
+            - pd_log (pd.DataFrame): get_log로 읽은 비행 로그
+            - flight_date (str): 비행 시작 시각 ('%Y%m%d%H%M%S')
+    """
+
+    coords = pd_log[['OSD.latitude', 'OSD.longitude']].dropna()
+    if coords.empty:
+        return
+    end_date = pd.Timestamp(pd_log['CUSTOM.date [local]'].iloc[-1]).strftime('%Y%m%d%H%M%S')
+    try:
+        prefetch_levels(coords.iloc[0].tolist(), flight_date, end_date)
+    except Exception as e:
+        print(f"[WARNING] failed to prefetch tide levels ({e})")
+
+
 def main(argv):
     """
         ?
@@ -338,14 +262,15 @@ def main(argv):
 
     pd_use_log, flight_date = get_log(log_dir)
     osd_dronetype = list(set(pd_use_log['OSD.droneType']))[0]
+    prefetch_flight_levels(pd_use_log, flight_date)
     osd_typ = drone_type[osd_dronetype]
 
     if len(srt_dir_list):
+        pd_use_idx = get_mov_idx(pd_use_log)
         for srt_dir in srt_dir_list:
             out_dir = srt_dir.replace('SRT', 'csv')
 
             pd_use_srt = get_srt(srt_dir, osd_typ)
-            pd_use_idx = get_mov_idx(pd_use_log)
 
             pd_use_log_adjust, start_idx, end_idx = match_srt(pd_use_log, pd_use_srt, pd_use_idx)
             pd_use_log_final = adjust_csv_w_srt(pd_use_log_adjust, pd_use_srt)
@@ -355,13 +280,12 @@ def main(argv):
             pd_use_log_final = pd_use_log_final.fillna(method='ffill')
 
             # adjust height
-            osd_info = (float(pd_use_log_final['OSD.latitude'][0]), float(pd_use_log_final['OSD.longitude'][0]),
-                        float(pd_use_log_final['HOME.latitude'][0]), float(pd_use_log_final['HOME.longitude'][0]))
-
-            osd_hgt_offset = adjust_height.get_offset(osd_info, flight_date)
-            print("Adjusted height : ", osd_hgt_offset)
+            # 프레임마다 가장 가까운 관측점 기준으로 높이를 보정합니다.
+            osd_hgt_offset = get_offsets(pd_use_log_final['OSD.latitude'], pd_use_log_final['OSD.longitude'],
+                                         pd_use_log_final['HOME.latitude'], pd_use_log_final['HOME.longitude'], flight_date)
+            print("Adjusted height : ", osd_hgt_offset[0])
 
-            pd_use_log_final['adjusted height'] = [hgt * 0.3048 + osd_hgt_offset for hgt in pd_use_log_final['OSD.height [ft]']]
+            pd_use_log_final['adjusted height'] = pd_use_log_final['OSD.height [ft]'].to_numpy() * 0.3048 + osd_hgt_offset
             pd_use_log_final['Drone type'] = [osd_dronetype] * len(pd_use_log_final)
             pd_use_log_final = pd_use_log_final.drop(['OSD.height [ft]', 'OSD.altitude [ft]'], axis=1)
 
@@ -386,14 +310,12 @@ def main(argv):
             pd_use_log_final = pd_use_log_final.fillna(method='backfill')
             pd_use_log_final = pd_use_log_final.fillna(method='ffill')
 
-            osd_info = (float(pd_use_log_final['OSD.latitude'][0]), float(pd_use_log_final['OSD.longitude'][0]),
-                        float(pd_use_log_final['HOME.latitude'][0]), float(pd_use_log_final['HOME.longitude'][0]))
-
-            osd_hgt_offset = adjust_height.get_offset(osd_info, flight_date)
-            print("Adjusted height : ", osd_hgt_offset)
+            # 프레임마다 가장 가까운 관측점 기준으로 높이를 보정합니다.
+            osd_hgt_offset = get_offsets(pd_use_log_final['OSD.latitude'], pd_use_log_final['OSD.longitude'],
+                                         pd_use_log_final['HOME.latitude'], pd_use_log_final['HOME.longitude'], flight_date)
+            print("Adjusted height : ", osd_hgt_offset[0])
 
-            pd_use_log_final['adjusted height'] = [hgt * 0.3048 + osd_hgt_offset for hgt in
-                                                   pd_use_log_final['OSD.height [ft]']]
+            pd_use_log_final['adjusted height'] = pd_use_log_final['OSD.height [ft]'].to_numpy() * 0.3048 + osd_hgt_offset
 
             pd_use_log_final = pd_use_log_final.drop(['OSD.height [ft]', 'OSD.altitude [ft]'], axis=1)
 
@@ -422,6 +344,7 @@ def do_sync(video_path, csv_path, srt_path, save_path):
 
     pd_use_log, flight_date = get_log(log_dir)
     osd_dronetype = list(set(pd_use_log['OSD.droneType']))[0]
+    prefetch_flight_levels(pd_use_log, flight_date)
     osd_typ = drone_type[osd_dronetype]
 
     video_list_1 = glob.glob(os.path.join(video_path, '*.mov'))
@@ -432,11 +355,11 @@ def do_sync(video_path, csv_path, srt_path, save_path):
     out_dir = os.path.join(save_path, 'sync_log.csv')
 
     if len(srt_dir_list):
+        pd_use_idx = get_mov_idx(pd_use_log)
         for srt_dir in srt_dir_list:
             # out_dir = srt_dir.replace('SRT', 'csv')
 
             pd_use_srt = get_srt(srt_dir, osd_typ)
-            pd_use_idx = get_mov_idx(pd_use_log)
 
             pd_use_log_adjust, start_idx, end_idx = match_srt(pd_use_log, pd_use_srt, pd_use_idx)
             pd_use_log_final = adjust_csv_w_srt(pd_use_log_adjust, pd_use_srt, cnt_frame)
@@ -446,13 +369,12 @@ def do_sync(video_path, csv_path, srt_path, save_path):
             pd_use_log_final = pd_use_log_final.fillna(method='ffill')
 
             # adjust height
-            osd_info = (float(pd_use_log_final['OSD.latitude'][0]), float(pd_use_log_final['OSD.longitude'][0]),
-                        float(pd_use_log_final['HOME.latitude'][0]), float(pd_use_log_final['HOME.longitude'][0]))
-
-            osd_hgt_offset = get_offset(osd_info, flight_date)
-            print("Adjusted height : ", osd_hgt_offset)
+            # 프레임마다 가장 가까운 관측점 기준으로 높이를 보정합니다.
+            osd_hgt_offset = get_offsets(pd_use_log_final['OSD.latitude'], pd_use_log_final['OSD.longitude'],
+                                         pd_use_log_final['HOME.latitude'], pd_use_log_final['HOME.longitude'], flight_date)
+            print("Adjusted height : ", osd_hgt_offset[0])
 
-            pd_use_log_final['adjusted height'] = [hgt * 0.3048 + osd_hgt_offset for hgt in pd_use_log_final['OSD.height [ft]']]
+            pd_use_log_final['adjusted height'] = pd_use_log_final['OSD.height [ft]'].to_numpy() * 0.3048 + osd_hgt_offset
             pd_use_log_final['Drone type'] = [osd_dronetype] * len(pd_use_log_final)
             pd_use_log_final = pd_use_log_final.drop(['OSD.height [ft]', 'OSD.altitude [ft]'], axis=1)
 
@@ -479,14 +401,12 @@ def do_sync(video_path, csv_path, srt_path, save_path):
             pd_use_log_final = pd_use_log_final.fillna(method='backfill')
             pd_use_log_final = pd_use_log_final.fillna(method='ffill')
 
-            osd_info = (float(pd_use_log_final['OSD.latitude'][0]), float(pd_use_log_final['OSD.longitude'][0]),
-                        float(pd_use_log_final['HOME.latitude'][0]), float(pd_use_log_final['HOME.longitude'][0]))
-
-            osd_hgt_offset = get_offset(osd_info, flight_date)
-            print("Adjusted height : ", osd_hgt_offset)
+            # 프레임마다 가장 가까운 관측점 기준으로 높이를 보정합니다.
+            osd_hgt_offset = get_offsets(pd_use_log_final['OSD.latitude'], pd_use_log_final['OSD.longitude'],
+                                         pd_use_log_final['HOME.latitude'], pd_use_log_final['HOME.longitude'], flight_date)
+            print("Adjusted height : ", osd_hgt_offset[0])
 
-            pd_use_log_final['adjusted height'] = [hgt * 0.3048 + osd_hgt_offset for hgt in
-                                                   pd_use_log_final['OSD.height [ft]']]
+            pd_use_log_final['adjusted height'] = pd_use_log_final['OSD.height [ft]'].to_numpy() * 0.3048 + osd_hgt_offset
 
             pd_use_log_final = pd_use_log_final.drop(['OSD.height [ft]', 'OSD.altitude [ft]'], axis=1)
 
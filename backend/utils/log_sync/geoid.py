@@ -0,0 +1,191 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+GEOID_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'KNGeoid18.dat')
+
+
+def unit_vectors(lat, lon):
+    """
+        위경도를 단위 구 위의 3차원 좌표로 변환합니다. 두 점 사이의 직선 거리는 대원 거리와 같은 순서를 가집니다.
+
+        Args
+            - lat (np.ndarray): 위도
+            - lon (np.ndarray): 경도
+
+        Return
+            - xyz (np.ndarray): N x 3 단위 벡터
+    """
+
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def regular_grid(lat, lon, hgt):
+    """
+        격자점들이 위경도 방향으로 등간격인 정규 격자를 이루면 2차원 배열로 정리합니다.
+
+        Args
+            - lat (np.ndarray): 격자점 위도
+            - lon (np.ndarray): 격자점 경도
+            - hgt (np.ndarray): 격자점 geoid 높이
+
+        Return
+            - grid (tuple): (lat0, lon0, dlat, dlon, heights), 정규 격자가 아니면 None
+    """
+
+    ulat, ulon = np.unique(lat), np.unique(lon)
+    if len(ulat) < 2 or len(ulon) < 2 or len(ulat) * len(ulon) != len(lat):
+        return None
+
+    dlat = (ulat[-1] - ulat[0]) / (len(ulat) - 1)
+    dlon = (ulon[-1] - ulon[0]) / (len(ulon) - 1)
+    ilat = np.rint((lat - ulat[0]) / dlat).astype(np.int64)
+    ilon = np.rint((lon - ulon[0]) / dlon).astype(np.int64)
+    if not (np.allclose(ulat[0] + ilat * dlat, lat, rtol=0, atol=1e-6) and
+            np.allclose(ulon[0] + ilon * dlon, lon, rtol=0, atol=1e-6)):
+        return None
+
+    heights = np.full((len(ulat), len(ulon)), np.nan, dtype=np.float32)
+    heights[ilat, ilon] = hgt
+    if np.isnan(heights).any():  # 중복된 격자점
+        return None
+    return ulat[0], ulon[0], dlat, dlon, heights
+
+
+def read_geoid_dat(dat_path):
+    """
+        위도, 경도, 높이가 탭으로 구분된 geoid 텍스트 파일을 읽습니다.
+
+        Return
+            - lat (np.ndarray): 격자점 위도 (float64)
+            - lon (np.ndarray): 격자점 경도 (float64)
+            - hgt (np.ndarray): 격자점 geoid 높이 (float32)
+    """
+
+    table = pd.read_csv(dat_path, sep='\t', header=None, usecols=[0, 1, 2], dtype=np.float64)
+    return table[0].to_numpy(), table[1].to_numpy(), table[2].to_numpy(dtype=np.float32)
+
+
+class GeoidModel:
+    """
+        KNGeoid18과 같은 geoid 격자 데이터를 메모리에 올려 여러 지점의 geoid 높이를 한 번에 구합니다.
+
+        격자점이 정규 격자이면 float32 2차원 배열의 인덱스로 찾아 주변 네 점을 이중선형 보간하고,
+        정규 격자가 아니면 단위 구 좌표의 KD-tree로 가장 가까운 격자점의 높이를 사용합니다.
+        같은 파일은 load로 한 번만 읽으며, 텍스트 파일 옆에 바이너리 캐시(.npz)를 만들어 다음 실행부터 재사용합니다.
+
+            geoid = GeoidModel.load(GEOID_PATH)
+            hgt = geoid.height(lat, lon)
+
+        Args
+            - lat (np.ndarray): 격자점 위도
+            - lon (np.ndarray): 격자점 경도
+            - hgt (np.ndarray): 격자점 geoid 높이 (m)
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, lat, lon, hgt):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        hgt = np.asarray(hgt, dtype=np.float32)
+
+        self.grid = regular_grid(lat, lon, hgt)
+        self.heights = self.grid[-1] if self.grid is not None else hgt
+        self._points = None if self.grid is not None else unit_vectors(lat, lon)
+        self._tree = None
+
+    @classmethod
+    def from_dat(cls, dat_path):
+        """
+            위도, 경도, 높이가 탭으로 구분된 텍스트 파일을 읽습니다.
+        """
+
+        return cls(*read_geoid_dat(dat_path))
+
+    @classmethod
+    def load(cls, dat_path=GEOID_PATH, use_cache=True):
+        """
+            geoid 데이터를 읽어 반환합니다.
+
+            이미 읽은 파일은 재사용하고, use_cache이면 텍스트 파일보다 최신인 바이너리 캐시를 우선 읽습니다.
+            캐시가 없거나 오래되었으면 텍스트 파일을 읽은 뒤 캐시를 새로 저장합니다. (저장할 수 없으면 건너뜀)
+
+            Args
+                - dat_path (str): geoid 텍스트 파일 경로
+                - use_cache (bool): 바이너리 캐시 사용 여부
+
+            Return
+                - geoid (GeoidModel): geoid 모델
+        """
+
+        key = os.path.abspath(dat_path)
+        with cls._instances_lock:
+            if key in cls._instances:
+                return cls._instances[key]
+
+        cache_path = os.path.splitext(key)[0] + '.npz'
+        if use_cache and os.path.exists(cache_path) and \
+                (not os.path.exists(key) or os.stat(cache_path).st_mtime >= os.stat(key).st_mtime):
+            with np.load(cache_path) as cache:
+                geoid = cls(cache['lat'], cache['lon'], cache['hgt'])
+        else:
+            lat, lon, hgt = read_geoid_dat(key)
+            geoid = cls(lat, lon, hgt)
+            if use_cache:
+                try:
+                    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                    with open(tmp_path, 'wb') as cache_file:
+                        np.savez(cache_file, lat=lat, lon=lon, hgt=hgt)
+                    os.replace(tmp_path, cache_path)
+                except OSError:
+                    pass
+
+        with cls._instances_lock:
+            return cls._instances.setdefault(key, geoid)
+
+    def height(self, lat, lon, interpolate=True):
+        """
+            여러 지점의 geoid 높이를 구합니다. 격자 밖의 지점은 가장 가까운 가장자리 값을 사용합니다.
+
+            Args
+                - lat (float or np.ndarray): 위도
+                - lon (float or np.ndarray): 경도
+                - interpolate (bool): 정규 격자에서 이중선형 보간 여부, False이면 가장 가까운 격자점의 값
+
+            Return
+                - hgt (float or np.ndarray): geoid 높이 (m), 입력이 스칼라이면 float
+        """
+
+        scalar = np.ndim(lat) == 0 and np.ndim(lon) == 0
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+
+        if self.grid is None:
+            if self._tree is None:
+                from scipy.spatial import cKDTree
+                self._tree = cKDTree(self._points)
+            _, idx = self._tree.query(unit_vectors(lat, lon))
+            hgt = self.heights[idx].astype(np.float64)
+        else:
+            lat0, lon0, dlat, dlon, heights = self.grid
+            nlat, nlon = heights.shape
+            row = np.clip((lat - lat0) / dlat, 0, nlat - 1)
+            col = np.clip((lon - lon0) / dlon, 0, nlon - 1)
+            if interpolate:
+                row0 = np.minimum(row.astype(np.int64), nlat - 2)
+                col0 = np.minimum(col.astype(np.int64), nlon - 2)
+                t, u = row - row0, col - col0
+                h00 = heights[row0, col0].astype(np.float64)
+                h01 = heights[row0, col0 + 1].astype(np.float64)
+                h10 = heights[row0 + 1, col0].astype(np.float64)
+                h11 = heights[row0 + 1, col0 + 1].astype(np.float64)
+                hgt = (h00 * (1 - u) + h01 * u) * (1 - t) + (h10 * (1 - u) + h11 * u) * t
+            else:
+                hgt = heights[np.rint(row).astype(np.int64), np.rint(col).astype(np.int64)].astype(np.float64)
+
+        return float(hgt) if scalar else hgt
@@ -0,0 +1,289 @@
+import datetime
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+use_cols = ['OSD.latitude', 'OSD.longitude', 'OSD.height [ft]', 'OSD.altitude [ft]',
+            'OSD.xSpeed [MPH]', 'OSD.ySpeed [MPH]', 'OSD.zSpeed [MPH]', 'OSD.directionOfTravel',
+            'OSD.pitch', 'OSD.roll', 'OSD.yaw', 'OSD.droneType', 'GIMBAL.pitch', 'GIMBAL.roll', 'GIMBAL.yaw',
+            'HOME.longitude', 'HOME.latitude', 'CAMERA.isVideo', 'OSD.flyTime [s]']
+
+# 동기화 결과에서 제외되는 (숫자가 아닌) 로그 컬럼
+non_numeric_cols = ['CUSTOM.date [local]', 'CAMERA.isVideo', 'OSD.droneType']
+
+# haversine 패키지의 평균 지구 반지름 (km)
+AVG_EARTH_RADIUS_KM = 6371.0088
+
+
+class FlightLog:
+    """
+        DJI 비행 로그 csv를 컬럼별 NumPy 배열로 읽은 객체입니다.
+
+        숫자 컬럼은 float64, 'CAMERA.isVideo'는 bool, 기록 시각은 datetime64[us] 배열로 보관하며,
+        촬영 구간(segments)은 한 번만 계산합니다. 같은 파일은 load로 한 번만 읽어 여러 SRT 동기화에 재사용합니다.
+
+            log = FlightLog.load(csv_path)
+            starts, ends = log.segments()
+
+        Args
+            - columns (dict): 컬럼명 -> np.ndarray
+            - time (np.ndarray): 행별 기록 시각 (datetime64[us])
+            - flight_date (str): 비행 시작 시각 ('%Y%m%d%H%M%S')
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, columns, time, flight_date):
+        self.columns = columns
+        self.time = time
+        self.flight_date = flight_date
+        self.is_video = columns['CAMERA.isVideo']
+        self._segments = None
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        """
+            DJI 비행 로그 csv를 읽습니다. 첫 줄은 건너뛰고 두 번째 줄을 헤더로 사용합니다.
+
+            기록 시각은 파일명의 비행 시작 시각에 'OSD.flyTime [s]'를 더한 값입니다.
+
+            Args
+                - csv_path (str): 비행 로그 csv 파일 경로
+
+            Return
+                - log (FlightLog): 컬럼별 배열로 읽은 비행 로그
+        """
+
+        pd_log = pd.read_csv(csv_path, encoding='utf-8', skiprows=1, usecols=use_cols, low_memory=False)
+
+        columns = {}
+        for col in use_cols:
+            if col == 'CAMERA.isVideo':
+                columns[col] = pd_log[col].astype(str).to_numpy() == 'True'
+            elif col == 'OSD.droneType':
+                columns[col] = pd_log[col].to_numpy(dtype=object)
+            else:
+                columns[col] = pd.to_numeric(pd_log[col]).to_numpy(dtype=np.float64)
+
+        # get date info from file name
+        str_time = os.path.basename(csv_path)[16:-4].replace('_', ' ').replace('[', '').replace(']', '')
+        base_time = datetime.datetime.strptime(str_time, '%Y-%m-%d %H-%M-%S')
+        # convert record time based on the fly time info
+        fly_time_us = np.round(columns.pop('OSD.flyTime [s]') * 1e6).astype(np.int64)
+        time = np.datetime64(base_time, 'us') + fly_time_us.astype('timedelta64[us]')
+
+        return cls(columns, time, base_time.strftime('%Y%m%d%H%M%S'))
+
+    @classmethod
+    def load(cls, csv_path):
+        """
+            비행 로그를 읽어 반환합니다. 파일이 바뀌지 않았다면 이전에 읽은 객체를 재사용합니다.
+        """
+
+        key = os.path.abspath(csv_path)
+        mtime = os.stat(key).st_mtime_ns
+        with cls._instances_lock:
+            cached = cls._instances.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        log = cls.from_csv(csv_path)
+        with cls._instances_lock:
+            cls._instances[key] = (mtime, log)
+        return log
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def drone_type(self):
+        types = pd.unique(self.columns['OSD.droneType'])
+        return types[0] if len(types) else None
+
+    def segments(self):
+        """
+            Return
+                - starts (np.ndarray): 촬영 구간의 시작 행 번호
+                - ends (np.ndarray): 촬영 구간의 종료 행 번호
+        """
+
+        if self._segments is None:
+            self._segments = segment_edges(self.is_video)
+        return self._segments
+
+    def to_frame(self):
+        """
+            비행 로그를 'CUSTOM.date [local]'과 use_cols('OSD.flyTime [s]' 제외) 순서의 데이터 프레임으로 반환합니다.
+        """
+
+        pd_log = pd.DataFrame({'CUSTOM.date [local]': self.time})
+        for col in use_cols[:-1]:
+            pd_log[col] = self.columns[col]
+        return pd_log
+
+
+def read_srt(srt_path, osd_typ='mavic2zoom'):
+    """
+        SRT 파일을 컬럼별 NumPy 배열로 읽습니다.
+
+        Args
+            - srt_path (str): srt 파일 경로
+            - osd_typ (str): 드론 기종 정보 ('mavic2zoom' 또는 'mavicpro')
+
+        Return
+            - srt (dict): {'time_now': datetime64[s], 'latitude', 'longitude', 'focal_length'} 배열
+    """
+
+    with open(srt_path, 'r', encoding='utf-8') as srt_file:
+        txt_srt = [line.strip() for line in srt_file]
+
+    if osd_typ == 'mavic2zoom':
+        times = [line[:19] for line in txt_srt[3::6]]
+        values = [line.split('] [') for line in txt_srt[4::6]]
+        focal_length = [float(divide[6].split(': ')[-1]) for divide in values]
+        latitude = [float(divide[7].split(': ')[-1]) for divide in values]
+        longitude = [float(divide[8].split(': ')[-1]) for divide in values]
+    elif osd_typ == 'mavicpro':
+        times = [line.split(') ')[-1].replace('.', '-') for line in txt_srt[2::6]]
+        values = [line.split(') ')[0][4:].split(',') for line in txt_srt[3::6]]
+        latitude = [float(divide[1]) for divide in values]
+        longitude = [float(divide[0]) for divide in values]
+        focal_length = [280.] * len(times)  # focal length value of mavic2 drone is 28 mm
+    else:
+        times, latitude, longitude, focal_length = [], [], [], []
+
+    return {
+        'time_now': np.array(times, dtype='datetime64[s]'),
+        'latitude': np.array(latitude, dtype=np.float64),
+        'longitude': np.array(longitude, dtype=np.float64),
+        'focal_length': np.array(focal_length, dtype=np.float64),
+    }
+
+
+def segment_edges(is_video):
+    """
+        'CAMERA.isVideo' 값의 차분으로 촬영 구간의 시작과 끝을 찾습니다.
+
+        시작은 False -> True로 바뀐 행(첫 행이 True이면 0), 끝은 True -> False로 바뀐 행이며,
+        마지막 두 행이 모두 True이면 마지막 행이 끝이 됩니다. 마지막 행에서 시작하는 구간은 끝이 없으므로 제외합니다.
+
+        Args
+            - is_video (np.ndarray): 행별 촬영 여부
+
+        Return
+            - starts (np.ndarray): 촬영 구간의 시작 행 번호
+            - ends (np.ndarray): 촬영 구간의 종료 행 번호
+    """
+
+    is_video = np.asarray(is_video, dtype=bool)
+    edges = np.diff(is_video.astype(np.int8))
+    starts = np.flatnonzero(edges == 1) + 1
+    ends = np.flatnonzero(edges == -1) + 1
+    if len(is_video) and is_video[0]:
+        starts = np.r_[0, starts]
+    starts = starts[starts < len(is_video) - 1]
+    if len(is_video) > 1 and is_video[-2] and is_video[-1]:
+        ends = np.r_[ends, len(is_video) - 1]
+    return starts, ends
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+        한 점에서 여러 점까지의 대원 거리(km)를 한 번에 계산합니다.
+
+        Args
+            - lat (float): 기준점 위도
+            - lon (float): 기준점 경도
+            - lats (np.ndarray): 대상 위도
+            - lons (np.ndarray): 대상 경도
+
+        Return
+            - dist (np.ndarray): 거리 (km)
+    """
+
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64))
+    d = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * AVG_EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+def time_diff_seconds(time, times):
+    """
+        한 시각과 여러 시각 간의 차이를 초 단위로 계산합니다. (timedelta.seconds와 같이 하루 미만의 초만 사용)
+    """
+
+    diff = np.abs(np.asarray(times, dtype='datetime64[us]') - np.datetime64(time, 'us'))
+    return (diff // np.timedelta64(1, 's')) % 86400
+
+
+def match_segment(log_time, log_lat, log_lon, starts, ends, srt, max_time_diff=60):
+    """
+        SRT의 첫 지점과 각 촬영 구간의 시작 지점을 비교하여 SRT에 해당하는 촬영 구간을 찾습니다.
+
+        시간 차이가 max_time_diff초 이하인 구간이 있으면 시간 차이(major)로, 없으면 거리(minor)로 고릅니다.
+
+        Args
+            - log_time (np.ndarray): 로그 행별 기록 시각
+            - log_lat (np.ndarray): 로그 행별 위도
+            - log_lon (np.ndarray): 로그 행별 경도
+            - starts (np.ndarray): 촬영 구간의 시작 행 번호
+            - ends (np.ndarray): 촬영 구간의 종료 행 번호
+            - srt (dict): read_srt의 결과
+            - max_time_diff (int): 시간 기준 매칭에 허용하는 최대 시간 차이 (초)
+
+        Return
+            - start_idx (int): 매칭된 구간의 시작 행 번호
+            - end_idx (int): 매칭된 구간의 종료 행 번호
+            - match_type (str): 'time' 또는 'distance'
+    """
+
+    start_time = time_diff_seconds(srt['time_now'][0], log_time[starts])
+    if start_time.min() <= max_time_diff:
+        match, match_type = int(np.argmin(start_time)), 'time'
+    else:
+        start_dist = haversine_km(srt['latitude'][0], srt['longitude'][0], log_lat[starts], log_lon[starts])
+        match, match_type = int(np.argmin(start_dist)), 'distance'
+    return int(starts[match]), int(ends[match]), match_type
+
+
+def resample_rows(values, num_frames):
+    """
+        로그 행들을 프레임 수에 맞게 다시 샘플링합니다.
+
+        i번째 행은 프레임 int(i * num_frames / len(values)) (누적 합)에 놓이며, 같은 프레임에 놓인 행은 뒤의 행이 남습니다.
+        나머지 프레임은 컬럼마다 np.interp로 선형 보간하고, 첫 유효 값 이전의 프레임은 NaN으로 둡니다.
+
+        Args
+            - values (np.ndarray): N x C 로그 값
+            - num_frames (int): 프레임 수
+
+        Return
+            - resampled (np.ndarray): num_frames x C 프레임별 값
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    num_rows = len(values)
+    resampled = np.full((num_frames, values.shape[1]), np.nan)
+    if num_rows == 0 or num_frames == 0:
+        return resampled
+
+    # 행마다 cnt += cnt_inc로 누적한 것과 같은 순서로 더해 같은 프레임 위치를 얻습니다.
+    cnt = np.zeros(num_rows)
+    np.add.accumulate(np.full(num_rows - 1, num_frames / num_rows), out=cnt[1:])
+    positions = cnt.astype(np.int64)
+    positions = positions[positions < num_frames]
+
+    # 같은 프레임에 놓인 행 중 마지막 행
+    frame_pos, last = np.unique(positions[::-1], return_index=True)
+    rows = values[len(positions) - 1 - last]
+
+    frames = np.arange(num_frames)
+    for col in range(values.shape[1]):
+        valid = ~np.isnan(rows[:, col])
+        if not valid.any():
+            continue
+        xp = frame_pos[valid]
+        resampled[xp[0]:, col] = np.interp(frames[xp[0]:], xp, rows[valid, col])
+    return resampled
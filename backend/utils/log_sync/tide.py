@@ -0,0 +1,315 @@
+import datetime
+import glob
+import json
+import os
+import threading
+import time
+from urllib.request import urlopen
+
+import pandas as pd
+
+TIDE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tide_cache')
+KHOA_SERVICE_KEY = "JXRQtwmuwRIKOblp9dTWww=="
+
+
+class TideProvider:
+    """
+        조위 자료를 제공하는 provider의 인터페이스입니다.
+
+        fetch_day는 한 관측점의 하루치 조위를 {'HH:MM:SS': 조위} 형식으로 반환해야 합니다.
+    """
+
+    def fetch_day(self, obs_code, day):
+        """
+            Args
+                - obs_code (str): 관측코드
+                - day (str): 날짜 ('%Y%m%d')
+
+            Return
+                - levels (dict): {'HH:MM:SS': 조위 (cm)}
+        """
+
+        raise NotImplementedError
+
+
+class KhoaTideProvider(TideProvider):
+    """
+        국립해양조사원(khoa) OpenAPI에서 조위 관측 자료를 조회합니다.
+
+        Args
+            - service_key (str): OpenAPI 서비스 키
+            - timeout (float): 요청 제한 시간 (초)
+    """
+
+    def __init__(self, service_key=KHOA_SERVICE_KEY, timeout=10):
+        self.service_key = service_key
+        self.timeout = timeout
+
+    def fetch_day(self, obs_code, day):
+        import xmltodict
+
+        khoa_url = "http://www.khoa.go.kr/api/oceangrid/tideObs/search.do?" + \
+                   "ServiceKey=" + self.service_key + \
+                   "&ObsCode=" + obs_code + "&Date=" + day + "&ResultType=xml"
+
+        with urlopen(khoa_url, timeout=self.timeout) as resp:
+            resp_body = resp.read().decode("utf-8")
+        xml_dict = json.loads(json.dumps(xmltodict.parse(resp_body)))
+
+        records = xml_dict['result']['data']
+        if isinstance(records, dict):
+            records = [records]
+        return {case['record_time'].split(' ')[-1]: int(case['tide_level']) for case in records}
+
+
+class LocalTideProvider(TideProvider):
+    """
+        미리 내려받은 조위 csv 파일에서 조위를 조회합니다. 네트워크 없이 동기화할 때 사용합니다.
+
+        csv 파일은 obs_code, record_time ('%Y-%m-%d %H:%M:%S'), tide_level 컬럼으로 구성되며,
+        path가 디렉터리이면 디렉터리 안의 모든 csv 파일을 읽습니다.
+
+        Args
+            - path (str): 조위 csv 파일 또는 디렉터리 경로
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._levels = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._levels is None:
+                paths = sorted(glob.glob(os.path.join(self.path, '*.csv'))) if os.path.isdir(self.path) else [self.path]
+                table = pd.concat([pd.read_csv(path, dtype={'obs_code': str, 'record_time': str}) for path in paths])
+                days = table['record_time'].str[:10].str.replace('-', '')
+                times = table['record_time'].str[11:19]
+
+                levels = {}
+                for obs_code, day, record_time, level in zip(table['obs_code'], days, times, table['tide_level']):
+                    levels.setdefault((obs_code, day), {})[record_time] = int(level)
+                self._levels = levels
+        return self._levels
+
+    def fetch_day(self, obs_code, day):
+        return dict(self._load().get((obs_code, day), {}))
+
+
+class ConstantTideProvider(TideProvider):
+    """
+        모든 관측점, 모든 시각에 같은 조위를 반환하는 mock provider입니다. 테스트와 오프라인 환경에서 사용합니다.
+
+        Args
+            - level (int): 조위 (cm)
+            - interval (int): 기록 간격 (분)
+    """
+
+    def __init__(self, level=0, interval=1):
+        self.level = level
+        self.interval = interval
+
+    def fetch_day(self, obs_code, day):
+        return {f'{minute // 60:02d}:{minute % 60:02d}:00': self.level for minute in range(0, 24 * 60, self.interval)}
+
+
+class TideLevelCache:
+    """
+        provider에서 조회한 조위를 (관측점, 시간) 단위 파일로 디스크에 캐시합니다.
+
+        캐시 파일은 cache_dir/obs_code/YYYYMMDDHH.json이며, 저장된 지 ttl초가 지난 파일은 오래된 것으로 보고 다시 조회합니다.
+        provider 조회에 실패하면 오래된 캐시라도 사용하므로, 한 번 동기화한 비행은 네트워크 없이 다시 동기화할 수 있습니다.
+        만료된 캐시 파일은 evict를 명시적으로 호출할 때만 삭제됩니다.
+
+        오늘 이후 날짜의 마지막 시간은 아직 기록 중일 수 있으므로 YYYYMMDDHH.partial.json으로 저장하고 partial_ttl초 동안만 사용하며,
+        partial 캐시에 없는 시각을 조회하면 그 날짜를 바로 다시 조회합니다. ttl은 시간의 조위가 모두 기록된 캐시에만 적용됩니다.
+
+            tide_levels = TideLevelCache(KhoaTideProvider())
+            tide_levels.prefetch('DT_0023', '20231015170000', '20231015190000')
+            level = tide_levels.get_level('20231015171233', 'DT_0023')
+
+        Args
+            - provider (TideProvider): 캐시에 없는 조위를 조회할 provider
+            - cache_dir (str): 캐시 디렉터리 경로
+            - ttl (float): 캐시 유효 시간 (초), None이면 만료되지 않음
+            - partial_ttl (float): 아직 기록 중인 시간의 캐시 유효 시간 (초)
+    """
+
+    def __init__(self, provider, cache_dir=TIDE_CACHE_DIR, ttl=30 * 24 * 3600, partial_ttl=600):
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.partial_ttl = partial_ttl
+        self._lock = threading.Lock()
+
+    def _hour_path(self, obs_code, hour):
+        return os.path.join(self.cache_dir, obs_code, f'{hour}.json')
+
+    def _partial_path(self, obs_code, hour):
+        return os.path.join(self.cache_dir, obs_code, f'{hour}.partial.json')
+
+    def _is_fresh(self, path, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        return ttl is None or time.time() - os.stat(path).st_mtime <= ttl
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'r') as cache_file:
+            return json.load(cache_file)
+
+    def _cached_hour(self, obs_code, hour, stale=False):
+        """
+            캐시에서 한 시간의 조위를 읽습니다. stale이면 만료된 캐시도 읽습니다.
+
+            Return
+                - levels (dict): {'HH:MM:SS': 조위 (cm)}, 캐시가 없으면 None
+                - partial (bool): 아직 기록 중인 시간의 캐시인지 여부
+        """
+
+        path = self._hour_path(obs_code, hour)
+        if os.path.exists(path) and (stale or self._is_fresh(path)):
+            return self._read(path), False
+        path = self._partial_path(obs_code, hour)
+        if os.path.exists(path) and (stale or self._is_fresh(path, self.partial_ttl)):
+            return self._read(path), True
+        return None, False
+
+    def _write_day(self, obs_code, day, levels):
+        hours = {}
+        for record_time, level in levels.items():
+            hours.setdefault(day + record_time[:2], {})[record_time] = level
+
+        # 지난 날짜는 모든 시간이 기록된 것으로 보고, 오늘 이후 날짜는 마지막 시간만 기록 중인 것으로 봅니다.
+        partial = max(hours) if hours and day >= datetime.date.today().strftime('%Y%m%d') else None
+
+        os.makedirs(os.path.join(self.cache_dir, obs_code), exist_ok=True)
+        for hour, hour_levels in hours.items():
+            path, other_path = self._hour_path(obs_code, hour), self._partial_path(obs_code, hour)
+            if hour == partial:
+                path, other_path = other_path, path
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as cache_file:
+                json.dump(hour_levels, cache_file)
+            os.replace(tmp_path, path)
+            if os.path.exists(other_path):
+                os.remove(other_path)
+        return hours
+
+    def _fetch_day(self, obs_code, day):
+        with self._lock:
+            levels = self.provider.fetch_day(obs_code, day)
+            return self._write_day(obs_code, day, levels)
+
+    def _get_hour(self, obs_code, hour, refresh=False):
+        if not refresh:
+            levels, partial = self._cached_hour(obs_code, hour)
+            if levels is not None:
+                return levels, partial
+
+        try:
+            hours = self._fetch_day(obs_code, hour[:8])
+        except Exception as e:
+            levels, partial = self._cached_hour(obs_code, hour, stale=True)
+            if levels is not None:
+                print(f"[WARNING] tide level provider failed ({e}), use expired cache of {obs_code} at {hour}")
+                return levels, partial
+            raise
+        if hour not in hours:
+            raise KeyError(f"no tide level of {obs_code} at {hour}")
+        return hours[hour], os.path.exists(self._partial_path(obs_code, hour))
+
+    def get_hour(self, obs_code, hour):
+        """
+            한 관측점의 한 시간 동안의 조위를 반환합니다. 캐시에 없거나 만료되었으면 그 날짜 전체를 provider에서 조회합니다.
+
+            Args
+                - obs_code (str): 관측코드
+                - hour (str): 시각 ('%Y%m%d%H')
+
+            Raise
+                - KeyError: provider와 캐시 모두 해당 시간의 조위가 없는 경우
+
+            Return
+                - levels (dict): {'HH:MM:SS': 조위 (cm)}
+        """
+
+        return self._get_hour(obs_code, hour)[0]
+
+    def get_level(self, date, obs_code):
+        """
+            Args
+                - date (str): 날짜 ('%Y%m%d%H%M%S')
+                - obs_code (str): 관측코드
+
+            Raise
+                - KeyError: 해당 시각의 조위가 없는 경우
+
+            Return
+                - 특정 시간에서의 조위 값 (int)
+        """
+
+        q_time = date[8:10] + ':' + date[10:12] + ':' + '00'
+        levels, partial = self._get_hour(obs_code, date[:10])
+        if q_time not in levels and partial:
+            # 기록 중이던 시간의 캐시이면 그 사이 기록되었을 수 있으므로 다시 조회합니다.
+            levels, partial = self._get_hour(obs_code, date[:10], refresh=True)
+        if q_time not in levels:
+            raise KeyError(f"no tide level of {obs_code} at {date[:8]} {q_time}")
+        return int(levels[q_time])
+
+    def prefetch(self, obs_code, start, end):
+        """
+            비행 시간 범위의 조위를 미리 캐시에 저장합니다. 이미 유효한 캐시가 있는 시간은 조회하지 않습니다.
+
+            Args
+                - obs_code (str): 관측코드
+                - start (str): 시작 시각 ('%Y%m%d%H%M%S')
+                - end (str): 종료 시각 ('%Y%m%d%H%M%S')
+
+            Return
+                - hours (list): 캐시된 시간 목록 ('%Y%m%d%H')
+        """
+
+        start = datetime.datetime.strptime(start[:10], '%Y%m%d%H')
+        end = datetime.datetime.strptime(end[:10], '%Y%m%d%H')
+
+        hours = []
+        fetched = {}
+        while start <= end:
+            hour = start.strftime('%Y%m%d%H')
+            if self._cached_hour(obs_code, hour)[0] is not None:
+                hours.append(hour)
+            else:
+                # provider는 하루 단위로 조회하므로 같은 날짜는 한 번만 조회합니다.
+                if hour[:8] not in fetched:
+                    fetched[hour[:8]] = self._fetch_day(obs_code, hour[:8])
+                if hour in fetched[hour[:8]]:
+                    hours.append(hour)
+            start += datetime.timedelta(hours=1)
+        return hours
+
+    def evict(self, max_age=None):
+        """
+            오래된 캐시 파일을 삭제합니다.
+
+            만료된 캐시도 provider 조회에 실패했을 때 쓰이므로, 조회 중에는 호출하지 않고 디스크 정리가 필요할 때 명시적으로 호출합니다.
+
+            Args
+                - max_age (float): 이보다 오래된 파일을 삭제 (초), None이면 ttl (아직 기록 중인 시간의 캐시는 partial_ttl)
+
+            Return
+                - num_evicted (int): 삭제한 파일 수
+        """
+
+        num_evicted = 0
+        for path in glob.glob(os.path.join(self.cache_dir, '*', '*.json')):
+            try:
+                ttl = max_age
+                if ttl is None:
+                    ttl = self.partial_ttl if path.endswith('.partial.json') else self.ttl
+                if not self._is_fresh(path, ttl):
+                    os.remove(path)
+                    num_evicted += 1
+            except OSError:
+                pass
+        return num_evicted
@@ -1,6 +1,9 @@
 import argparse
 import os
-from typing import Union
+import queue
+import threading
+from collections import deque
+from typing import Iterator, Optional, Union
 
 import cv2
 import numpy as np
@@ -16,6 +19,115 @@ def attach_suffix_on_filename(path: str, suffix: str) -> str:
     return f"{name}{suffix}{extension}"
 
 
+#######################
+# Temporal Min Filter #
+#######################
+class TemporalMinFilter:
+    """
+        프레임 큐에 대한 가중 최솟값을 프레임마다 큐 길이와 무관한 일정한 비용으로 계산합니다.
+
+        출력 프레임 t의 값은 min_k decay^k * v[t + k] (k = 0 .. queue_len - 1)이며, 가장 오래된 프레임의 가중치가 1로 제일 높습니다.
+        van Herk/Gil-Werman 방식으로 queue_len 크기의 블록마다 뒤에서부터의 누적 최솟값(suffix)을 한 번 계산하고,
+        다음 블록에서는 앞에서부터의 누적 최솟값(prefix) 하나만 갱신하여 두 값의 최솟값으로 창의 최솟값을 구합니다.
+        가중치가 등비수열이므로 블록 기준의 가중치를 decay의 거듭제곱 한 번으로 출력 프레임 기준으로 옮길 수 있습니다.
+
+        V 채널 원본은 미리 할당된 uint8 링 버퍼에 보관합니다.
+
+        Args
+            - queue_len (int): 최솟값을 취할 프레임 개수
+            - decay (float): 큐에서 한 프레임 뒤로 갈 때마다 곱해지는 가중치
+    """
+
+    def __init__(self, queue_len: int, decay: float = 0.9):
+        if queue_len < 1:
+            raise ValueError("queue_len must be positive")
+        self.queue_len = queue_len
+        self.powers = (decay ** np.arange(queue_len + 1)).astype(np.float32)
+        self.count = 0
+        self.raw = None
+        self.suffix = None
+        self.prefix = None
+        self.num_valid = 0
+
+    def _allocate(self, shape) -> None:
+        self.raw = np.empty((self.queue_len, *shape), dtype=np.uint8)
+        self.suffix = np.empty((self.queue_len, *shape), dtype=np.float32)
+        self.prefix = np.empty(shape, dtype=np.float32)
+
+    def push(self, value: np.ndarray) -> Optional[np.ndarray]:
+        """
+            새 프레임의 V 채널을 넣고, 창이 채워졌다면 queue_len - 1 프레임 전 프레임의 가중 최솟값을 반환합니다.
+
+            Args
+                - value (np.ndarray): H x W uint8 V 채널
+
+            Return
+                - fused (np.ndarray): H x W float32 가중 최솟값 (0 ~ 255), 아직 창이 채워지지 않았다면 None
+        """
+
+        if self.raw is None:
+            self._allocate(value.shape)
+        return self._step(value)
+
+    def flush(self) -> Iterator[np.ndarray]:
+        """
+            입력이 끝난 뒤 남은 프레임들의 가중 최솟값을 순서대로 반환합니다. 창은 남은 프레임만큼 줄어듭니다.
+
+            Return
+                - fused (Iterator[np.ndarray]): H x W float32 가중 최솟값
+        """
+
+        if self.raw is None:
+            return
+        for _ in range(self.queue_len - 1):
+            fused = self._step(None)
+            if fused is not None:
+                yield fused
+
+    def _step(self, value: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        queue_len = self.queue_len
+        index = self.count
+        pos = index % queue_len
+        self.count += 1
+
+        # 블록 시작 기준의 prefix 최솟값 갱신 (value가 None이면 영상이 끝난 뒤의 빈 자리)
+        if value is not None:
+            self.raw[pos] = value
+            self.num_valid = pos + 1
+            if pos == 0:
+                self.prefix[...] = self.raw[0]
+            else:
+                np.minimum(self.prefix, self.raw[pos] * self.powers[pos], out=self.prefix)
+        elif pos == 0:
+            self.num_valid = 0
+            self.prefix.fill(np.inf)
+
+        fused = None
+        out_index = index - queue_len + 1
+        if out_index >= 0:
+            if pos == queue_len - 1:
+                fused = self.prefix.copy()
+            else:
+                # 이전 블록의 suffix와 현재 블록의 prefix를 출력 프레임 기준 가중치로 맞춰 비교
+                fused = self.prefix * self.powers[queue_len - 1 - pos]
+                np.minimum(fused, self.suffix[pos + 1], out=fused)
+
+        if pos == queue_len - 1:
+            self._update_suffix()
+        return fused
+
+    def _update_suffix(self) -> None:
+        suffix = self.suffix
+        last = self.num_valid - 1
+        suffix[last + 1:] = np.inf
+        if last < 0:
+            return
+        suffix[last] = self.raw[last]
+        for k in range(last - 1, -1, -1):
+            np.multiply(suffix[k + 1], self.powers[1], out=suffix[k])
+            np.minimum(suffix[k], self.raw[k], out=suffix[k])
+
+
 #################
 # Glare Remover #
 #################
@@ -112,60 +224,96 @@ class RGLARE:
         gamma_corrected = torch.pow(frame[:, :, 2], alpha)
         return gamma_corrected
 
-    def video_gpu(self):
-        """
-            GPU를 사용해 빛반사가 제거된 비디오를 생성합니다.
+    def video_stream(self, decay: float = 0.9, alpha: float = 0.8, buffer_size: int = 8) -> None:
         """
+            빛반사가 제거된 비디오를 생성합니다.
 
-        while self.frame_count < self.total_frame + self.queue_len:
-            ret, frame = self.cap.read()
+            V 채널의 가중 최솟값은 TemporalMinFilter로 프레임마다 일정한 비용으로 계산하고,
+            디코딩(median blur, HSV 변환 포함)과 인코딩은 각각 별도 스레드에서 수행합니다.
+            모든 프레임은 원본 해상도의 uint8로 처리합니다.
 
-            if not ret:
-                self.frame_queue_done += 1
-                hsv_frame = None
-                if self.frame_queue_done == self.queue_len:
-                    break
-            else:
-                frame = cv2.resize(frame, (1920, 1920))
-                frame = cv2.medianBlur(frame, 3)
-                hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            Args
+                - decay (float): 큐에서 한 프레임 뒤로 갈 때마다 곱해지는 가중치
+                - alpha (float): 감마 보정 alpha 값 (gamma가 True인 경우)
+                - buffer_size (int): 디코딩/인코딩 스레드와 주고받는 프레임 버퍼 크기
+        """
 
-            if self.queue_full:
+        decoded = queue.Queue(maxsize=buffer_size)
+        encoded = queue.Queue(maxsize=buffer_size)
+        errors = []
+
+        def decode():
+            try:
+                while True:
+                    ret, frame = self.cap.read()
+                    if not ret:
+                        break
+                    frame = cv2.medianBlur(frame, 3)
+                    decoded.put(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                decoded.put(None)
+
+        def encode():
+            while True:
+                hsv_frame = encoded.get()
                 if hsv_frame is None:
-                    fused_frame, _ = torch.min(
-                        torch.stack(self.frame_queue, dim=0) *
-                        self.weight[:len(self.frame_queue), :, :, :],
-                        dim=0
-                    )
-                else:
-                    tensor_frame = torch.tensor(hsv_frame / 255.0).permute(2, 0, 1).to(self.device)
-                    self.frame_queue.append(tensor_frame)
-                    fused_frame, _ = torch.min(
-                        torch.stack(self.frame_queue, dim=0),
-                        dim=0
-                    )
-                out_frame = self.frame_queue.pop(0)
-
-                if self.gamma is True:
-                    out_frame[:, :, 2] = self.gamma_tensor_correction(fused_frame)
-                else:
-                    out_frame[:, :, 2] = fused_frame[:, :, 2]
-
-                out_frame = torch.clamp(out_frame * 255.0, 0, 255).type(torch.uint8)
-            else:
-                tensor_frame = torch.tensor(hsv_frame / 255.0).permute(2, 0, 1).to(self.device)
-                self.frame_queue.append(tensor_frame)
-                if len(self.frame_queue) == self.queue_len - 1:
-                    self.queue_full = True
-                continue
-
-            out_frame = out_frame.clone().detach().permute(1, 2, 0).cpu().numpy().astype(np.uint8)
-            out_frame = cv2.cvtColor(out_frame, cv2.COLOR_HSV2BGR)
-            out_frame = cv2.resize(out_frame, self.frame_size)
-            self.out.write(out_frame)
+                    break
+                # 인코딩 실패 후에도 큐를 비워 메인 스레드가 멈추지 않도록 합니다.
+                if not errors:
+                    try:
+                        self.out.write(cv2.cvtColor(hsv_frame, cv2.COLOR_HSV2BGR))
+                    except Exception as e:
+                        errors.append(e)
+
+        if self.gamma is True:
+            # 0 ~ 255 값에 (v / 255)^alpha * 255를 적용하는 계수
+            gamma_scale = np.float32(255.0 ** (1 - alpha))
+
+        def emit(hsv_frame, fused):
+            if self.gamma is True:
+                np.power(fused, alpha, out=fused)
+                fused *= gamma_scale
+            hsv_frame[:, :, 2] = np.clip(fused, 0, 255)
+            encoded.put(hsv_frame)
             self.frame_count += 1
-        self.cap.release()
-        self.out.release()
+
+        decoder = threading.Thread(target=decode, daemon=True)
+        encoder = threading.Thread(target=encode, daemon=True)
+        decoder.start()
+        encoder.start()
+
+        min_filter = TemporalMinFilter(self.queue_len, decay)
+        pending = deque()
+        try:
+            while True:
+                hsv_frame = decoded.get()
+                if hsv_frame is None:
+                    break
+                pending.append(hsv_frame)
+                fused = min_filter.push(hsv_frame[:, :, 2])
+                if fused is not None:
+                    emit(pending.popleft(), fused)
+            for fused in min_filter.flush():
+                emit(pending.popleft(), fused)
+        finally:
+            encoded.put(None)
+            encoder.join()
+            decoder.join(timeout=1)
+            self.cap.release()
+            self.out.release()
+        if errors:
+            raise errors[0]
+
+    def video_gpu(self):
+        """
+            빛반사가 제거된 비디오를 생성합니다. video_stream과 같습니다.
+
+            V 채널 하나에 대한 원소별 연산 몇 번으로 프레임을 처리하므로 GPU를 사용하지 않습니다.
+        """
+
+        self.video_stream()
 
     def frame_gpu(self) -> Union[np.ndarray]:
         """
@@ -215,44 +363,8 @@ class RGLARE:
             return self.frame_gpu()
 
     def video_cpu(self):
-        ''' CPU를 사용해 빛반사가 제거된 비디오를 생성합니다. '''
-        while self.frame_count < self.total_frame + self.queue_len:
-            ret, frame = self.cap.read()
-            if not ret:
-                self.frame_queue_done += 1
-                hsv_frame = None
-                if self.frame_queue_done == self.queue_len:
-                    break
-            else:
-                frame = cv2.medianBlur(frame, 3)
-                hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            if self.queue_full:
-                if hsv_frame is None:
-                    fused_frame = np.min(
-                        np.stack(self.frame_queue, axis=0) * self.weight[:len(self.frame_queue), :, :, :],
-                        axis=0)
-                else:
-                    self.frame_queue.append(hsv_frame / 255.0)
-                    fused_frame = np.min(
-                        np.stack(self.frame_queue, axis=0) * self.weight,
-                        axis=0)
-                out_frame = self.frame_queue.pop(0)
-                if self.gamma is True:
-                    out_frame[:, :, 2] = self.gamma_correction(fused_frame)
-                else:
-                    out_frame[:, :, 2] = fused_frame[:, :, 2]
-                out_frame = np.clip(out_frame * 255.0, 0, 255)
-                out_frame = cv2.cvtColor(out_frame.astype('uint8'), cv2.COLOR_HSV2BGR)
-            else:
-                self.frame_queue.append(hsv_frame / 255.0)
-                if len(self.frame_queue) == self.queue_len - 1:
-                    self.queue_full = True
-                continue
-            self.out.write(out_frame)
-            self.frame_count += 1
-            print(self.frame_count)
-        self.cap.release()
-        self.out.release()
+        ''' CPU를 사용해 빛반사가 제거된 비디오를 생성합니다. video_stream과 같습니다. '''
+        self.video_stream()
 
     def frame_cpu(self) -> Union[np.ndarray]:
         '''
@@ -304,6 +304,7 @@ async def main(args):
     first_image = cv2.imread(image_paths[0])
 
     logs = read_log_file(args.log_path)
+    geometry = FlightGeometry.load(args.log_path, first_image.shape)
     bbox_data = read_bbox_data(args.bbox_path, first_image.shape)
 
     # font = ImageFont.truetype('AppleGothic.ttf', 40)
@@ -344,8 +345,8 @@ async def main(args):
         bev_center_x, bev_center_y = None, None
         dolphin_present = False
         
-        roll = get_params_from_csv(args.log_path, frame_count)["R"]
-        pitch = get_params_from_csv(args.log_path, frame_count)["P"]
+        roll = geometry.roll[frame_count]
+        pitch = geometry.pitch[frame_count]
         if (roll > -5 and pitch >-30) or (roll > -30 and pitch > -5) or ((-5 > roll > -30)&(-5 > pitch > -30)) :
             err_texts = [
                 f"일시: {date}",
@@ -383,9 +384,9 @@ async def main(args):
             frame_count += 1
             continue
 
-        rst, transformed_img, bbox, boundary_rows, boundary_cols, gsd_bev, eo, R, focal_length, pixel_size = BEV_FullFrame(frame_count, image_path, args.log_path, gsd, args.output_dir, DEV = False)
+        rst, transformed_img, bbox, boundary_rows, boundary_cols, gsd_bev, eo, R, focal_length, pixel_size = BEV_FullFrame(frame_count, frame, args.log_path, gsd, args.output_dir, DEV = False)
 
-        bbox_for_dg = DG_Boundary(frame_count, image_path, args.log_path)
+        bbox_for_dg = geometry[frame_count].boundary
 
         if rst:
             continue
@@ -397,7 +398,10 @@ async def main(args):
             gsd = gsd_bev
 
         if len(frame_bboxes) > 0 :
-            for bbox_info in frame_bboxes:
+            # 프레임 내 모든 객체의 bbox를 한 번에 BEV 좌표로 변환합니다.
+            bev_boxes = BEV_Boxes(frame.shape, bbox, boundary_rows, boundary_cols, gsd, eo, R, focal_length, pixel_size, [bbox_info['bbox'] for bbox_info in frame_bboxes])
+
+            for bbox_info, rectify_points in zip(frame_bboxes, bev_boxes.tolist()):
                 track_id = bbox_info['track_id']
                 class_id = int(bbox_info['class'])
                 x1, y1, x2, y2 = bbox_info['bbox']
@@ -406,11 +410,6 @@ async def main(args):
                 if class_id == 1 and conf_score < 0.8:
                     continue
                 
-                if rst:
-                    continue
-                else:
-                    rectify_points = BEV_Points(frame.shape, bbox, boundary_rows, boundary_cols, gsd, eo, R, focal_length, pixel_size, bbox_info['bbox'])
-
                 bev_x1, bev_y1, bev_x2, bev_y2 = rectify_points
                 
                 if class_id == 1:
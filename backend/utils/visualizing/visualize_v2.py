@@ -23,9 +23,9 @@ DRONE_SENSOR_INFO = {"MAVIC PRO" : [6.3, 4.7, 78.8], "MAVIC 2" : [6.3, 4.7, 78.8
 @dataclass
 class ImageInfo:
     frame: Image
-    bboxes: List[List[int]]
-    classes: List[int]
-    ids: List[int]
+    bboxes: np.ndarray
+    classes: np.ndarray
+    ids: np.ndarray
     frame_count: int
 
 @dataclass
@@ -96,6 +96,79 @@ class ObjectInfo:
     frame_id: int
     speed: float = None
 
+@dataclass
+class TrackingResults:
+    # Columnar tracking results sorted by frame; rows of frame f are offsets[f]:offsets[f + 1]
+    frame_ids: np.ndarray
+    track_ids: np.ndarray
+    labels: np.ndarray
+    bboxes: np.ndarray  # N x 4 (x, y, w, h)
+    offsets: np.ndarray
+
+    @classmethod
+    def from_json(cls, json_data: dict) -> "TrackingResults":
+        frame_ids, track_ids, labels, bboxes = [], [], [], []
+        seen = set()
+        for item in json_data['data']:
+            frame_id = item['frame_id']
+            # Keep the first entry of a frame, as the per-frame lookup did
+            if frame_id < 0 or frame_id in seen:
+                continue
+            seen.add(frame_id)
+            for obj in item['result']:
+                frame_ids.append(frame_id)
+                track_ids.append(obj['track_id'])
+                labels.append(obj['label'])
+                bboxes.append(obj['bbox'][:4])
+
+        frame_ids = np.asarray(frame_ids, dtype=np.int64)
+        order = np.argsort(frame_ids, kind='stable')
+        counts = np.bincount(frame_ids, minlength=max(seen, default=-1) + 1)
+        return cls(
+            frame_ids=frame_ids[order],
+            track_ids=np.asarray(track_ids, dtype=np.int64)[order],
+            labels=np.asarray(labels, dtype=np.int64)[order],
+            bboxes=np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)[order],
+            offsets=np.concatenate(([0], np.cumsum(counts))),
+        )
+
+    def frame(self, frame_id: int) -> slice:
+        if frame_id < 0 or frame_id + 1 >= len(self.offsets):
+            return slice(0, 0)
+        return slice(self.offsets[frame_id], self.offsets[frame_id + 1])
+
+@dataclass
+class LogColumns:
+    # Drone log columns used per frame, extracted once from the synced log csv
+    datetime: np.ndarray  # datetime64[ns]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    adjusted_height: np.ndarray
+    frame_rows: np.ndarray  # FrameCnt -> first row with that FrameCnt, -1 if absent
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> "LogColumns":
+        df_log = pd.read_csv(csv_path)
+        frame_cnt = df_log['FrameCnt'].to_numpy(dtype=np.int64)
+        frame_rows = np.full(frame_cnt.max(initial=-1) + 1, -1, dtype=np.int64)
+        valid = np.flatnonzero(frame_cnt >= 0)[::-1]
+        frame_rows[frame_cnt[valid]] = valid
+        return cls(
+            datetime=pd.to_datetime(df_log['datetime'], format='%Y-%m-%d %H:%M:%S.%f').to_numpy(dtype='datetime64[ns]'),
+            latitude=df_log['OSD.latitude'].to_numpy(dtype=np.float64),
+            longitude=df_log['OSD.longitude'].to_numpy(dtype=np.float64),
+            adjusted_height=df_log['adjusted height'].to_numpy(dtype=np.float64),
+            frame_rows=frame_rows,
+        )
+
+    def row(self, num_frame: int) -> int:
+        if num_frame < 0 or num_frame >= len(self.frame_rows) or self.frame_rows[num_frame] < 0:
+            raise IndexError(f"no log row for frame {num_frame}")
+        return self.frame_rows[num_frame]
+
+    def timestamp(self, index: int) -> pd.Timestamp:
+        return pd.Timestamp(self.datetime[index])
+
 @jit(nopython=True, parallel=True)
 def BEV_Points(image_shape, boundary, boundary_rows, boundary_cols, ground_height, gsd, eo, R, focal_length, pixel_size, obj_points):
     obj_points[2] += obj_points[0]
@@ -220,21 +293,20 @@ def calculate_bearing(pointA, pointB):
 
     return compass_bearing
 
-def get_bev(sync_logs, num_frame: int, new_objects: List[dict], im_shape, im_center):
-    df_frame = sync_logs.loc[sync_logs["FrameCnt"] == num_frame]
+def get_bev(sync_logs: LogColumns, num_frame: int, bboxes: np.ndarray, track_ids: np.ndarray, im_shape, im_center):
+    row = sync_logs.row(num_frame)
 
-    point = df_frame[["OSD.latitude", "OSD.longitude"]].values[0].tolist()
-    frame_time = df_frame["datetime"].values[0]  # Use the datetime64 object directly
+    point = [sync_logs.latitude[row].item(), sync_logs.longitude[row].item()]
+    frame_time = sync_logs.datetime[row]  # Use the datetime64 object directly
 
-    pixel_size = df_frame["adjusted height"].values[0] / im_shape[0]
-    ground_height = df_frame["adjusted height"].values[0]  # Adjusted height as ground height
+    pixel_size = sync_logs.adjusted_height[row] / im_shape[0]
+    ground_height = sync_logs.adjusted_height[row]  # Adjusted height as ground height
 
     objects_info = []
-    for obj in new_objects:
-        bbox = obj["bbox"]
+    for bbox, track_id in zip(bboxes, track_ids):
         obj_center = [int(bbox[0] + bbox[2] / 2), int(bbox[1] + bbox[3] / 2)]
-        
-        objects_info.append((obj["track_id"], obj, pixel_size, obj_center, im_center, point, frame_time))
+
+        objects_info.append((track_id, bbox, pixel_size, obj_center, im_center, point, frame_time))
 
     return objects_info, ground_height
 
@@ -342,7 +414,7 @@ def get_drone_info(bev_info_data: dict, input_GSD: float, image_shape: Tuple[int
     
     return DroneInfo(ori_frame_shape, bev_GSD, R, boundary, boundary_rows, boundary_cols, eo, focal_length, pixel_size, ground_height)
 
-def draw_combined_layers(image_info: ImageInfo, drone_info: DroneInfo, vis_config: VisualizationConfig, previous_objects_info, df_log, frame_objects):
+def draw_combined_layers(image_info: ImageInfo, drone_info: DroneInfo, vis_config: VisualizationConfig, previous_objects_info, log_columns: LogColumns):
     base_frame = image_info.frame.convert("RGBA")
     layer2a = Image.new("RGBA", image_info.frame.size)
     draw2a = ImageDraw.Draw(layer2a, 'RGBA')
@@ -356,8 +428,9 @@ def draw_combined_layers(image_info: ImageInfo, drone_info: DroneInfo, vis_confi
     boats = []
     dolphins = []
     objects_data = {}
-    current_time = df_log.iloc[image_info.frame_count - 1]['datetime']
-    current_objects_info, _ = get_bev(df_log, image_info.frame_count, frame_objects, drone_info.ori_frame_shape,
+    current_time = log_columns.timestamp(image_info.frame_count - 1)
+    current_objects_info, _ = get_bev(log_columns, image_info.frame_count, image_info.bboxes, image_info.ids,
+                                      drone_info.ori_frame_shape,
                                       [image_info.frame.size[0] // 2, image_info.frame.size[1] // 2])
 
     for obj_bbox, cls, id in zip(image_info.bboxes, image_info.classes, image_info.ids):
@@ -534,7 +607,7 @@ def draw_combined_layers(image_info: ImageInfo, drone_info: DroneInfo, vis_confi
 
     return final_image.convert("RGB"), frame_data, objects_data
 
-def draw_combined_layers_on_original(image_info: ImageInfo, drone_info: DroneInfo, vis_config: VisualizationConfig, previous_objects_info, df_log, frame_objects, objects_data):
+def draw_combined_layers_on_original(image_info: ImageInfo, drone_info: DroneInfo, vis_config: VisualizationConfig, previous_objects_info, log_columns: LogColumns, objects_data):
     base_frame = image_info.frame.convert("RGBA")
     
     # Create layers for drawing
@@ -550,9 +623,9 @@ def draw_combined_layers_on_original(image_info: ImageInfo, drone_info: DroneInf
     boats = []
     dolphins = []
 
-    current_time = df_log.iloc[image_info.frame_count - 1]['datetime']
+    current_time = log_columns.timestamp(image_info.frame_count - 1)
 
-    current_objects_info, ground_height = get_bev(df_log, image_info.frame_count, frame_objects, drone_info.ori_frame_shape, [image_info.frame.size[0] // 2, image_info.frame.size[1] // 2])
+    current_objects_info, ground_height = get_bev(log_columns, image_info.frame_count, image_info.bboxes, image_info.ids, drone_info.ori_frame_shape, [image_info.frame.size[0] // 2, image_info.frame.size[1] // 2])
     gsd_x, gsd_y = calculate_original_gsd(drone_info.focal_length, DRONE_SENSOR_INFO['MAVIC 2'][0], DRONE_SENSOR_INFO['MAVIC 2'][1], ground_height, image_info.frame.size[0], image_info.frame.size[1])
 
     for obj_bbox, cls, id in zip(image_info.bboxes, image_info.classes, image_info.ids):
@@ -676,9 +749,8 @@ def process_frames(params: FrameProcessingParams):
     bev_frame_files = sorted(glob.glob(os.path.join(params.bev_frames_dir, "*.png")))
     ori_frame_files = sorted(glob.glob(os.path.join(params.original_frames_dir, "*.png")))
     bev_info_dict = read_bev_info(params.bev_info_path)
-    json_data = read_json_data(params.json_path)
-    df_log = pd.read_csv(params.csv_path)
-    df_log['datetime'] = pd.to_datetime(df_log['datetime'], format='%Y-%m-%d %H:%M:%S.%f')
+    tracking_results = TrackingResults.from_json(read_json_data(params.json_path))
+    log_columns = LogColumns.from_csv(params.csv_path)
 
     font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', 25)
 
@@ -688,16 +760,15 @@ def process_frames(params: FrameProcessingParams):
     collected_data = []  # Initialize an empty list to collect data
 
     for frame_count, (bev_frame_file, ori_frame_file) in enumerate(zip(bev_frame_files, ori_frame_files), start=1):
-        if frame_count > 500:
-            break
-        frame_data = next((item['result'] for item in json_data['data'] if item['frame_id'] == frame_count - 1), [])
-        bboxes = [item['bbox'] for item in frame_data]
-        classes = [item['label'] for item in frame_data]
-        ids = [item['track_id'] for item in frame_data]
+        frame_rows = tracking_results.frame(frame_count - 1)
+        bboxes = tracking_results.bboxes[frame_rows]
+        classes = tracking_results.labels[frame_rows]
+        ids = tracking_results.track_ids[frame_rows]
 
         # Load BEV Frame
         bev_frame = Image.open(bev_frame_file)
-        bev_info = ImageInfo(bev_frame, bboxes.copy(), classes.copy(), ids.copy(), frame_count)
+        # BEV_Points turns each (x, y, w, h) box into (x1, y1, x2, y2) in place, so hand it a copy
+        bev_info = ImageInfo(bev_frame, bboxes.copy(), classes, ids, frame_count)
 
         # Process BEV Frame
         input_GSD = bev_info_dict[frame_count]['meta_GSD'] if frame_count in bev_info_dict else 0.033962
@@ -706,18 +777,20 @@ def process_frames(params: FrameProcessingParams):
         drone_info = get_drone_info(bev_info_dict.get(frame_count), input_GSD, bev_frame.size)
         vis_config = VisualizationConfig(font, px_50m, px_300m)
         
-        final_image_bev, frame_data_bev, objects_data = draw_combined_layers(bev_info, drone_info, vis_config, bev_previous_objects_info, df_log, frame_data)
+        final_image_bev, frame_data_bev, objects_data = draw_combined_layers(bev_info, drone_info, vis_config, bev_previous_objects_info, log_columns)
         bev_output_frame_path = os.path.join(bev_output_dir, f'frame_{str(frame_count).zfill(6)}.jpg')
         final_image_bev.save(bev_output_frame_path)
         collected_data.extend(frame_data_bev)  # Collect data
 
         # Load Original Frame
         ori_frame = Image.open(ori_frame_file)
-        ori_info = ImageInfo(ori_frame, bboxes, classes, ids, frame_count)
+        ori_bboxes = bboxes.copy()
+        ori_bboxes[:, 2:] += ori_bboxes[:, :2]  # (x1, y1, x2, y2), as the BEV pass leaves them
+        ori_info = ImageInfo(ori_frame, ori_bboxes, classes, ids, frame_count)
 
         # Process Original Frame independently of BEV
         ori_drone_info = get_drone_info(bev_info_dict.get(frame_count), input_GSD, ori_frame.size)  # Ensure the size matches ori_frame
-        final_image_ori = draw_combined_layers_on_original(ori_info, ori_drone_info, vis_config, ori_previous_objects_info, df_log, frame_data, objects_data)
+        final_image_ori = draw_combined_layers_on_original(ori_info, ori_drone_info, vis_config, ori_previous_objects_info, log_columns, objects_data)
         ori_output_frame_path = os.path.join(original_output_dir, f'frame_{str(frame_count).zfill(6)}.jpg')
         final_image_ori.save(ori_output_frame_path)
 
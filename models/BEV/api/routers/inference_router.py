@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 
@@ -6,7 +7,8 @@ import numpy as np
 from api.services.Orthophoto_Maps.main_dg import *
 from fastapi import APIRouter, Depends, status
 from fastapi import HTTPException
-from interface.request.bev_request import BEV1, BEV2
+from fastapi.responses import StreamingResponse
+from interface.request.bev_request import BEV1, BEV1Batch, BEV2, BEVBatch
 
 router = APIRouter(tags=["bev"])
 
@@ -55,6 +57,54 @@ async def bev_1(body: BEV1):
         raise HTTPException(status_code=500, detail="BEV conversion failed or no image path returned")
 
 
+@router.post(
+    "/bev1/batch",
+    status_code=status.HTTP_200_OK,
+    summary="keyframe gsd for all frames",
+)
+async def bev_1_batch(body: BEV1Batch):
+    """
+        선박 측정값으로 키프레임의 GSD를 한 번에 계산하고, 키프레임 사이를 보간하여 모든 프레임의 GSD를 반환합니다.
+        키프레임은 동기화된 로그에서 고도, 짐벌 pitch, 줌이 바뀌는 프레임입니다.
+
+        Args
+            - body
+                - body.frame_path (str): 프레임 크기를 읽을 대표 프레임 파일 경로
+                - body.csv_path (str): 동기화된 csv 파일 경로
+                - body.measurements (list): 선박 측정값 N x [frame_num, x1, y1, x2, y2]
+                - body.realdistance (float): 선박의 실제 길이
+                - body.anchors (list): 이미 계산된 GSD M x [frame_num, gsd, pixel_size]
+                - body.frames (list): 결과를 구할 프레임 번호
+
+        Raise
+            - fastapi.HTTPException: GSD 계산에 실패했을 경우 서버 에러(500)를 발생
+
+        Return
+            - result (tuple)
+                - rst (int): 0: 성공, 2: 유효한 측정값이 없음
+                - keyframes (list): 키프레임 번호
+                - results (list): 프레임별 [frame_num, gsd, pixel_size, pixel_size_low, pixel_size_high]
+    """
+
+    try:
+        image = cv2.imread(body.frame_path, -1)
+        result = BEV_GSDKeyframes(
+            body.csv_path,
+            image.shape,
+            body.measurements,
+            body.realdistance,
+            body.anchors,
+            body.frames,
+            body.samples_per_keyframe,
+            body.altitude_tol,
+            body.pitch_tol,
+            body.zoom_tol,
+        )
+        return result
+    except:
+        raise HTTPException(status_code=500, detail="GSD calculation failed")
+
+
 @router.post(
     "/bev2",
     status_code=status.HTTP_200_OK,
@@ -99,6 +149,59 @@ async def bev_2(body: BEV2):
         raise HTTPException(status_code=500, detail="BEV conversion failed or no image path returned")
 
 
+@router.post(
+    "/bev/batch",
+    status_code=status.HTTP_200_OK,
+    summary="bev for many frames",
+)
+async def bev_batch(body: BEVBatch):
+    """
+        여러 프레임의 점 쌍을 한 번의 요청으로 BEV 좌표로 변환하고, 결과를 프레임 순서대로 NDJSON으로 스트리밍합니다.
+        로그와 카메라 기하는 한 번만 읽어 모든 프레임이 공유하며, 프레임은 worker 쓰레드에서 처리합니다.
+
+        Args
+            - body
+                - body.items (list): 프레임별 요청 [{"frame_num", "frame_path", "points": N x [x1, y1, x2, y2]}]
+                - body.csv_path (str): 동기화된 csv 파일 경로
+                - body.gsd (float): BEV 이미지의 GSD, 0이면 프레임별 메타데이터 GSD
+                - body.realdistance (float): 첫 번째 점 쌍의 실제 거리
+                - body.dst_dir (str): BEV 이미지를 저장할 디렉터리 경로
+                - body.image_shape (list): 프레임의 세로, 가로 크기
+                - body.workers (int): worker 쓰레드 개수
+
+        Raise
+            - fastapi.HTTPException: 로그나 프레임 크기를 읽지 못한 경우 서버 에러(500)를 발생
+
+        Return
+            - StreamingResponse (application/x-ndjson): 줄마다 프레임 하나의 결과
+              {"frame_num", "rst", "points", "gsd", "pixel_size", "boundary_rows", "boundary_cols", "img_dst"}
+    """
+
+    try:
+        results = BEV_Batch(
+            [item.dict() for item in body.items],
+            body.csv_path,
+            body.gsd,
+            body.realdistance,
+            body.dst_dir,
+            body.image_shape,
+            body.workers,
+        )
+        # Fail before the response starts when the shared setup (log, frame size) is broken
+        first = next(results, None)
+    except Exception:
+        raise HTTPException(status_code=500, detail="BEV batch setup failed")
+
+    def stream():
+        if first is None:
+            return
+        yield json.dumps(first) + "\n"
+        for result in results:
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 # @router.post(
 #     "/bev2_all",
 #     status_code=status.HTTP_200_OK,
@@ -1,11 +1,13 @@
 import os
 import numpy as np
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from numba import jit, prange
 import time
 from .module.ExifData import *
 from .module.EoData import *
-from .module.Boundary import boundary
-from .module.BackprojectionResample import rectify_plane_parallel_with_point, rectify_plane_parallel, createGeoTiff, create_pnga_optical, create_pnga_optical_with_obj_for_dev
+from .module.Boundary import boundary, boundary_array, pcs2ground, ground2raster
+from .module.BackprojectionResample import rectify_plane_parallel_with_point, rectify_plane_parallel, RemapRectifier, createGeoTiff, create_pnga_optical, create_pnga_optical_with_obj_for_dev
 from rich.console import Console
 from rich.table import Table
 import pandas as pd
@@ -89,6 +91,207 @@ def get_params_for_dg(csv_file, idx=None):
         return df.iloc[idx, :]
 
 
+FrameGeometry = namedtuple("FrameGeometry", ["eo", "R", "boundary", "gsd", "focal_length", "pixel_size"])
+
+
+class FlightGeometry:
+    """
+        동기화된 로그(csv)로부터 비행 전체의 카메라 기하 정보를 한 번에 계산하여 보관합니다.
+
+        csv 파일은 한 번만 읽어 컬럼 단위의 NumPy 배열로 변환하고, 모든 프레임의 EO, 회전행렬, 영역(boundary), GSD를
+        벡터 연산으로 계산합니다. 프레임별 정보는 프레임 번호(csv의 행 번호)로 조회합니다.
+
+        Attributes
+            - image_shape (tuple): 프레임의 세로, 가로 크기
+            - roll, pitch, yaw (np.ndarray): 짐벌 각도 (Degree), shape: N
+            - altitude (np.ndarray): 보정된 드론 높이 (Meter), shape: N
+            - eo (np.ndarray): [X, Y, altitude, omega, phi, kappa], shape: N x 6
+            - R (np.ndarray): 회전행렬, shape: N x 3 x 3
+            - boundary (np.ndarray): 프레임이 투영된 영역 [Xmin, Xmax, Ymin, Ymax], shape: N x 4
+            - gsd (np.ndarray): 메타데이터로 계산한 GSD (m/px), shape: N
+            - zoom (np.ndarray): 로그의 렌즈 초점 거리(focal_length 컬럼, 없으면 1), shape: N
+            - focal_length (float): 초점 거리 (Meter)
+            - pixel_size (float): 센서 픽셀 크기 (m/px)
+            - rectifier (RemapRectifier): 같은 카메라를 사용하는 비행끼리 공유하는 remap 테이블 캐시
+    """
+
+    _cache = OrderedDict()
+    _cache_size = 4
+    _rectifiers = {}
+
+    def __init__(self, csv_path, image_shape, ground_height=0, epsg=5186, maker="DJI"):
+        df = pd.read_csv(csv_path, encoding_errors='ignore')
+
+        self.image_shape = tuple(image_shape[:2])
+        self.ground_height = ground_height
+        self.maker = maker
+
+        self.roll = df["GIMBAL.roll"].to_numpy(dtype=np.float64)  # +  df["OSD.roll"]
+        self.pitch = df["GIMBAL.pitch"].to_numpy(dtype=np.float64)  # + df["OSD.pitch"]
+        self.yaw = df["GIMBAL.yaw"].to_numpy(dtype=np.float64)  # + df["OSD.yaw"]
+        self.altitude = df["adjusted height"].to_numpy(dtype=np.float64)  # Meter
+        if "OSD.latitude" in df and "OSD.longitude" in df:
+            self.latitude = df["OSD.latitude"].to_numpy(dtype=np.float64)  # Degree
+            self.longitude = df["OSD.longitude"].to_numpy(dtype=np.float64)  # Degree
+        else:
+            self.latitude = np.zeros_like(self.altitude)
+            self.longitude = np.zeros_like(self.altitude)
+        if "focal_length" in df:
+            self.zoom = df["focal_length"].to_numpy(dtype=np.float64)
+        else:
+            self.zoom = np.ones_like(self.altitude)
+
+        drone_model = str(df["Drone type"].iloc[0]).upper() if "Drone type" in df and len(df) else None
+        if DRONE_SENSOR_INFO.get(drone_model) is None:
+            drone_model = "MAVIC PRO"
+        self.drone_model = drone_model
+        sensor_width = DRONE_SENSOR_INFO[drone_model][0]  # unit: mm
+        fov_degrees = DRONE_SENSOR_INFO[drone_model][2]
+
+        self.focal_length = estimate_focal_length(self.image_shape[1], sensor_width, fov_degrees) / 1000  # unit: m
+        self.pixel_size = sensor_width / self.image_shape[1] / 1000  # unit: m/px
+
+        # EO: [X, Y, Z, omega, phi, kappa]
+        x, y = geographic2plane_array(self.longitude, self.latitude, epsg)
+        opk = rpy_to_opk_array(np.column_stack((self.roll, self.pitch, self.yaw)), maker) * np.pi / 180
+        self.eo = np.column_stack((x, y, self.altitude, opk))
+        self.R = Rot3D_array(opk)
+
+        self.boundary = boundary_array(self.image_shape, self.eo, self.R, ground_height, self.pixel_size, self.focal_length)
+        self.gsd = (self.pixel_size * (self.altitude - ground_height)) / self.focal_length  # unit: m/px
+
+    @classmethod
+    def load(cls, csv_path, image_shape, ground_height=0, epsg=5186, maker="DJI"):
+        """
+            csv 파일에 대한 FlightGeometry를 반환합니다. 같은 파일(수정 시각 포함)에 대해서는 캐시된 객체를 재사용합니다.
+
+            Args
+                - csv_path (str): 동기화된 csv 파일 경로
+                - image_shape (tuple): 프레임의 세로, 가로 크기
+                - ground_height (float): 지면 높이 (Meter)
+                - epsg (int): 평면 좌표계 EPSG 코드
+                - maker (str): 카메라 제조사
+
+            Return
+                - geometry (FlightGeometry)
+        """
+
+        key = (os.path.abspath(csv_path), os.path.getmtime(csv_path), tuple(image_shape[:2]), ground_height, epsg, maker)
+        geometry = cls._cache.get(key)
+        if geometry is None:
+            geometry = cls(csv_path, image_shape, ground_height, epsg, maker)
+            cls._cache[key] = geometry
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        else:
+            cls._cache.move_to_end(key)
+        return geometry
+
+    @property
+    def rectifier(self):
+        key = (self.image_shape, self.focal_length, self.pixel_size, self.ground_height, self.maker)
+        rectifier = FlightGeometry._rectifiers.get(key)
+        if rectifier is None:
+            rectifier = RemapRectifier(self.image_shape, self.focal_length, self.pixel_size, self.ground_height, self.maker)
+            FlightGeometry._rectifiers[key] = rectifier
+        return rectifier
+
+    def __len__(self):
+        return len(self.altitude)
+
+    def __getitem__(self, idx):
+        """
+            프레임 번호에 해당하는 기하 정보를 반환합니다.
+
+            Return
+                - frame_geometry (FrameGeometry): eo (list), R (3 x 3), boundary (4 x 1), gsd, focal_length, pixel_size
+        """
+
+        return FrameGeometry(
+            self.eo[idx].tolist(),
+            self.R[idx],
+            self.boundary[idx].reshape(4, 1),
+            float(self.gsd[idx]),
+            self.focal_length,
+            self.pixel_size,
+        )
+
+    def boundary_size(self, idx, gsd=0):
+        """
+            프레임 번호에 해당하는 BEV 이미지의 크기를 반환합니다.
+
+            Args
+                - idx (int): 프레임 번호
+                - gsd (float): BEV 이미지의 GSD, 0일 경우 메타데이터로 계산한 GSD를 사용
+
+            Return
+                - boundary_rows (int): # of rows
+                - boundary_cols (int): # of cols
+        """
+
+        if gsd == 0:
+            gsd = self.gsd[idx]
+        bbox = self.boundary[idx]
+        boundary_cols = int((bbox[1] - bbox[0]) / gsd)
+        boundary_rows = int((bbox[3] - bbox[2]) / gsd)
+        return boundary_rows, boundary_cols
+
+    def keyframes(self, altitude_tol=1.0, pitch_tol=1.0, zoom_tol=0.05):
+        """
+            고도, 짐벌 pitch, 줌이 직전 키프레임보다 허용치 이상 바뀐 프레임을 키프레임으로 선택합니다.
+            키프레임 사이의 프레임들은 카메라 기하가 거의 같으므로 GSD 보정값을 공유할 수 있습니다.
+
+            Args
+                - altitude_tol (float): 고도 허용치 (Meter)
+                - pitch_tol (float): 짐벌 pitch 허용치 (Degree)
+                - zoom_tol (float): 줌 허용치 (상대 변화량)
+
+            Return
+                - keyframes (np.ndarray): 키프레임 번호 (첫 프레임 포함, 오름차순)
+        """
+
+        keyframes = []
+        ref = None
+        for idx in range(len(self)):
+            if (
+                ref is None
+                or abs(self.altitude[idx] - self.altitude[ref]) > altitude_tol
+                or abs(self.pitch[idx] - self.pitch[ref]) > pitch_tol
+                or abs(self.zoom[idx] - self.zoom[ref]) > zoom_tol * max(abs(self.zoom[ref]), 1e-9)
+            ):
+                keyframes.append(idx)
+                ref = idx
+        return np.asarray(keyframes, dtype=np.int64)
+
+    def ground_lengths(self, frames, points):
+        """
+            여러 프레임의 이미지 상 선분을 각 프레임의 EO로 지면에 투영하여 실제 길이를 한 번에 계산합니다.
+
+            Args
+                - frames (np.ndarray): 프레임 번호, shape: K
+                - points (np.ndarray): 프레임별 선분 [x1, y1, x2, y2] (px), shape: K x 4
+
+            Return
+                - lengths (np.ndarray): 지면 상의 선분 길이 (Meter), shape: K
+        """
+
+        frames = np.asarray(frames, dtype=np.int64)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2, 2)  # K x 2 x (col, row)
+        rows, cols = self.image_shape
+
+        # pcs2ccs -> projection for every frame at once
+        coord_CCS = np.empty(points.shape[:2] + (3,))
+        coord_CCS[..., 0] = (points[..., 0] - cols / 2) * self.pixel_size
+        coord_CCS[..., 1] = -(points[..., 1] - rows / 2) * self.pixel_size
+        coord_CCS[..., 2] = -self.focal_length
+        coord_GCS = np.einsum("kji,kpj->kpi", self.R[frames], coord_CCS)  # R^T @ ccs
+        scale = (self.ground_height - self.eo[frames, 2])[:, None] / coord_GCS[..., 2]
+        plane_coord_GCS = scale[..., None] * coord_GCS[..., :2]
+
+        return np.linalg.norm(plane_coord_GCS[:, 0] - plane_coord_GCS[:, 1], axis=1)
+
+
+
 def BEV_UserInputFrame(frame_num, frame_path, csv_path, objects, realdistance, dst_dir, DEV = False):
     """
         프레임에 BirdEyeView (BEV)를 적용합니다.
@@ -111,17 +314,7 @@ def BEV_UserInputFrame(frame_num, frame_path, csv_path, objects, realdistance, d
 
     # Step 0 : Meta Info.
     rst = 0 # Success
-    info_row = get_params_from_csv(csv_path, frame_num) # R, P, Y, V, Drone
-    
-    drone_model  = info_row["Drone"]
     ground_height = 0   # unit: m
-    
-    if DRONE_SENSOR_INFO.get(drone_model) is None:
-        drone_model = "MAVIC PRO"
-    sensor_width = DRONE_SENSOR_INFO[drone_model][0]  # unit: mm 
-    sensor_height = DRONE_SENSOR_INFO[drone_model][1]  # unit: mm 
-    fov_degrees = DRONE_SENSOR_INFO[drone_model][2]
-    gsd = 0 # unit: m, set 0 to compute automatically
 
     # Objects Point : Col1, Row1, Col2, Row2
     object_points = [int(x) for x in objects[3:3 + 4]]
@@ -139,44 +332,12 @@ def BEV_UserInputFrame(frame_num, frame_path, csv_path, objects, realdistance, d
         cv2.line(origin_img, (object_points[0], object_points[1]), (object_points[2], object_points[3]), color=(255, 0, 0), thickness = 10)
         cv2.imwrite(img_dst + '_Origin' + '.png', origin_img, [int(cv2.IMWRITE_PNG_COMPRESSION), 3])   # from 0 to 9, default: 
 
-
-    # Step 1. Extract metadata from a df and advance information
-    # focal_length, orientation, eo, maker = get_metadata(file_path)  # unit: m, _, ndarray
-    orientation = 1 # NEED Check from csv?? 
-    maker = "DJI"  # 
-    eo = [0, 0] # longitude, latitude : Not Used
-    eo.append(info_row["V"]) # altitude
-    eo.append(info_row["R"]) # Roll
-    eo.append(info_row["P"]) # Pitch
-    eo.append(info_row["Y"]) # Yaw
-
-    focal_length = estimate_focal_length(image.shape[1], sensor_width, fov_degrees)/(1000)
-
-    # Step 2. Restore the image based on orientation information
-    restored_image = restoreOrientation(image, orientation)
-
-    image_rows = restored_image.shape[0]
-    image_cols = restored_image.shape[1]
-
-    pixel_size = sensor_width / image_cols  # unit: mm/px
-    pixel_size = pixel_size / 1000  # unit: m/px
-
-    eo = geographic2plane(eo, 5186) # epsg = 5186 the global coordinate system definition # 5186 : Korea Center
-    opk = rpy_to_opk(eo[3:], maker) # Roll Pitch Yaw Coorection
-    eo[3:] = opk * np.pi / 180   # degree to radian
-    R = Rot3D(eo) # Rotation Matrix
-    
-    # Step 3. Extract a projected boundary of the image
-    bbox = boundary(restored_image, eo, R, ground_height, pixel_size, focal_length)
-
-    # Step 4. Compute GSD & Boundary size
-    # GSD
-    # if gsd == 0:
-    gsd = (pixel_size * (eo[2] - ground_height)) / focal_length  # unit: m/px
+    # Step 1 ~ 4. EO, Rotation Matrix, Boundary, GSD from the cached flight geometry
+    geometry = FlightGeometry.load(csv_path, image.shape, ground_height)
+    eo, R, bbox, gsd, focal_length, pixel_size = geometry[frame_num]
 
     # Boundary size
-    boundary_cols = int((bbox[1, 0] - bbox[0, 0]) / gsd)
-    boundary_rows = int((bbox[3, 0] - bbox[2, 0]) / gsd)
+    boundary_rows, boundary_cols = geometry.boundary_size(frame_num, gsd)
 
 
     try :
@@ -212,9 +373,216 @@ def BEV_UserInputFrame(frame_num, frame_path, csv_path, objects, realdistance, d
     return rst, img_dst, objects, pixel_size, gsd
 
 
-@jit(nopython=True, parallel=True)
+def BEV_GSDKeyframes(csv_path, image_shape, measurements, realdistance, anchors=(), frames=None, samples_per_keyframe=5,
+                     altitude_tol=1.0, pitch_tol=1.0, zoom_tol=0.05):
+    """
+        키프레임에서만 선박 길이로 GSD를 보정하고 나머지 프레임은 키프레임 사이를 보간하여 모든 프레임의 픽셀 크기를 구합니다.
+
+        BEV_UserInputFrame은 프레임마다 BEV 이미지를 만들어 선박 끝점의 BEV 좌표를 찾지만, 여기서는 끝점을 지면에 바로 투영하여
+        키프레임의 측정값을 한 번의 벡터 연산으로 계산합니다 (pixel_size = realdistance / (지면 길이 / gsd)).
+        보간은 메타데이터 GSD 대비 보정 비율(realdistance / 지면 길이)에 대해 수행하므로 고도 변화는 메타데이터 GSD가 반영합니다.
+
+        Args
+            - csv_path (str): csv 파일 경로
+            - image_shape (tuple): 프레임의 세로, 가로 크기
+            - measurements (list): 선박 측정값 N x [frame_num, x1, y1, x2, y2]
+            - realdistance (float): 선박의 실제 길이 (Meter)
+            - anchors (list): 이미 계산된 값 M x [frame_num, gsd, pixel_size] (ex. 사용자 입력 프레임의 BEV1 결과)
+            - frames (list): 결과를 구할 프레임 번호, None이면 csv의 모든 프레임
+            - samples_per_keyframe (int): 키프레임 구간마다 사용할 최대 측정값 개수
+            - altitude_tol, pitch_tol, zoom_tol (float): FlightGeometry.keyframes 참고
+
+        Return
+            - rst (int): 0: Success, 2: fail to calculate gsd (유효한 측정값이 없음)
+            - keyframes (list): 키프레임 번호
+            - results (list): 프레임별 [frame_num, gsd, pixel_size, pixel_size_low, pixel_size_high]
+              pixel_size_low/high는 주변 키프레임 보정값의 범위와 끝점 1 px 오차를 포함한 오차 범위
+    """
+
+    geometry = FlightGeometry.load(csv_path, image_shape)
+    keyframes = geometry.keyframes(altitude_tol, pitch_tol, zoom_tol)
+    frames = np.arange(len(geometry)) if frames is None else np.asarray(frames, dtype=np.int64)
+
+    # Measurements: frame, x1, y1, x2, y2 inside the log
+    measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 5)
+    measure_frames = measurements[:, 0].astype(np.int64)
+    in_log = (measure_frames >= 0) & (measure_frames < len(geometry))
+    measurements, measure_frames = measurements[in_log], measure_frames[in_log]
+
+    # Sample up to samples_per_keyframe measurements evenly within every keyframe segment
+    order = np.argsort(measure_frames, kind="stable")
+    measurements, measure_frames = measurements[order], measure_frames[order]
+    segments = np.searchsorted(keyframes, measure_frames, side="right") - 1
+    sampled = []
+    for segment in np.unique(segments):
+        members = np.flatnonzero(segments == segment)
+        picks = np.unique(np.linspace(0, len(members) - 1, min(len(members), samples_per_keyframe)).round().astype(np.int64))
+        sampled.extend(members[picks].tolist())
+    sampled = np.asarray(sampled, dtype=np.int64)
+
+    # Correction ratio to the metadata GSD and its relative error from +-0.5 px at both end points
+    sample_frames = measure_frames[sampled]
+    sample_points = measurements[sampled, 1:5]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = realdistance / geometry.ground_lengths(sample_frames, sample_points)
+        errors = 1 / np.hypot(sample_points[:, 2] - sample_points[:, 0], sample_points[:, 3] - sample_points[:, 1])
+
+    anchors = np.asarray(anchors, dtype=np.float64).reshape(-1, 3)
+    anchor_frames = anchors[:, 0].astype(np.int64)
+    anchors_in_log = (anchor_frames >= 0) & (anchor_frames < len(geometry)) & (anchors[:, 1] > 0)
+    anchors, anchor_frames = anchors[anchors_in_log], anchor_frames[anchors_in_log]
+
+    sample_frames = np.concatenate((sample_frames, anchor_frames))
+    ratios = np.concatenate((ratios, anchors[:, 2] / anchors[:, 1]))
+    errors = np.concatenate((errors, np.zeros(len(anchors))))
+    valid = np.isfinite(ratios) & (ratios > 0) & np.isfinite(errors)
+    sample_frames, ratios, errors = sample_frames[valid], ratios[valid], errors[valid]
+
+    gsd = geometry.gsd[np.clip(frames, 0, len(geometry) - 1)]
+    if not len(ratios):
+        results = [[int(frame), float(frame_gsd), 0, 0, 0] for frame, frame_gsd in zip(frames, gsd)]
+        return 2, keyframes.tolist(), results
+
+    # One knot per keyframe segment: median ratio, bounded by the spread of its samples
+    segments = np.searchsorted(keyframes, sample_frames, side="right") - 1
+    knot_frames, knot_ratios, knot_lows, knot_highs = [], [], [], []
+    for segment in np.unique(segments):
+        members = segments == segment
+        knot_frames.append(np.median(sample_frames[members]))
+        knot_ratios.append(np.median(ratios[members]))
+        knot_lows.append(np.min(ratios[members] * (1 - errors[members])))
+        knot_highs.append(np.max(ratios[members] * (1 + errors[members])))
+    knot_frames, knot_ratios = np.asarray(knot_frames), np.asarray(knot_ratios)
+    knot_lows, knot_highs = np.asarray(knot_lows), np.asarray(knot_highs)
+
+    # Linear interpolation between knots; the bounds cover both neighbouring knots
+    ratio = np.interp(frames, knot_frames, knot_ratios)
+    left = np.clip(np.searchsorted(knot_frames, frames, side="right") - 1, 0, len(knot_frames) - 1)
+    right = np.clip(np.searchsorted(knot_frames, frames, side="left"), 0, len(knot_frames) - 1)
+    ratio_low = np.minimum(knot_lows[left], knot_lows[right])
+    ratio_high = np.maximum(knot_highs[left], knot_highs[right])
+
+    results = np.column_stack((frames, gsd, gsd * ratio, gsd * ratio_low, gsd * ratio_high))
+    results = [[int(row[0])] + row[1:].tolist() for row in results]
+    return 0, keyframes.tolist(), results
+
+
+def BEV_Batch(items, csv_path, gsd=0, realdistance=None, dst_dir=None, image_shape=None, workers=4):
+    """
+        여러 프레임의 BEV 변환을 한 번에 수행하고 프레임 순서대로 결과를 하나씩 반환하는 generator입니다.
+
+        동기화된 로그와 카메라 기하(FlightGeometry), remap 테이블은 모든 프레임이 공유하며, 프레임은 workers개의 쓰레드에서 처리합니다.
+        점 변환은 BEV_Boxes와 같이 BEV 이미지 없이 계산하므로, 이미지는 dst_dir이 주어진 경우에만 읽고 변환하여 저장합니다.
+
+        Args
+            - items (list): 프레임별 요청 [{"frame_num": int, "frame_path": str (optional), "points": N x [x1, y1, x2, y2],
+              "realdistance": float (optional, 요청 전체의 realdistance 대신 사용)}]
+            - csv_path (str): csv 파일 경로
+            - gsd (float): BEV 이미지의 GSD, 0이면 프레임별 메타데이터 GSD
+            - realdistance (float): 첫 번째 점 쌍의 실제 거리 (Meter). 주어지면 BEV_UserInputFrame과 같은 pixel_size를 계산
+            - dst_dir (str): BEV 이미지를 저장할 디렉터리 경로, None이면 저장하지 않음
+            - image_shape (tuple): 프레임의 세로, 가로 크기. None이면 frame_path가 있는 첫 프레임에서 읽음
+            - workers (int): 프레임을 처리할 쓰레드 개수
+
+        Return
+            - results (generator): 프레임별 dict
+                - frame_num (int), rst (int): 0: Success, 1: rectify fail, 2: fail to calculate gsd
+                - points (list): BEV 상의 bbox N x [x1, y1, x2, y2]
+                - gsd (float), pixel_size (float): pixel_size는 realdistance가 없거나 계산에 실패하면 None
+                - boundary_rows (int), boundary_cols (int), img_dst (str)
+                - error (str): 실패한 경우의 에러 메시지
+    """
+
+    if image_shape is None:
+        frame_paths = [item.get("frame_path") for item in items if item.get("frame_path")]
+        if not frame_paths:
+            raise ValueError("image_shape or frame_path is required")
+        image_shape = cv2.imread(frame_paths[0], -1).shape
+
+    geometry = FlightGeometry.load(csv_path, image_shape)
+    rectifier = geometry.rectifier if dst_dir else None
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+
+    def process(item):
+        frame_num = int(item["frame_num"])
+        result = {"frame_num": frame_num, "rst": 0, "points": [], "gsd": None, "pixel_size": None,
+                  "boundary_rows": None, "boundary_cols": None, "img_dst": None}
+        try:
+            eo, R, bbox, frame_gsd, focal_length, pixel_size = geometry[frame_num]
+            frame_gsd = gsd or frame_gsd
+            points = np.asarray(item.get("points") or [], dtype=np.float64).reshape(-1, 4)
+
+            if dst_dir and item.get("frame_path"):
+                image = cv2.imread(item["frame_path"], -1)
+                table = rectifier.table(geometry.altitude[frame_num], geometry.roll[frame_num], geometry.pitch[frame_num], geometry.yaw[frame_num], frame_gsd)
+                bbox, eo = table.georeference(eo[0], eo[1])
+                boundary_rows, boundary_cols, frame_gsd, R = table.boundary_rows, table.boundary_cols, table.gsd, table.R
+                img_dst = os.path.join(dst_dir, "Transformed_{}.png".format(os.path.basename(item["frame_path"]).split(".")[0]))
+                cv2.imwrite(img_dst, table.remap(image), [int(cv2.IMWRITE_PNG_COMPRESSION), 3])
+                result["img_dst"] = img_dst
+            else:
+                boundary_rows, boundary_cols = geometry.boundary_size(frame_num, frame_gsd)
+
+            result["gsd"] = float(frame_gsd)
+            result["boundary_rows"], result["boundary_cols"] = boundary_rows, boundary_cols
+            if len(points):
+                result["points"] = BEV_Boxes(geometry.image_shape, bbox, boundary_rows, boundary_cols, frame_gsd, eo, R, focal_length, pixel_size, points).tolist()
+        except Exception as e:
+            result["rst"], result["error"] = 1, str(e)
+            return result
+
+        distance = item.get("realdistance") or realdistance
+        if distance and len(points):
+            # Same as BEV_UserInputFrame: real distance over the length of the first point pair on the BEV image
+            rectify_img_dist = geometry.ground_lengths([frame_num], points[:1])[0] / frame_gsd
+            if np.isfinite(rectify_img_dist) and rectify_img_dist > 0:
+                result["pixel_size"] = distance / rectify_img_dist
+            else:
+                result["rst"], result["error"] = 2, "fail to calculate gsd"
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        yield from executor.map(process, items)
+
+
+def BEV_Boxes(image_shape, boundary, boundary_rows, boundary_cols, gsd, eo, R, focal_length, pixel_size, obj_boxes, ground_height=0):
+    """
+        여러 객체의 bbox를 한 번에 BEV 상에서의 bbox로 변환합니다.
+
+        BEV 격자 전체를 탐색하지 않고, 이미지 좌표를 지상 좌표로 역투영한 뒤 BEV 격자 좌표로 변환합니다.
+
+        Args
+            - image_shape (tuple): 이미지의 가로 세로
+            - boundary (np.ndarray) :  BEV 이미지의 최외각 Bounding Box [Xmin, Xmax, Ymin, Ymax]
+            - boundary_rows (int): # of rows
+            - boundary_cols (ing): # of cols
+            - gsd (float): GSD 값
+            - eo (list): drone meta information [longitude, latitude, altitude, roll, pitch, yaw]
+            - R (np.ndarray): BEV 변환에 활용되는 회전행렬
+            - focal_length (float): 초점 거리
+            - pixel_size (float): sensor_width / image cols # unit: mm/px
+            - obj_boxes (np.ndarray): N x 4 [x1, y1, x2, y2] 형태의 bbox 배열
+            - ground_height (float): 지면 높이 (Meter)
+        Return
+            - rectify_boxes (np.ndarray): N x 4 [x1, y1, x2, y2] 형태의 BEV 상의 bbox 배열 (int)
+    """
+
+    obj_boxes = np.asarray(obj_boxes, dtype=np.float64).reshape(-1, 4)
+
+    # (x1, y1), (x2, y2) -> 2N x 2
+    ground_coords = pcs2ground(obj_boxes.reshape(-1, 2), image_shape, eo, R, ground_height, pixel_size, focal_length)
+    raster_coords = np.rint(ground2raster(ground_coords, boundary, gsd)).astype(np.int64)
+    raster_coords[:, 0] = np.clip(raster_coords[:, 0], 0, max(boundary_cols - 1, 0))
+    raster_coords[:, 1] = np.clip(raster_coords[:, 1], 0, max(boundary_rows - 1, 0))
+
+    raster_coords = raster_coords.reshape(-1, 2, 2)
+    rectify_boxes = np.concatenate((raster_coords.min(axis=1), raster_coords.max(axis=1)), axis=1)
+
+    return rectify_boxes
+
+
 def BEV_Points(image_shape, boundary, boundary_rows, boundary_cols, gsd, eo, R, focal_length, pixel_size, obj_points):
-    # def BEV_Points(image_shape, R, pixel_size, boundary, boundary_cols, boundary_rows, height, focal_length, obj_points, gsd): #, image.shape[1], coord_CCS_px_x, coord_CCS_px_y, dst_dir, gsd, DEV = False):
     """
         BEV 상에서의 bbox로 변환된 bbox 정보를 반환합니다.
 
@@ -233,76 +601,9 @@ def BEV_Points(image_shape, boundary, boundary_rows, boundary_cols, gsd, eo, R,
             - rectify_points (list): BEV 상의 bbox로 변환된 bbox
     """
 
-     # 1. projection
-    proj_coords_x = 0.
-    proj_coords_y = 0.
-    proj_coords_z = 0.
-
-    # 2. back-projection
-    coord_CCS_m_x = 0.
-    coord_CCS_m_y = 0.
-    coord_CCS_m_z = 0.
-    plane_coord_CCS_x = 0.
-    plane_coord_CCS_y = 0.
-    coord_CCS_px_x = 0.
-    coord_CCS_px_y = 0.
-
-    # 3. resample
-    coord_ICS_col = 0
-    coord_ICS_row = 0
-
-    obj_points = [int(x) for x in obj_points]
-    rectify_points = [0,0,0,0]
-
-    margin = 1
-    def in_range(n, start, end = 0):
-        return start <= n <= end if end >= start else end <= n <= start
-
-    for row in prange(boundary_rows):
-        for col in range(boundary_cols):
-            # 1. projection
-            proj_coords_x = boundary[0, 0] + col * gsd - eo[0]
-            proj_coords_y = boundary[3, 0] - row * gsd - eo[1]
-            proj_coords_z = 0 - eo[2]
-
-            # 2. back-projection - unit: m
-            coord_CCS_m_x = R[0, 0] * proj_coords_x + R[0, 1] * proj_coords_y + R[0, 2] * proj_coords_z
-            coord_CCS_m_y = R[1, 0] * proj_coords_x + R[1, 1] * proj_coords_y + R[1, 2] * proj_coords_z
-            coord_CCS_m_z = R[2, 0] * proj_coords_x + R[2, 1] * proj_coords_y + R[2, 2] * proj_coords_z
-
-            scale = (coord_CCS_m_z) / (-focal_length)  # scalar
-            plane_coord_CCS_x = coord_CCS_m_x / scale
-            plane_coord_CCS_y = coord_CCS_m_y / scale
-
-            # Convert CCS to Pixel Coordinate System - unit: px
-            coord_CCS_px_x = plane_coord_CCS_x / pixel_size
-            coord_CCS_px_y = -plane_coord_CCS_y / pixel_size
-
-            # 3. resample
-            # Nearest Neighbor
-            coord_ICS_col = int(image_shape[1] / 2 + coord_CCS_px_x)  # column
-            coord_ICS_row = int(image_shape[0] / 2 + coord_CCS_px_y)  # row
-
-            if coord_ICS_col < 0 or coord_ICS_col >= image_shape[1]:      # column
-                continue
-            elif coord_ICS_row < 0 or coord_ICS_row >= image_shape[0]:    # row
-                continue
-            else:
-                if in_range(coord_ICS_col, obj_points[0] - margin, obj_points[0] + margin) and in_range(coord_ICS_row, obj_points[1] - margin, obj_points[1] + margin) :
-                    rectify_points[0] = col
-                    rectify_points[1] = row
-                if in_range(coord_ICS_col, obj_points[2] - margin, obj_points[2] + margin) and in_range(coord_ICS_row, obj_points[3] - margin, obj_points[3] + margin) :
-                    rectify_points[2] = col
-                    rectify_points[3] = row
-    
-    cols = [rectify_points[0], rectify_points[2]]
-    rows = [rectify_points[1], rectify_points[3]]
-    rectify_points[0] = min(cols)
-    rectify_points[1] = min(rows)
-    rectify_points[2] = max(cols)
-    rectify_points[3] = max(rows)
+    rectify_boxes = BEV_Boxes(image_shape, boundary, boundary_rows, boundary_cols, gsd, eo, R, focal_length, pixel_size, [obj_points[:4]])
 
-    return rectify_points
+    return rectify_boxes[0].tolist()
 
 
 def BEV_FullFrame(frame_num, frame_path, csv_path, gsd, dst_dir='./', DEV = False):
@@ -311,7 +612,7 @@ def BEV_FullFrame(frame_num, frame_path, csv_path, gsd, dst_dir='./', DEV = Fals
         
         Args
             - frame_num (int): BEV를 적용할 프레임 번호
-            - frame_path (str): BEV를 적용할 프레임 경로
+            - frame_path (str | np.ndarray): BEV를 적용할 프레임 경로 또는 이미 읽은 프레임
             - csv_path (str): csv 파일 경로
             - gsd (float): gsd 값
             - dst_dir (str): BEV가 적용된 프레임이 저장될 디렉터리 경로
@@ -332,82 +633,45 @@ def BEV_FullFrame(frame_num, frame_path, csv_path, gsd, dst_dir='./', DEV = Fals
 
     # Step 0 : Meta Info.
     rst = 0 # Success
-    info_row = get_params_from_csv(csv_path, frame_num) # R, P, Y, V, Drone
-    
-    drone_model  = info_row["Drone"]
     ground_height = 0   # unit: m
-    
-    if DRONE_SENSOR_INFO.get(drone_model) is None:
-        drone_model = "MAVIC PRO"
-    sensor_width = DRONE_SENSOR_INFO[drone_model][0]  # unit: mm 
-    sensor_height = DRONE_SENSOR_INFO[drone_model][1]  # unit: mm 
-    fov_degrees = DRONE_SENSOR_INFO[drone_model][2]
-    gsd = gsd # From BEV1
 
     # Save Path
-    if 1 : 
+    if isinstance(frame_path, str) : 
         filename = os.path.basename(frame_path).split(".")[0]
         dst_file_name = "Transformed_{}".format(filename)
         img_dst = dst_dir + '/' + dst_file_name # os.path.join(dst_dir, dst_file_name)
         # Imread
         image = cv2.imread(frame_path, -1)
-    else :  # Local DEV
+    else :  # Already decoded frame
         img_dst = os.path.join(dst_dir, str(frame_num))
-        image = frame_path # cv2.imread(frame_path, -1)
+        image = frame_path
 
 
     if DEV : 
         ## Visualize Original Image
         origin_img = image.copy()
-        # cv2.line(origin_img, (object_points[0], object_points[1]), (object_points[2], object_points[3]), color=(255, 0, 0), thickness = 10)
         cv2.imwrite(img_dst + '_Origin' + '.png', origin_img, [int(cv2.IMWRITE_PNG_COMPRESSION), 3])   # from 0 to 9, default: 
 
-    # Step 1. Extract metadata from a df and advance information
-    # focal_length, orientation, eo, maker = get_metadata(file_path)  # unit: m, _, ndarray
-    orientation = 1 # NEED Check from csv?? 
-    maker = "DJI"  # 
-    eo = [0, 0] # longitude, latitude : Not Used
-    eo.append(info_row["V"]) # altitude
-    eo.append(info_row["R"]) # Roll
-    eo.append(info_row["P"]) # Pitch
-    eo.append(info_row["Y"]) # Yaw
-
-    focal_length = estimate_focal_length(image.shape[1], sensor_width, fov_degrees)/(1000)
-
-    # Step 2. Restore the image based on orientation information
-    restored_image = restoreOrientation(image, orientation)
+    # Step 1 ~ 4. EO, Rotation Matrix, Boundary, GSD from the cached flight geometry
+    geometry = FlightGeometry.load(csv_path, image.shape, ground_height)
+    eo, R, bbox, meta_gsd, focal_length, pixel_size = geometry[frame_num]
 
-    image_rows = restored_image.shape[0]
-    image_cols = restored_image.shape[1]
-
-    pixel_size = sensor_width / image_cols  # unit: mm/px
-    pixel_size = pixel_size / 1000  # unit: m/px
-
-    eo = geographic2plane(eo, 5186) # epsg = 5186 the global coordinate system definition # 5186 : Korea Center
-    opk = rpy_to_opk(eo[3:], maker) # Roll Pitch Yaw Coorection
-    eo[3:] = opk * np.pi / 180   # degree to radian
-    R = Rot3D(eo) # Rotation Matrix
-    
-    # Step 3. Extract a projected boundary of the image
-    bbox = boundary(restored_image, eo, R, ground_height, pixel_size, focal_length)
-
-    # Step 4. Compute GSD & Boundary size
-    # GSD
+    # GSD (From BEV1)
     if gsd == 0:
-        gsd = (pixel_size * (eo[2] - ground_height)) / focal_length  # unit: m/px
+        gsd = meta_gsd  # unit: m/px
 
-    # Boundary size
-    boundary_cols = int((bbox[1, 0] - bbox[0, 0]) / gsd)
-    boundary_rows = int((bbox[3, 0] - bbox[2, 0]) / gsd)
-    
     try :
-        b, g, r, a = rectify_plane_parallel(bbox, boundary_rows, boundary_cols, gsd, eo, ground_height, R, focal_length, pixel_size, image)
+        # Step 5. Rectify with the remap table of the (quantized) pose, shared across frames
+        # The returned geometry is the one the table was built for, so objects projected with it line up with the image
+        table = geometry.rectifier.table(geometry.altitude[frame_num], geometry.roll[frame_num], geometry.pitch[frame_num], geometry.yaw[frame_num], gsd)
+        transformed_img = table.remap(image)
+        bbox, eo = table.georeference(eo[0], eo[1])
+        boundary_rows, boundary_cols, gsd, R = table.boundary_rows, table.boundary_cols, table.gsd, table.R
         # if DEV : 
             # create_pnga_optical_with_obj_for_dev(b, g, r, a, bbox, gsd, 5186, img_dst, rectified_poinst)  
-        # else : 
-        transformed_img = cv2.merge((b, g, r))
         if 0 :
-            create_pnga_optical(b, g, r, a, bbox, gsd, 5186, img_dst)  
+            b, g, r = cv2.split(transformed_img)
+            create_pnga_optical(b, g, r, table.alpha, bbox, gsd, 5186, img_dst)  
     except : 
         rst = 1
         return rst, None, None, None, None, None, None, None, None, None
@@ -420,59 +684,18 @@ def DG_Boundary(frame_num, frame_path, csv_path):
 
         Args:
             - frame_num (int): Georeferencing을 적용할 프레임 번호입니다.
-            - frame_path (str): Georeferencing을 적용할 프레임 경로입니다.
+            - frame_path (str | np.ndarray): Georeferencing을 적용할 프레임 경로 또는 이미 읽은 프레임입니다.
             - csv_path (str): csv 파일 경로입니다.
 
         Return:
-            - bbox ():
+            - bbox (np.ndarray): 프레임이 투영된 영역 [Xmin, Xmax, Ymin, Ymax], shape: 4 x 1
     """
 
-    # Step 0 : Meta Info.
-    info_row = get_params_for_dg(csv_path, frame_num)  # R, P, Y, V, Drone, Lat, Lon
-
-    drone_model = info_row["Drone"]
-    ground_height = 0  # unit: m
-
-    if DRONE_SENSOR_INFO.get(drone_model) is None:
-        drone_model = "MAVIC PRO"
-    sensor_width = DRONE_SENSOR_INFO[drone_model][0]  # unit: mm
-    sensor_height = DRONE_SENSOR_INFO[drone_model][1]  # unit: mm
-    fov_degrees = DRONE_SENSOR_INFO[drone_model][2]
-
-    image = cv2.imread(frame_path, -1)
-
-    # Step 1. Extract metadata from a df and advance information
-    # focal_length, orientation, eo, maker = get_metadata(file_path)  # unit: m, _, ndarray
-    orientation = 1  # NEED Check from csv??
-    maker = "DJI"  #
-    eo = []  #
-    eo.append(info_row["Lon"]) # longitude
-    eo.append(info_row["Lat"]) # latitude
-    eo.append(info_row["V"])  # altitude
-    eo.append(info_row["R"])  # Roll
-    eo.append(info_row["P"])  # Pitch
-    eo.append(info_row["Y"])  # Yaw
-
-    focal_length = estimate_focal_length(image.shape[1], sensor_width, fov_degrees) / (1000)
-
-    # Step 2. Restore the image based on orientation information
-    restored_image = restoreOrientation(image, orientation)
-
-    image_rows = restored_image.shape[0]
-    image_cols = restored_image.shape[1]
-
-    pixel_size = sensor_width / image_cols  # unit: mm/px
-    pixel_size = pixel_size / 1000  # unit: m/px
-
-    eo = geographic2plane(eo, 5186)  # epsg = 5186 the global coordinate system definition # 5186 : Korea Center
-    opk = rpy_to_opk(eo[3:], maker)  # Roll Pitch Yaw Correction
-    eo[3:] = opk * np.pi / 180  # degree to radian
-    R = Rot3D(eo)  # Rotation Matrix
+    image = cv2.imread(frame_path, -1) if isinstance(frame_path, str) else frame_path
 
-    # Step 3. Extract a projected boundary of the image
-    bbox = boundary(restored_image, eo, R, ground_height, pixel_size, focal_length)
+    geometry = FlightGeometry.load(csv_path, image.shape)
 
-    return bbox
+    return geometry[frame_num].boundary
 
 if __name__ == "__main__":
     ### Test Data ###
@@ -1,7 +1,11 @@
+import threading
 import numpy as np
+from collections import OrderedDict
 from numba import jit, prange
 from osgeo import gdal, osr
 import cv2
+from .EoData import Rot3D_array, rpy_to_opk_array
+from .Boundary import boundary_array
 
 @jit(nopython=True, parallel=True)
 def rectify_plane_parallel_with_point(boundary, boundary_rows, boundary_cols, gsd, eo, ground_height, R, focal_length, pixel_size, image, obj_points):
@@ -149,6 +153,160 @@ def rectify_plane_parallel(boundary, boundary_rows, boundary_cols, gsd, eo, grou
     return b, g, r, a
 
 
+def remap_tables(boundary, boundary_rows, boundary_cols, gsd, eo, ground_height, R, focal_length, pixel_size, image_shape):
+    # Same projection & back-projection as rectify_plane_parallel, evaluated once for the whole grid
+    # and returned as float32 lookup tables for cv2.remap
+    proj_coords_x = (boundary[0, 0] - eo[0]) + np.arange(boundary_cols, dtype=np.float64) * gsd  # 1 x cols
+    proj_coords_y = (boundary[3, 0] - eo[1]) - np.arange(boundary_rows, dtype=np.float64) * gsd  # rows x 1
+    proj_coords_z = ground_height - eo[2]
+
+    proj_coords_x = proj_coords_x[np.newaxis, :]
+    proj_coords_y = proj_coords_y[:, np.newaxis]
+
+    # back-projection - unit: m
+    coord_CCS_m_x = R[0, 0] * proj_coords_x + R[0, 1] * proj_coords_y + R[0, 2] * proj_coords_z
+    coord_CCS_m_y = R[1, 0] * proj_coords_x + R[1, 1] * proj_coords_y + R[1, 2] * proj_coords_z
+    coord_CCS_m_z = R[2, 0] * proj_coords_x + R[2, 1] * proj_coords_y + R[2, 2] * proj_coords_z
+
+    scale = coord_CCS_m_z / (-focal_length)
+
+    # Convert CCS to Pixel Coordinate System - unit: px
+    # rectify_plane_parallel truncates the coordinates, i.e. pixel (i, j) covers [i, i + 1) x [j, j + 1),
+    # so the centre of a pixel is at +0.5 and remap has to sample half a pixel earlier
+    map_x = image_shape[1] / 2 + coord_CCS_m_x / scale / pixel_size - 0.5
+    map_y = image_shape[0] / 2 - coord_CCS_m_y / scale / pixel_size - 0.5
+
+    invalid = ~(np.isfinite(map_x) & np.isfinite(map_y))
+    map_x[invalid] = -1
+    map_y[invalid] = -1
+
+    return map_x.astype(np.float32), map_y.astype(np.float32)
+
+
+class RemapTable:
+    # Precomputed cv2.remap lookup tables of one (quantized) camera pose
+    # boundary and eo are relative to the camera position (X = Y = 0)
+
+    def __init__(self, map_x, map_y, boundary, boundary_rows, boundary_cols, gsd, eo, R, image_shape, interpolation):
+        self.image_shape = tuple(image_shape[:2])
+        self.interpolation = interpolation
+        self.boundary = boundary
+        self.boundary_rows = boundary_rows
+        self.boundary_cols = boundary_cols
+        self.gsd = gsd
+        self.eo = eo
+        self.R = R
+
+        # alpha: 255 where the BEV pixel is inside the source image (same rule as rectify_plane_parallel)
+        self.alpha = np.where((map_x >= -0.5) & (map_x < image_shape[1] - 0.5) &
+                              (map_y >= -0.5) & (map_y < image_shape[0] - 0.5), 255, 0).astype(np.uint8)
+
+        # Fixed-point maps are smaller than float32 ones and faster to remap with (map2 is None for nearest)
+        self.map1, self.map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2,
+                                               nninterpolation=(interpolation == cv2.INTER_NEAREST))
+
+    @property
+    def nbytes(self):
+        return self.map1.nbytes + (0 if self.map2 is None else self.map2.nbytes) + self.alpha.nbytes
+
+    def remap(self, image):
+        return cv2.remap(image, self.map1, self.map2, self.interpolation,
+                         borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+    def georeference(self, x, y):
+        # Move the table geometry to the camera position (x, y)
+        boundary = self.boundary + np.array([[x], [x], [y], [y]])
+        eo = [x, y] + self.eo[2:]
+        return boundary, eo
+
+
+class RemapRectifier:
+    # Rectifies frames with cv2.remap, caching the lookup tables of one camera
+    # Drone attitude changes slowly, so tables are keyed by the quantized (altitude, roll, pitch, yaw, GSD)
+    # and reused across frames; least recently used tables are evicted by count and total size
+
+    def __init__(self, image_shape, focal_length, pixel_size, ground_height=0, maker="DJI",
+                 interpolation=cv2.INTER_LINEAR, cache_size=32, cache_bytes=2 * 1024 ** 3,
+                 altitude_step=0.05, angle_step=0.05, gsd_step=1e-5):
+        self.image_shape = tuple(image_shape[:2])
+        self.focal_length = focal_length
+        self.pixel_size = pixel_size
+        self.ground_height = ground_height
+        self.maker = maker
+        self.interpolation = interpolation
+
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self.altitude_step = altitude_step
+        self.angle_step = angle_step
+        self.gsd_step = gsd_step
+
+        self._tables = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()  # tables are shared by the frames of a batch request processed in worker threads
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, altitude, roll, pitch, yaw, gsd):
+        return (int(round(altitude / self.altitude_step)),
+                int(round(roll / self.angle_step)),
+                int(round(pitch / self.angle_step)),
+                int(round(yaw / self.angle_step)),
+                int(round(gsd / self.gsd_step)))
+
+    def table(self, altitude, roll, pitch, yaw, gsd):
+        # altitude: m, roll/pitch/yaw: gimbal angles in degree, gsd: m/px
+        key = self.quantize(altitude, roll, pitch, yaw, gsd)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+
+        # Built outside the lock so that other poses are not blocked; a concurrent build of the same key is dropped
+        table = self._build(key)
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                return self._tables[key]
+            self._tables[key] = table
+            self._nbytes += table.nbytes
+            while len(self._tables) > 1 and (len(self._tables) > self.cache_size or self._nbytes > self.cache_bytes):
+                _, evicted = self._tables.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+        return table
+
+    def rectify(self, image, altitude, roll, pitch, yaw, gsd):
+        table = self.table(altitude, roll, pitch, yaw, gsd)
+        return table.remap(image), table
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._nbytes = 0
+
+    def _build(self, key):
+        altitude = key[0] * self.altitude_step
+        rpy = np.array(key[1:4], dtype=np.float64) * self.angle_step
+        gsd = key[4] * self.gsd_step
+
+        opk = rpy_to_opk_array(rpy, self.maker) * np.pi / 180  # degree to radian
+        eo = [0., 0., altitude] + opk[0].tolist()
+        R = Rot3D_array(opk)[0]
+
+        bbox = boundary_array(self.image_shape, eo, R[np.newaxis], self.ground_height, self.pixel_size, self.focal_length).reshape(4, 1)
+        boundary_cols = int((bbox[1, 0] - bbox[0, 0]) / gsd)
+        boundary_rows = int((bbox[3, 0] - bbox[2, 0]) / gsd)
+
+        map_x, map_y = remap_tables(bbox, boundary_rows, boundary_cols, gsd, eo, self.ground_height, R,
+                                    self.focal_length, self.pixel_size, self.image_shape)
+
+        return RemapTable(map_x, map_y, bbox, boundary_rows, boundary_cols, gsd, eo, R, self.image_shape, self.interpolation)
+
+
 @jit(nopython=True)
 def rectify_plane(boundary, boundary_rows, boundary_cols, gsd, eo, ground_height, R, focal_length, pixel_size, image):
     # 1. projection
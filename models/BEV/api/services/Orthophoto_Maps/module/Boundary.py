@@ -17,9 +17,31 @@ def boundary(image, eo, R, dem, pixel_size, focal_length):
 
     return bbox
 
+def boundary_array(image_shape, eo, R, dem, pixel_size, focal_length):
+    # Vectorized version of boundary: eo (N x 6), R (N x 3 x 3) -> bbox (N x 4) [Xmin, Xmax, Ymin, Ymax]
+    eo = np.asarray(eo, dtype=np.float64).reshape(-1, 6)
+
+    image_vertex = getVerticesFromShape(image_shape, pixel_size, focal_length)  # shape: 3 x 4
+    coord_GCS = np.matmul(np.transpose(R, (0, 2, 1)), image_vertex)  # shape: N x 3 x 4
+    scale = (dem - eo[:, 2:3]) / coord_GCS[:, 2]  # shape: N x 4
+
+    proj_x = scale * coord_GCS[:, 0] + eo[:, 0:1]
+    proj_y = scale * coord_GCS[:, 1] + eo[:, 1:2]
+
+    bbox = np.empty(shape=(eo.shape[0], 4))
+    bbox[:, 0] = proj_x.min(axis=1)  # X min
+    bbox[:, 1] = proj_x.max(axis=1)  # X max
+    bbox[:, 2] = proj_y.min(axis=1)  # Y min
+    bbox[:, 3] = proj_y.max(axis=1)  # Y max
+
+    return bbox
+
 def getVertices(image, pixel_size, focal_length):
-    rows = image.shape[0]
-    cols = image.shape[1]
+    return getVerticesFromShape(image.shape, pixel_size, focal_length)
+
+def getVerticesFromShape(image_shape, pixel_size, focal_length):
+    rows = image_shape[0]
+    cols = image_shape[1]
 
     # (1) ------------ (2)
     #  |     image      |
@@ -61,6 +83,25 @@ def pcs2ccs(bbox_px, rows, cols, pixel_size, focal_length):
 
     return bbox_camera
 
+def pcs2ground(points_px, image_shape, eo, R, dem, pixel_size, focal_length):
+    # points_px: N x 2 (col, row) -> N x 2 (X, Y) on the plane of height dem
+    points_px = np.asarray(points_px, dtype=np.float64).reshape(-1, 2)
+
+    coord_CCS = pcs2ccs(points_px.transpose(), image_shape[0], image_shape[1], pixel_size, focal_length)  # 3 x N
+    plane_coord_GCS = projection(coord_CCS, eo, R.transpose(), dem)  # 2 x N
+
+    return plane_coord_GCS.transpose()
+
+def ground2raster(coords, boundary, gsd):
+    # coords: N x 2 (X, Y) -> N x 2 (col, row) of the rectified raster whose upper-left corner is (Xmin, Ymax)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    raster = np.empty_like(coords)
+    raster[:, 0] = (coords[:, 0] - boundary[0, 0]) / gsd
+    raster[:, 1] = (boundary[3, 0] - coords[:, 1]) / gsd
+
+    return raster
+
 def ray_tracing(image, eo, R, dem, vertices, pixel_size, focal_length):
     # create rays
     ray_origins = np.empty(shape=(4, 3))
@@ -46,6 +46,30 @@ def geographic2plane(eo, epsg=5186):
 
     return eo
 
+def geographic2plane_array(lon, lat, epsg=5186):
+    # Vectorized version of geographic2plane: lon, lat (N,) in degree -> x, y (N,) in the plane coordinate system
+    lon = np.asarray(lon, dtype=np.float64).reshape(-1)
+    lat = np.asarray(lat, dtype=np.float64).reshape(-1)
+
+    plane = SpatialReference()
+    plane.ImportFromEPSG(epsg)
+
+    geographic = SpatialReference()
+    geographic.ImportFromEPSG(4326)
+
+    coord_transformation = CoordinateTransformation(geographic, plane)
+
+    if int(osgeo.__version__[0]) >= 3:  # version 3.x
+        points = coord_transformation.TransformPoints(np.column_stack((lat, lon)).tolist())  # The order: Lat, Lon
+        points = np.asarray(points, dtype=np.float64)[:, 0:2]
+        if str(epsg).startswith("51"):  # Northing, Easting
+            points = points[:, ::-1]
+    else:  # version 2.x
+        points = coord_transformation.TransformPoints(np.column_stack((lon, lat)).tolist())  # The order: Lon, Lat
+        points = np.asarray(points, dtype=np.float64)[:, 0:2]
+
+    return points[:, 0], points[:, 1]
+
 def tmcentral2latlon(eo):
     # Define the TM central coordinate system (EPSG 5186)
     epsg5186 = SpatialReference()
@@ -113,6 +137,31 @@ def Rot3D(eo):
 
     return R
 
+def Rot3D_array(opk):
+    # Vectorized version of Rot3D: opk (N x 3) in radian -> R (N x 3 x 3) = Rz * Ry * Rx
+    opk = np.asarray(opk, dtype=np.float64).reshape(-1, 3)
+    om, ph, kp = opk[:, 0], opk[:, 1], opk[:, 2]
+
+    cos_om, sin_om = np.cos(om), np.sin(om)
+    cos_ph, sin_ph = np.cos(ph), np.sin(ph)
+    cos_kp, sin_kp = np.cos(kp), np.sin(kp)
+
+    R = np.empty(shape=(opk.shape[0], 3, 3))
+
+    R[:, 0, 0] = cos_ph * cos_kp
+    R[:, 0, 1] = sin_om * sin_ph * cos_kp + cos_om * sin_kp
+    R[:, 0, 2] = -cos_om * sin_ph * cos_kp + sin_om * sin_kp
+
+    R[:, 1, 0] = -cos_ph * sin_kp
+    R[:, 1, 1] = -sin_om * sin_ph * sin_kp + cos_om * cos_kp
+    R[:, 1, 2] = cos_om * sin_ph * sin_kp + sin_om * cos_kp
+
+    R[:, 2, 0] = sin_ph
+    R[:, 2, 1] = -sin_om * cos_ph
+    R[:, 2, 2] = cos_om * cos_ph
+
+    return R
+
 def rot_2d(theta):
     # Convert the coordinate system not coordinates
     return np.array([[np.cos(theta), np.sin(theta)],
@@ -139,3 +188,23 @@ def rpy_to_opk(rpy, maker=""):
         omega_phi = np.dot(rot_2d(rpy[2] * np.pi / 180), roll_pitch.reshape(2, 1))
         kappa = -rpy[2]
         return np.array([float(omega_phi[0, 0]), float(omega_phi[1, 0]), kappa])
+
+def rpy_to_opk_array(rpy, maker=""):
+    # Vectorized version of rpy_to_opk: rpy (N x 3) in degree -> opk (N x 3) in degree
+    rpy = np.asarray(rpy, dtype=np.float64).reshape(-1, 3)
+    yaw = rpy[:, 2] * np.pi / 180
+
+    if maker == "samsung":
+        roll_pitch_0 = -rpy[:, 1]
+        roll_pitch_1 = -rpy[:, 0]
+        kappa = -rpy[:, 2] - 90
+    else:
+        roll_pitch_0 = 90 + rpy[:, 1]
+        roll_pitch_1 = np.where(180 - np.abs(rpy[:, 0]) <= 0.1, 0, rpy[:, 0])
+        kappa = -rpy[:, 2]
+
+    # rot_2d(yaw) x [roll_pitch_0, roll_pitch_1]^T
+    omega = np.cos(yaw) * roll_pitch_0 + np.sin(yaw) * roll_pitch_1
+    phi = -np.sin(yaw) * roll_pitch_0 + np.cos(yaw) * roll_pitch_1
+
+    return np.column_stack((omega, phi, kappa))
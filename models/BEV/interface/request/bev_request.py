@@ -1,7 +1,9 @@
 from autologging import logged
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
-__all__ = ["BEV1", "BEV2"]
+__all__ = ["BEV1", "BEV1Batch", "BEV2", "BEVBatch", "BEVBatchItem"]
 
 
 @logged
@@ -37,6 +39,46 @@ class BEV1(BaseModel):
             }
         }
 
+@logged
+class BEV1Batch(BaseModel):
+    """
+        여러 프레임의 선박 측정값으로 키프레임 GSD를 계산하고 모든 프레임에 보간합니다.
+
+        Attributes
+            - frame_path (str): 프레임 크기를 읽을 대표 프레임 파일 경로
+            - csv_path (str): 동기화된 csv 파일
+            - measurements (list): 선박 측정값 N x [frame_num, x1, y1, x2, y2]
+            - realdistance (float): 선박의 실제 길이
+            - anchors (list): 이미 계산된 GSD M x [frame_num, gsd, pixel_size]
+            - frames (list): 결과를 구할 프레임 번호, 없으면 csv의 모든 프레임
+            - samples_per_keyframe (int): 키프레임 구간마다 사용할 최대 측정값 개수
+            - altitude_tol (float): 키프레임을 나누는 고도 변화 (Meter)
+            - pitch_tol (float): 키프레임을 나누는 짐벌 pitch 변화 (Degree)
+            - zoom_tol (float): 키프레임을 나누는 줌 변화 (상대 변화량)
+    """
+
+    frame_path: str = Field(..., description="Path to a frame image of the video")
+    csv_path: str = Field(..., description="Path to the CSV file")
+    measurements: List[list] = Field(..., description="Ship measurements [frame_num, x1, y1, x2, y2]")
+    realdistance: float = Field(..., description="Real distance value")
+    anchors: List[list] = Field([], description="Known GSD [frame_num, gsd, pixel_size]")
+    frames: Optional[List[int]] = Field(None, description="Frame numbers of the result")
+    samples_per_keyframe: int = Field(5, description="Measurements used per keyframe")
+    altitude_tol: float = Field(1.0, description="Altitude change of a new keyframe")
+    pitch_tol: float = Field(1.0, description="Gimbal pitch change of a new keyframe")
+    zoom_tol: float = Field(0.05, description="Relative zoom change of a new keyframe")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "frame_path": "/home/dva4/DVA_LAB/backend/test/frame_origin/DJI_0149_01038.jpg",
+                "csv_path": "/home/dva4/DVA_LAB/backend/test/sync_csv/sync_log.csv",
+                "measurements": [[1038, 860, 682, 860, 1034], [1043, 866, 680, 864, 1030]],
+                "realdistance": 8.9,
+                "anchors": [[1035, 0.0523, 0.0311]],
+            }
+        }
+
 @logged
 class BEV2(BaseModel):
     """
@@ -69,4 +111,58 @@ class BEV2(BaseModel):
                 "gsd": 0.00009362739603860218,
 
             }
-        }
\ No newline at end of file
+        }
+
+
+@logged
+class BEVBatchItem(BaseModel):
+    """
+        BEV 배치 요청의 프레임 하나
+
+        Attributes
+            - frame_num (int): BEV를 적용할 프레임 번호
+            - frame_path (str): BEV를 적용할 프레임 파일 경로 (BEV 이미지를 저장하는 경우 필요)
+            - points (list): BEV 상의 좌표로 변환할 점 쌍 N x [x1, y1, x2, y2]
+            - realdistance (float): 첫 번째 점 쌍의 실제 거리, 없으면 배치 요청의 realdistance
+    """
+
+    frame_num: int = Field(..., description="Frame number")
+    frame_path: Optional[str] = Field(None, description="Path to the frame image")
+    points: List[List[float]] = Field([], description="Point pairs [x1, y1, x2, y2]")
+    realdistance: Optional[float] = Field(None, description="Real distance of the first point pair")
+
+
+@logged
+class BEVBatch(BaseModel):
+    """
+        여러 프레임에 대한 BirdEyeView (BEV) 배치 요청
+
+        Attributes
+            - items (list): 프레임별 요청 (BEVBatchItem)
+            - csv_path (str): 동기화된 csv 파일
+            - gsd (float): BEV 이미지의 GSD, 0이면 프레임별 메타데이터 GSD
+            - realdistance (float): 첫 번째 점 쌍의 실제 거리, 주어지면 프레임별 pixel_size를 계산
+            - dst_dir (str): BEV가 적용된 프레임이 저장될 디렉터리 경로, 없으면 저장하지 않음
+            - image_shape (list): 프레임의 세로, 가로 크기, 없으면 첫 프레임에서 읽음
+            - workers (int): 프레임을 처리할 쓰레드 개수
+    """
+
+    items: List[BEVBatchItem] = Field(..., description="Frames of the batch")
+    csv_path: str = Field(..., description="Path to the CSV file")
+    gsd: float = Field(0, description="GSD of the BEV images, 0 for the metadata GSD")
+    realdistance: Optional[float] = Field(None, description="Real distance of the first point pair")
+    dst_dir: Optional[str] = Field(None, description="Destination directory for results")
+    image_shape: Optional[List[int]] = Field(None, description="Frame height and width")
+    workers: int = Field(4, description="Number of worker threads")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "items": [
+                    {"frame_num": 1038, "frame_path": "/home/dva4/DVA_LAB/backend/test/frame_origin/DJI_0149_01038.jpg", "points": [[860, 682, 860, 1034]]},
+                    {"frame_num": 1043, "frame_path": "/home/dva4/DVA_LAB/backend/test/frame_origin/DJI_0149_01043.jpg", "points": [[866, 680, 864, 1030]]},
+                ],
+                "csv_path": "/home/dva4/DVA_LAB/backend/test/sync_csv/sync_log.csv",
+                "realdistance": 8.9,
+            }
+        }
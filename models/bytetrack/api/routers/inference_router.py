@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 import argparse
 import time
-import csv
+import json
 import os
 
 from loguru import logger
 
-from api.services import BYTETracker
 from api.services import Timer
-from interface.request import TrackingRequest
+from api.services import TrackingSession, TrackingSessionRegistry, get_image_size
+from api.services.tracking_service import BEV_POINTS_PATH
+from interface.request import TrackingRequest, TrackingSessionRequest
 
-import numpy as np
+# 프레임 정보가 없을 때 사용하는 이미지 크기
+DEFAULT_IMAGE_SIZE = (3840, 1260)
 
 def make_parser():
     """
@@ -44,23 +48,29 @@ def make_parser():
     parser.add_argument("--mot20", dest="mot20", default=False, action="store_true", help="test mot20.")
     return parser
 
-def merge_bboxes(track_results):
-    """
-    여러 경계 상자들을 포함하는 하나의 큰 경계 상자를 계산합니다.
+
+def resolve_image_size(frame_path=None, img_w=None, img_h=None):
     """
-    global merged_dolphin_center
-    if not track_results:
-        merged_dolphin_center = None
-        return None
+        객체추적에 사용할 이미지 크기를 구합니다. 직접 전달된 크기, 프레임 헤더, 기본 크기 순으로 사용합니다.
 
-    # 각 경계 상자의 최소 x, y 및 최대 x, y 좌표를 계산합니다.
-    min_x = min(track_result.tlwh[0] for track_result in track_results)
-    min_y = min(track_result.tlwh[1] for track_result in track_results)
-    max_x = max(track_result.tlwh[0] + track_result.tlwh[2] for track_result in track_results)
-    max_y = max(track_result.tlwh[1] + track_result.tlwh[3] for track_result in track_results)
+        Args
+            - frame_path (str): 프레임 파일 또는 프레임 디렉터리 경로
+            - img_w (int): 이미지의 가로 크기
+            - img_h (int): 이미지의 세로 크기
 
-    merged_dolphin_center = (min_x + (max_x - min_x) / 2, min_y + (max_y - min_y) / 2)
-    return (min_x, min_y, max_x, max_y)
+        Return
+            - img_w (int): 이미지의 가로 크기
+            - img_h (int): 이미지의 세로 크기
+    """
+
+    if img_w and img_h:
+        return img_w, img_h
+    if frame_path:
+        try:
+            return get_image_size(frame_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"cannot read image size from {frame_path}: {e}")
+    return DEFAULT_IMAGE_SIZE
 
 
 def track(det_results, img_w, img_h, result_path, args):
@@ -75,87 +85,29 @@ def track(det_results, img_w, img_h, result_path, args):
             - args (argparse.ArgumentParser()): 객체추적에 사용할 사용자 옵션
     """
 
-    tracker = BYTETracker(args, frame_rate=args.fps)
+    session = TrackingSession(args, img_w, img_h, result_path, BEV_POINTS_PATH)
     timer = Timer()
-    results = []
-    ############### for bev viz ###############
-    data = []
-    ###############            ###############
     timer.tic()
     for frame_id, det_result in enumerate(det_results, 1):
-        if det_result is not None and np.array(det_result).size > 0:
-            online_targets = tracker.update(np.array(det_result), [img_h, img_w], [img_h, img_w])
-            online_tlwhs = []
-            online_ids = []
-            online_scores = []
-            online_labels = []
-            ############### for bev viz ###############
-            points = []
-            dolphin_bboxes = []
-            ###############            ###############
-            for t in online_targets:
-                tlwh = t.tlwh
-                tid = t.track_id
-                label = int(t.label)
-                
-                if tlwh[2] * tlwh[3] > args.min_box_area:
-                    online_tlwhs.append(tlwh)
-                    online_ids.append(tid)
-                    online_scores.append(t.score)
-                    online_labels.append(label)
-                    
-                    if label == 1 and t.score < 0.8:
-                        continue
-                    
-                    # save results
-                    results.append(f"{frame_id},{tid},{label},{tlwh[0]:.2f},{tlwh[1]:.2f},{tlwh[2]:.2f},{tlwh[3]:.2f},{t.score:.2f},-1,-1,-1\n")
-                    
-                    ############### for bev viz ###############
-                    # bbox의 중심점을 계산합니다.
-                    center_x, center_y = (tlwh[0] + tlwh[2]) / 2, (tlwh[1] + tlwh[3]) / 2
-
-                    if label == 1: # 선박인 경우
-                        points = [frame_id, tid, label, center_x+1, center_y+1, center_x, center_y, t.score, -1,-1,-1]
-                    else : # 돌고래인 경우
-                        dolphin_bboxes.append(t)
-                    
-                    # csv data add
-                    if len(points)>0:
-                        data.append(points)
-                        points = []
-            
-            # 모든 돌고래 bbox를 하나로 합칩니다.
-            merged_dolphin_bbox = merge_bboxes(dolphin_bboxes)
-            if merged_dolphin_bbox is not None:
-                center_x, center_y = (merged_dolphin_bbox[0]+merged_dolphin_bbox[2])/2,  (merged_dolphin_bbox[1]+merged_dolphin_bbox[3])/2 
-                if label == 0 :
-                    points = [frame_id, 999999, label, merged_dolphin_bbox[0],merged_dolphin_bbox[1],merged_dolphin_bbox[2], merged_dolphin_bbox[3],t.score,-1,-1,-1]
-                
-            # csv data add
-            if len(points)>0:
-                data.append(points)
+        if det_result is not None:
+            session.push(frame_id, det_result)
 
         timer.toc()
         if frame_id % 20 == 0:
             logger.info('Processing frame {}: avg {:.4f} seconds per frame'.format(frame_id, timer.average_time))
 
-
-    with open(result_path, 'w') as f:
-        f.writelines(results)
-    g = open("/home/dva4/DVA_LAB/backend/test/bev_points.csv", "w")
-    writer = csv.writer(g)
-    writer.writerows(data)
-    g.close()
+    session.close()
     logger.info(f"save results to {result_path}")
 
 
-def main(det_result_path, result_path):
+def main(det_result_path, result_path, frame_path=None):
     """
         객체추적 모델에 인퍼런스를 수행하는 메인 함수 역할을 수행합니다.
 
         Args
             - det_result_path (str): 객체탐지와 이상탐지의 결과가 병합된 bbox 정보가 담긴 파일 경로
             - reult_path (str): 객체추적 결과가 저장될 파일 경로
+            - frame_path (str): 이미지 크기를 읽을 프레임 파일 또는 프레임 디렉터리 경로, None이면 기본 크기 사용
     """
 
     args = make_parser().parse_args()
@@ -184,8 +136,7 @@ def main(det_result_path, result_path):
         grouped_data[key].append(values)
     det_results = [grouped_data[key] for key in sorted(grouped_data.keys())]
 
-    # 추후 인풋 형식 맞출 때 반영 필요: img w, h 정보 추가
-    img_w, img_h = 3840, 1260
+    img_w, img_h = resolve_image_size(frame_path)
     track(det_results, img_w, img_h, result_path, args)
 
 
@@ -212,5 +163,124 @@ async def inference(body: TrackingRequest):
     det_result_path = body.det_result_path
     result_path = body.result_path
     os.makedirs(os.path.dirname(result_path), exist_ok=True)
-    main(det_result_path, result_path)
+    main(det_result_path, result_path, body.frame_path)
+    return result_path
+
+
+sessions = TrackingSessionRegistry()
+
+
+def get_session(session_id):
+    try:
+        return sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"unknown tracking session: {session_id}")
+
+
+@router.post(
+    "/bytetrack/session",
+    status_code=status.HTTP_200_OK,
+    summary="open bytetrack session",
+)
+async def open_session(body: TrackingSessionRequest):
+    """
+        프레임 단위로 객체탐지 결과를 받아 추적하는 객체추적 세션을 열고 세션 ID를 반환합니다.
+
+        Args
+            - body
+                - result_path (str): 객체추적 결과가 저장될 파일 경로
+                - frame_path (str): 이미지 크기를 읽을 프레임 파일 또는 프레임 디렉터리 경로
+                - img_w (int): 이미지의 가로 크기 (frame_path보다 우선)
+                - img_h (int): 이미지의 세로 크기 (frame_path보다 우선)
+                - bev_points_path (str): BEV 시각화용 점 정보가 저장될 파일 경로
+
+        Return
+            - session_id (str): 객체추적 세션 ID
+            - img_w (int): 세션에서 사용하는 이미지의 가로 크기
+            - img_h (int): 세션에서 사용하는 이미지의 세로 크기
+    """
+
+    args = make_parser().parse_args()
+    img_w, img_h = resolve_image_size(body.frame_path, body.img_w, body.img_h)
+    session = sessions.add(TrackingSession(args, img_w, img_h, body.result_path, body.bev_points_path))
+    logger.info(f"open tracking session {session.session_id} ({img_w}x{img_h})")
+    return {"session_id": session.session_id, "img_w": img_w, "img_h": img_h}
+
+
+@router.post(
+    "/bytetrack/session/{session_id}/frames",
+    status_code=status.HTTP_200_OK,
+    summary="push frames to bytetrack session",
+)
+async def push_frames(session_id: str, request: Request):
+    """
+        청크 단위로 전송되는 NDJSON 본문에서 프레임별 객체탐지 결과를 읽어 추적하고, 프레임별 추적 결과를 NDJSON으로 바로 반환합니다.
+
+        요청 본문의 한 줄은 한 프레임이며, 응답도 입력 프레임마다 한 줄씩 전송됩니다.
+            요청: {"frame_id": 1, "detections": [[x1, y1, x2, y2, score, label], ...]}
+            응답: {"frame_id": 1, "tracks": [[frame_id, track_id, label, x, y, w, h, score], ...]}
+        잘못된 줄에는 {"frame_id": ..., "error": "..."}가 전송됩니다.
+
+        Args
+            - session_id (str): 객체추적 세션 ID
+            - request (fastapi.Request): NDJSON 요청
+
+        Raise
+            - fastapi.HTTPException: 없는 세션인 경우 404
+
+        Return
+            - StreamingResponse (application/x-ndjson): 프레임별 추적 결과
+    """
+
+    session = get_session(session_id)
+
+    async def lines():
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for line in complete:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+
+    async def results():
+        async for line in lines():
+            frame_id = None
+            try:
+                message = json.loads(line)
+                frame_id = int(message["frame_id"])
+                tracks = await run_in_threadpool(session.push, frame_id, message.get("detections") or [])
+                result = {"frame_id": frame_id, "tracks": tracks}
+            except (KeyError, TypeError, ValueError, RuntimeError) as e:
+                result = {"frame_id": frame_id, "error": str(e)}
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.delete(
+    "/bytetrack/session/{session_id}",
+    status_code=status.HTTP_200_OK,
+    summary="close bytetrack session",
+)
+async def close_session(session_id: str):
+    """
+        객체추적 세션을 닫고 결과 파일 경로를 반환합니다.
+
+        Args
+            - session_id (str): 객체추적 세션 ID
+
+        Raise
+            - fastapi.HTTPException: 없는 세션인 경우 404
+
+        Return
+            - result_path (str): 객체추적 결과가 저장된 파일 경로
+    """
+
+    session = get_session(session_id)
+    sessions.pop(session_id)
+    result_path = session.close()
+    logger.info(f"close tracking session {session_id}: {session.num_frames} frames")
     return result_path
@@ -1,2 +1,4 @@
 from .yolox.tracker.byte_tracker import BYTETracker
-from .yolox.tracking_utils.timer import Timer
\ No newline at end of file
+from .yolox.tracker.array_tracker import ArrayBYTETracker
+from .yolox.tracking_utils.timer import Timer
+from .tracking_service import TrackingSession, TrackingSessionRegistry, get_image_size
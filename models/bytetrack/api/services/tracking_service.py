@@ -0,0 +1,243 @@
+import csv
+import os
+import threading
+import uuid
+
+import numpy as np
+from PIL import Image
+
+from .yolox.tracker.array_tracker import ArrayBYTETracker
+
+BEV_POINTS_PATH = "/home/dva4/DVA_LAB/backend/test/bev_points.csv"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def get_image_size(frame_path):
+    """
+        프레임 파일(또는 프레임 디렉터리의 첫 번째 이미지)의 헤더만 읽어 이미지 크기를 반환합니다.
+
+        Args
+            - frame_path (str): 프레임 파일 경로 또는 프레임이 담긴 디렉터리 경로
+
+        Raise
+            - FileNotFoundError: 디렉터리에 이미지가 없는 경우
+
+        Return
+            - img_w (int): 이미지의 가로 크기
+            - img_h (int): 이미지의 세로 크기
+    """
+
+    if os.path.isdir(frame_path):
+        frames = sorted(file for file in os.listdir(frame_path) if file.lower().endswith(IMAGE_EXTENSIONS))
+        if not frames:
+            raise FileNotFoundError(f"no frame image in {frame_path}")
+        frame_path = os.path.join(frame_path, frames[0])
+    with Image.open(frame_path) as image:
+        img_w, img_h = image.size
+    return img_w, img_h
+
+
+def merge_bboxes(track_results):
+    """
+    여러 경계 상자들을 포함하는 하나의 큰 경계 상자를 계산합니다.
+    """
+    if not track_results:
+        return None
+
+    # 각 경계 상자의 최소 x, y 및 최대 x, y 좌표를 계산합니다.
+    min_x = min(track_result.tlwh[0] for track_result in track_results)
+    min_y = min(track_result.tlwh[1] for track_result in track_results)
+    max_x = max(track_result.tlwh[0] + track_result.tlwh[2] for track_result in track_results)
+    max_y = max(track_result.tlwh[1] + track_result.tlwh[3] for track_result in track_results)
+
+    return (min_x, min_y, max_x, max_y)
+
+
+def collect_frame_results(frame_id, online_targets, min_box_area):
+    """
+        한 프레임의 추적 결과를 결과 파일의 행과 BEV 시각화용 점 정보로 변환합니다.
+
+        Args
+            - frame_id (int): 프레임 번호
+            - online_targets (list): 트래커가 반환한 추적 객체
+            - min_box_area (float): 최소 bbox 넓이
+
+        Return
+            - rows (list): 결과 파일의 행 N x [frame_id, track_id, label, x, y, w, h, score]
+            - data (list): bev_points.csv의 행 M x [frame_id, track_id, label, x1, y1, x2, y2, score, -1, -1, -1]
+    """
+
+    rows = []
+    data = []
+    points = []
+    dolphin_bboxes = []
+    t, label = None, None
+    for t in online_targets:
+        tlwh = t.tlwh
+        tid = t.track_id
+        label = int(t.label)
+
+        if tlwh[2] * tlwh[3] > min_box_area:
+            if label == 1 and t.score < 0.8:
+                continue
+
+            rows.append([frame_id, tid, label, tlwh[0], tlwh[1], tlwh[2], tlwh[3], t.score])
+
+            # bbox의 중심점을 계산합니다.
+            center_x, center_y = (tlwh[0] + tlwh[2]) / 2, (tlwh[1] + tlwh[3]) / 2
+
+            if label == 1:  # 선박인 경우
+                points = [frame_id, tid, label, center_x + 1, center_y + 1, center_x, center_y, t.score, -1, -1, -1]
+            else:  # 돌고래인 경우
+                dolphin_bboxes.append(t)
+
+            if len(points) > 0:
+                data.append(points)
+                points = []
+
+    # 모든 돌고래 bbox를 하나로 합칩니다. (마지막으로 처리한 객체가 돌고래인 경우에만 기록)
+    merged_dolphin_bbox = merge_bboxes(dolphin_bboxes)
+    if merged_dolphin_bbox is not None and label == 0:
+        data.append([frame_id, 999999, label, merged_dolphin_bbox[0], merged_dolphin_bbox[1],
+                     merged_dolphin_bbox[2], merged_dolphin_bbox[3], t.score, -1, -1, -1])
+
+    return rows, data
+
+
+def format_result_row(row):
+    frame_id, tid, label, x, y, w, h, score = row
+    return f"{frame_id},{tid},{label},{x:.2f},{y:.2f},{w:.2f},{h:.2f},{score:.2f},-1,-1,-1\n"
+
+
+class TrackingSession:
+    """
+        프레임 단위로 객체탐지 결과를 받아 바로 추적하는 객체추적 세션입니다.
+
+        트래커는 세션이 열려 있는 동안 메모리에 유지되며, 추적 결과는 프레임마다 결과 파일과 bev_points.csv에 이어서 기록됩니다.
+        객체탐지가 끝나기를 기다리지 않고 탐지된 프레임부터 추적할 수 있습니다.
+
+            session = TrackingSession(args, img_w, img_h, result_path)
+            rows = session.push(frame_id, detections)
+            session.close()
+
+        Args
+            - args (argparse.Namespace): 객체추적에 사용할 사용자 옵션 (make_parser 참고)
+            - img_w (int): 이미지의 가로 크기
+            - img_h (int): 이미지의 세로 크기
+            - result_path (str): 객체추적 결과가 저장될 파일 경로, None이면 저장하지 않음
+            - bev_points_path (str): BEV 시각화용 점 정보가 저장될 파일 경로, None이면 저장하지 않음
+    """
+
+    def __init__(self, args, img_w, img_h, result_path=None, bev_points_path=None):
+        self.session_id = uuid.uuid4().hex
+        self.args = args
+        self.img_w = img_w
+        self.img_h = img_h
+        self.result_path = result_path
+        self.bev_points_path = bev_points_path
+        self.tracker = ArrayBYTETracker(args, frame_rate=args.fps)
+        self.num_frames = 0
+        self.last_frame_id = None
+        self._lock = threading.Lock()
+
+        self._result_file = None
+        self._bev_file = None
+        self._bev_writer = None
+        if result_path:
+            os.makedirs(os.path.dirname(result_path) or ".", exist_ok=True)
+            self._result_file = open(result_path, "w")
+        if bev_points_path:
+            os.makedirs(os.path.dirname(bev_points_path) or ".", exist_ok=True)
+            self._bev_file = open(bev_points_path, "w")
+            self._bev_writer = csv.writer(self._bev_file)
+
+    @property
+    def closed(self):
+        return self.tracker is None
+
+    def push(self, frame_id, detections):
+        """
+            한 프레임의 객체탐지 결과로 트래커를 갱신하고 그 프레임의 추적 결과를 반환합니다.
+
+            Args
+                - frame_id (int): 프레임 번호 (증가하는 순서로 전달)
+                - detections (list): N x [x1, y1, x2, y2, score, label]
+
+            Raise
+                - RuntimeError: 닫힌 세션인 경우
+                - ValueError: 프레임 번호가 직전 프레임보다 크지 않은 경우
+
+            Return
+                - rows (list): N x [frame_id, track_id, label, x, y, w, h, score]
+        """
+
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"tracking session {self.session_id} is closed")
+            if self.last_frame_id is not None and frame_id <= self.last_frame_id:
+                raise ValueError(f"frame {frame_id} is not after frame {self.last_frame_id}")
+            self.last_frame_id = frame_id
+
+            detections = np.asarray(detections, dtype=np.float64)
+            if detections.size == 0:
+                return []
+            detections = detections.reshape(len(detections), -1)
+
+            online_targets = self.tracker.update(detections, [self.img_h, self.img_w], [self.img_h, self.img_w])
+            self.num_frames += 1
+            rows, data = collect_frame_results(frame_id, online_targets, self.args.min_box_area)
+
+            if self._result_file is not None:
+                self._result_file.writelines(format_result_row(row) for row in rows)
+            if self._bev_writer is not None:
+                self._bev_writer.writerows(data)
+            return [[int(value) for value in row[:3]] + [float(value) for value in row[3:]] for row in rows]
+
+    def close(self):
+        """
+            세션을 닫고 결과 파일을 저장합니다.
+
+            Return
+                - result_path (str): 객체추적 결과가 저장된 파일 경로
+        """
+
+        with self._lock:
+            for file in (self._result_file, self._bev_file):
+                if file is not None:
+                    file.close()
+            self._result_file = self._bev_file = self._bev_writer = None
+            self.tracker = None
+        return self.result_path
+
+
+class TrackingSessionRegistry:
+    """
+        열려 있는 객체추적 세션을 session_id로 관리합니다.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def add(self, session):
+        with self._lock:
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        """
+            Raise
+                - KeyError: 없는 세션인 경우
+        """
+
+        with self._lock:
+            return self._sessions[session_id]
+
+    def pop(self, session_id):
+        """
+            Raise
+                - KeyError: 없는 세션인 경우
+        """
+
+        with self._lock:
+            return self._sessions.pop(session_id)
@@ -0,0 +1,336 @@
+import numpy as np
+
+from .kalman_filter import KalmanFilter
+from . import matching
+from .basetrack import BaseTrack, TrackState
+
+
+class TrackStore(object):
+    """
+    Structure-of-arrays storage of the tracks of one tracker.
+    Every track lives in a slot of the preallocated arrays; slots of tracks that
+    left the tracker are returned to a free-list and reused, so the storage only
+    grows with the number of tracks alive at the same time.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.mean = np.zeros((0, 8))
+        self.covariance = np.zeros((0, 8, 8))
+        self.score = np.zeros(0)
+        self.label = np.zeros(0)
+        self.track_id = np.zeros(0, dtype=np.int64)
+        self.state = np.zeros(0, dtype=np.int8)
+        self.is_activated = np.zeros(0, dtype=bool)
+        self.was_removed = np.zeros(0, dtype=bool)
+        self.frame_id = np.zeros(0, dtype=np.int64)
+        self.start_frame = np.zeros(0, dtype=np.int64)
+        self.tracklet_len = np.zeros(0, dtype=np.int64)
+        self._free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        capacity = max(capacity, 1)
+        for name in ('mean', 'covariance', 'score', 'label', 'track_id', 'state', 'is_activated', 'was_removed',
+                     'frame_id', 'start_frame', 'tracklet_len'):
+            old = getattr(self, name)
+            new = np.zeros((self.capacity + capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        # pop() hands out the lowest free slot first
+        self._free.extend(range(self.capacity + capacity - 1, self.capacity - 1, -1))
+        self.capacity += capacity
+
+    def allocate(self):
+        if not self._free:
+            self._grow(self.capacity)
+        slot = self._free.pop()
+        self.was_removed[slot] = False
+        return slot
+
+    def release(self, slots):
+        self._free.extend(slots)
+
+    @property
+    def num_free(self):
+        return len(self._free)
+
+    def tlwh(self, slots):
+        """`(top left x, top left y, width, height)` of the tracks, Shape: [len(slots), 4]."""
+        ret = self.mean[slots, :4].copy()
+        ret[:, 2] *= ret[:, 3]
+        ret[:, :2] -= ret[:, 2:] / 2
+        return ret
+
+    def tlbr(self, slots):
+        """`(min x, min y, max x, max y)` of the tracks, Shape: [len(slots), 4]."""
+        ret = self.tlwh(slots)
+        ret[:, 2:] += ret[:, :2]
+        return ret
+
+
+class TrackView(object):
+    """Snapshot of a track returned by `ArrayBYTETracker.update`, with the STrack attributes callers read."""
+
+    __slots__ = ('tlwh', 'track_id', 'label', 'score', 'state', 'is_activated', 'frame_id', 'start_frame',
+                 'tracklet_len')
+
+    def __init__(self, store, slot):
+        self.tlwh = store.tlwh([slot])[0]
+        self.track_id = int(store.track_id[slot])
+        self.label = store.label[slot]
+        self.score = store.score[slot]
+        self.state = int(store.state[slot])
+        self.is_activated = bool(store.is_activated[slot])
+        self.frame_id = int(store.frame_id[slot])
+        self.start_frame = int(store.start_frame[slot])
+        self.tracklet_len = int(store.tracklet_len[slot])
+
+    @property
+    def tlbr(self):
+        ret = self.tlwh.copy()
+        ret[2:] += ret[:2]
+        return ret
+
+    @property
+    def end_frame(self):
+        return self.frame_id
+
+    def __repr__(self):
+        return 'OT_{}_({}-{})'.format(self.track_id, self.start_frame, self.end_frame)
+
+
+def tlbr_to_tlwh(tlbr):
+    ret = np.asarray(tlbr, dtype=np.float64).copy()
+    ret[:, 2:] -= ret[:, :2]
+    return ret
+
+
+def tlwh_to_tlbr(tlwh):
+    ret = tlwh.copy()
+    ret[:, 2:] += ret[:, :2]
+    return ret
+
+
+def tlwh_to_xyah(tlwh):
+    ret = np.asarray(tlwh, dtype=np.float64).copy()
+    ret[:, :2] += ret[:, 2:] / 2
+    ret[:, 2] /= ret[:, 3]
+    return ret
+
+
+def fuse_score(cost_matrix, det_scores):
+    if cost_matrix.size == 0:
+        return cost_matrix
+    iou_sim = 1 - cost_matrix
+    det_scores = np.expand_dims(det_scores, axis=0).repeat(cost_matrix.shape[0], axis=0)
+    fuse_sim = iou_sim * det_scores
+    return 1 - fuse_sim
+
+
+class ArrayBYTETracker(object):
+    """
+    BYTETracker with the track state kept in a `TrackStore` instead of one STrack object per detection.
+    Kalman prediction, update and initiation run batched over the tracks of each association step,
+    and removed tracks are evicted instead of being kept for the whole video.
+    `update` takes the same arguments and returns the same tracks (as `TrackView`) as `BYTETracker.update`.
+    """
+
+    def __init__(self, args, frame_rate=30, capacity=64):
+        self.store = TrackStore(capacity)
+        self.tracked_stracks = []  # slots, in the order of BYTETracker.tracked_stracks
+        self.lost_stracks = []  # slots, in the order of BYTETracker.lost_stracks
+        self.frame_id = 0
+        self.args = args
+        self.det_thresh = args.track_thresh
+        self.buffer_size = int(frame_rate / 30.0 * args.track_buffer)
+        self.max_time_lost = self.buffer_size
+        self.kalman_filter = KalmanFilter()
+
+    def _predict(self, slots):
+        if len(slots) == 0:
+            return
+        store = self.store
+        mean = store.mean[slots].copy()
+        mean[store.state[slots] != TrackState.Tracked, 7] = 0
+        store.mean[slots], store.covariance[slots] = self.kalman_filter.multi_predict(mean, store.covariance[slots])
+
+    def _kalman_update(self, slots, det_tlwh):
+        if len(slots) == 0:
+            return
+        store = self.store
+        store.mean[slots], store.covariance[slots] = self.kalman_filter.multi_update(
+            store.mean[slots], store.covariance[slots], tlwh_to_xyah(det_tlwh))
+
+    def _apply_matches(self, matches, slots, det_tlwh, det_scores, activated, refind):
+        """STrack.update / STrack.re_activate(new_id=True) for every matched (track, detection) pair."""
+        store = self.store
+        updated, measurements = [], []
+        for itracked, idet in matches:
+            slot = slots[itracked]
+            if store.state[slot] == TrackState.Tracked:
+                store.tracklet_len[slot] += 1
+                activated.append(slot)
+            else:
+                store.tracklet_len[slot] = 0
+                store.track_id[slot] = BaseTrack.next_id()
+                refind.append(slot)
+            store.frame_id[slot] = self.frame_id
+            store.state[slot] = TrackState.Tracked
+            store.is_activated[slot] = True
+            store.score[slot] = det_scores[idet]
+            updated.append(slot)
+            measurements.append(det_tlwh[idet])
+        self._kalman_update(updated, np.asarray(measurements).reshape(-1, 4))
+
+    def update(self, output_results, img_info, img_size):
+        self.frame_id += 1
+        store = self.store
+        activated_starcks = []
+        refind_stracks = []
+        lost_stracks = []
+        removed_stracks = []
+
+        if output_results.shape[1] == 6:
+            scores = output_results[:, 4]
+            bboxes = output_results[:, :4]
+            labels = output_results[:, 5]
+        else:
+            if not isinstance(output_results, np.ndarray):
+                output_results = output_results.cpu().numpy()
+            scores = output_results[:, 4] * output_results[:, 5]
+            bboxes = output_results[:, :4]  # x1y1x2y2
+            labels = output_results[:, 6]
+        img_h, img_w = img_info[0], img_info[1]
+        scale = min(img_size[0] / float(img_h), img_size[1] / float(img_w))
+        bboxes = bboxes / scale
+
+        remain_inds = scores > self.args.track_thresh
+        inds_low = scores > 0.1
+        inds_high = scores < self.args.track_thresh
+        inds_second = np.logical_and(inds_low, inds_high)
+
+        det_tlwh = tlbr_to_tlwh(bboxes[remain_inds].reshape(-1, 4))
+        det_scores = scores[remain_inds]
+        det_labels = labels[remain_inds]
+        second_tlwh = tlbr_to_tlwh(bboxes[inds_second].reshape(-1, 4))
+        second_scores = scores[inds_second]
+
+        ''' Add newly detected tracklets to tracked_stracks'''
+        unconfirmed = [slot for slot in self.tracked_stracks if not store.is_activated[slot]]
+        tracked_stracks = [slot for slot in self.tracked_stracks if store.is_activated[slot]]
+
+        ''' Step 2: First association, with high score detection boxes'''
+        strack_pool = joint_stracks(tracked_stracks, self.lost_stracks)
+        # Predict the current location with KF
+        self._predict(strack_pool)
+        dists = matching.iou_distance(store.tlbr(strack_pool), tlwh_to_tlbr(det_tlwh))
+        if not self.args.mot20:
+            dists = fuse_score(dists, det_scores)
+        matches, u_track, u_detection = matching.linear_assignment(dists, thresh=self.args.match_thresh)
+        self._apply_matches(matches, strack_pool, det_tlwh, det_scores, activated_starcks, refind_stracks)
+
+        ''' Step 3: Second association, with low score detection boxes'''
+        r_tracked_stracks = [strack_pool[i] for i in u_track if store.state[strack_pool[i]] == TrackState.Tracked]
+        dists = matching.iou_distance(store.tlbr(r_tracked_stracks), tlwh_to_tlbr(second_tlwh))
+        matches, u_track, u_detection_second = matching.linear_assignment(dists, thresh=0.5)
+        self._apply_matches(matches, r_tracked_stracks, second_tlwh, second_scores, activated_starcks, refind_stracks)
+
+        for it in u_track:
+            slot = r_tracked_stracks[it]
+            if not store.state[slot] == TrackState.Lost:
+                store.state[slot] = TrackState.Lost
+                lost_stracks.append(slot)
+
+        '''Deal with unconfirmed tracks, usually tracks with only one beginning frame'''
+        u_detection = np.asarray(u_detection, dtype=np.int64)
+        det_tlwh, det_scores, det_labels = det_tlwh[u_detection], det_scores[u_detection], det_labels[u_detection]
+        dists = matching.iou_distance(store.tlbr(unconfirmed), tlwh_to_tlbr(det_tlwh))
+        if not self.args.mot20:
+            dists = fuse_score(dists, det_scores)
+        matches, u_unconfirmed, u_detection = matching.linear_assignment(dists, thresh=0.7)
+        self._apply_matches(matches, unconfirmed, det_tlwh, det_scores, activated_starcks, refind_stracks)
+        for it in u_unconfirmed:
+            slot = unconfirmed[it]
+            store.state[slot] = TrackState.Removed
+            removed_stracks.append(slot)
+
+        """ Step 4: Init new stracks"""
+        new_slots, new_dets = [], []
+        for inew in u_detection:
+            if det_scores[inew] < self.det_thresh:
+                continue
+            slot = store.allocate()
+            store.track_id[slot] = BaseTrack.next_id()
+            store.tracklet_len[slot] = 0
+            store.state[slot] = TrackState.Tracked
+            store.is_activated[slot] = self.frame_id == 1
+            store.frame_id[slot] = self.frame_id
+            store.start_frame[slot] = self.frame_id
+            store.score[slot] = det_scores[inew]
+            store.label[slot] = det_labels[inew]
+            new_slots.append(slot)
+            new_dets.append(inew)
+            activated_starcks.append(slot)
+        if new_slots:
+            store.mean[new_slots], store.covariance[new_slots] = self.kalman_filter.multi_initiate(
+                tlwh_to_xyah(det_tlwh[new_dets]))
+
+        previous_slots = set(self.tracked_stracks)
+        previous_slots.update(self.lost_stracks)
+        previous_slots.update(new_slots)
+
+        """ Step 5: Update state"""
+        for slot in self.lost_stracks:
+            if self.frame_id - store.frame_id[slot] > self.max_time_lost:
+                store.state[slot] = TrackState.Removed
+                removed_stracks.append(slot)
+
+        self.tracked_stracks = [slot for slot in self.tracked_stracks if store.state[slot] == TrackState.Tracked]
+        self.tracked_stracks = joint_stracks(self.tracked_stracks, activated_starcks)
+        self.tracked_stracks = joint_stracks(self.tracked_stracks, refind_stracks)
+        self.lost_stracks = sub_stracks(self.lost_stracks, self.tracked_stracks)
+        self.lost_stracks.extend(lost_stracks)
+        # BYTETracker subtracts every track removed in an earlier frame (the removed list is only extended afterwards)
+        self.lost_stracks = [slot for slot in self.lost_stracks if not store.was_removed[slot]]
+        store.was_removed[removed_stracks] = True
+        self.tracked_stracks, self.lost_stracks = remove_duplicate_stracks(store, self.tracked_stracks, self.lost_stracks)
+
+        # Evict the tracks that left both lists; BYTETracker keeps them in removed_stracks forever
+        alive = set(self.tracked_stracks)
+        alive.update(self.lost_stracks)
+        store.release([slot for slot in previous_slots if slot not in alive])
+
+        output_stracks = [TrackView(store, slot) for slot in self.tracked_stracks if store.is_activated[slot]]
+        return output_stracks
+
+
+def joint_stracks(tlista, tlistb):
+    exists = set(tlista)
+    res = list(tlista)
+    for slot in tlistb:
+        if slot not in exists:
+            exists.add(slot)
+            res.append(slot)
+    return res
+
+
+def sub_stracks(tlista, tlistb):
+    tlistb = set(tlistb)
+    return [slot for slot in tlista if slot not in tlistb]
+
+
+def remove_duplicate_stracks(store, stracksa, stracksb):
+    pdist = matching.iou_distance(store.tlbr(stracksa), store.tlbr(stracksb))
+    pairs = np.where(pdist < 0.15)
+    dupa, dupb = set(), set()
+    for p, q in zip(*pairs):
+        timep = store.frame_id[stracksa[p]] - store.start_frame[stracksa[p]]
+        timeq = store.frame_id[stracksb[q]] - store.start_frame[stracksb[q]]
+        if timep > timeq:
+            dupb.add(q)
+        else:
+            dupa.add(p)
+    resa = [t for i, t in enumerate(stracksa) if i not in dupa]
+    resb = [t for i, t in enumerate(stracksb) if i not in dupb]
+    return resa, resb
@@ -180,10 +180,8 @@ class KalmanFilter(object):
             self._std_weight_velocity * mean[:, 3]]
         sqr = np.square(np.r_[std_pos, std_vel]).T
 
-        motion_cov = []
-        for i in range(len(mean)):
-            motion_cov.append(np.diag(sqr[i]))
-        motion_cov = np.asarray(motion_cov)
+        motion_cov = np.zeros((len(mean), 8, 8))
+        motion_cov[:, np.arange(8), np.arange(8)] = sqr
 
         mean = np.dot(mean, self._motion_mat.T)
         left = np.dot(self._motion_mat, covariance).transpose((1, 0, 2))
@@ -191,6 +189,87 @@ class KalmanFilter(object):
 
         return mean, covariance
 
+    def multi_initiate(self, measurements):
+        """Create tracks from unassociated measurements (Vectorized version).
+        Parameters
+        ----------
+        measurements : ndarray
+            The Nx4 dimensional matrix of bounding box coordinates (x, y, a, h).
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx8 mean matrix and Nx8x8 covariance matrices of the
+            new tracks, same as `initiate` for every row.
+        """
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 4)
+        mean = np.zeros((len(measurements), 8))
+        mean[:, :4] = measurements
+
+        h = measurements[:, 3]
+        std = np.stack([
+            2 * self._std_weight_position * h,
+            2 * self._std_weight_position * h,
+            1e-2 * np.ones_like(h),
+            2 * self._std_weight_position * h,
+            10 * self._std_weight_velocity * h,
+            10 * self._std_weight_velocity * h,
+            1e-5 * np.ones_like(h),
+            10 * self._std_weight_velocity * h], axis=1)
+        covariance = np.zeros((len(measurements), 8, 8))
+        covariance[:, np.arange(8), np.arange(8)] = np.square(std)
+        return mean, covariance
+
+    def multi_project(self, mean, covariance):
+        """Project state distributions to measurement space (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional mean matrix.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices.
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the Nx4 projected means and Nx4x4 projected covariances.
+        """
+        std = np.stack([
+            self._std_weight_position * mean[:, 3],
+            self._std_weight_position * mean[:, 3],
+            1e-1 * np.ones_like(mean[:, 3]),
+            self._std_weight_position * mean[:, 3]], axis=1)
+        innovation_cov = np.zeros((len(mean), 4, 4))
+        innovation_cov[:, np.arange(4), np.arange(4)] = np.square(std)
+
+        mean = np.dot(mean, self._update_mat.T)
+        covariance = np.matmul(np.matmul(self._update_mat, covariance), self._update_mat.T)
+        return mean, covariance + innovation_cov
+
+    def multi_update(self, mean, covariance, measurements):
+        """Run Kalman filter correction step (Vectorized version).
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional predicted means.
+        covariance : ndarray
+            The Nx8x8 dimensional covariance matrices.
+        measurements : ndarray
+            The Nx4 dimensional measurements (x, y, a, h), one per track.
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the measurement-corrected state distributions.
+        """
+        projected_mean, projected_cov = self.multi_project(mean, covariance)
+
+        # K = P H^T S^-1, solved for all tracks at once (S is symmetric)
+        cross_cov = np.matmul(covariance, self._update_mat.T)  # N x 8 x 4
+        kalman_gain = np.linalg.solve(projected_cov, cross_cov.transpose((0, 2, 1))).transpose((0, 2, 1))
+        innovation = measurements - projected_mean
+
+        new_mean = mean + np.einsum('nij,nj->ni', kalman_gain, innovation)
+        new_covariance = covariance - np.matmul(np.matmul(kalman_gain, projected_cov), kalman_gain.transpose((0, 2, 1)))
+        return new_mean, new_covariance
+
     def update(self, mean, covariance, measurement):
         """Run Kalman filter correction step.
 
@@ -1,7 +1,9 @@
+from typing import Optional
+
 from autologging import logged
 from pydantic import BaseModel, Field
 
-__all__ = ["TrackingRequest"]
+__all__ = ["TrackingRequest", "TrackingSessionRequest"]
 
 
 @logged
@@ -12,15 +14,47 @@ class TrackingRequest(BaseModel):
         Attributes
             - det_result_path (str): 객체탐지와 이상탐지의 결과가 병합된 bbox 정보가 담긴 파일 경로
             - result_path (str): 객체추적 결과가 저장될 파일 경로
+            - frame_path (str): 이미지 크기를 읽을 프레임 파일 또는 프레임 디렉터리 경로
     """
 
     det_result_path: str = Field(..., description="detection result")
     result_path: str = Field(..., description="tracking result")
+    frame_path: Optional[str] = Field(None, description="frame file or directory to read the image size from")
 
     class Config:
         schema_extra = {
             "example": {
                 "det_result_path": "/home/dva4/DVA_LAB/backend/test/model/merged/result.txt",
                 "result_path": "/home/dva4/DVA_LAB/backend/test/model/tracking/result.txt",
+                "frame_path": "/home/dva4/DVA_LAB/backend/test/frame_origin",
+            }
+        }
+
+
+@logged
+class TrackingSessionRequest(BaseModel):
+    """
+        프레임 단위 객체추적 세션을 여는 데 필요한 정보를 담은 클래스입니다.
+
+        Attributes
+            - result_path (str): 객체추적 결과가 저장될 파일 경로
+            - frame_path (str): 이미지 크기를 읽을 프레임 파일 또는 프레임 디렉터리 경로
+            - img_w (int): 이미지의 가로 크기 (frame_path보다 우선)
+            - img_h (int): 이미지의 세로 크기 (frame_path보다 우선)
+            - bev_points_path (str): BEV 시각화용 점 정보가 저장될 파일 경로
+    """
+
+    result_path: Optional[str] = Field(None, description="tracking result")
+    frame_path: Optional[str] = Field(None, description="frame file or directory to read the image size from")
+    img_w: Optional[int] = Field(None, description="image width")
+    img_h: Optional[int] = Field(None, description="image height")
+    bev_points_path: Optional[str] = Field(None, description="bev points csv")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "result_path": "/home/dva4/DVA_LAB/backend/test/model/tracking/result.txt",
+                "frame_path": "/home/dva4/DVA_LAB/backend/test/frame_origin",
+                "bev_points_path": "/home/dva4/DVA_LAB/backend/test/bev_points.csv",
             }
         }
@@ -7,29 +7,48 @@ absolute_target_directory = os.path.abspath(target_directory)
 if absolute_target_directory not in sys.path:
     sys.path.append(absolute_target_directory)
 
+import threading
+
 import cv2
 import numpy as np
-import torch
-from itertools import groupby
 
 from anomalib.config import get_configurable_parameters
-from anomalib.data.inference import InferenceDataset
-from anomalib.data.utils import InputNormalizationMethod, get_transforms
-from anomalib.models import get_model
+from anomalib.data.utils import get_image_filenames, read_image
+from anomalib.deploy import EfficientAdInferencer
 
-from anomalib.utils import slicing, merge_tensors_max 
-from anomalib.utils.callbacks import get_callbacks
+from anomalib.post_processing import anomaly_map_to_boxes
+from anomalib.utils import get_tile_grid
 from autologging import logged
 from fastapi import APIRouter, Depends, status
 from interface.request import SegRequest
-from PIL import Image
-from pytorch_lightning import Trainer
-from torch.utils.data import DataLoader
-from skimage.segmentation import mark_boundaries
-from skimage import morphology
 
 router = APIRouter(tags=["anomaly"])
 
+# 모델은 첫 요청 시 한 번만 로드하여 프로세스가 끝날 때까지 유지
+TILE_BATCH_SIZE = 16    # 한 번의 forward에 넣을 최대 패치 수
+FRAME_BATCH_SIZE = 4    # 패치를 함께 묶어 처리할 프레임 수
+OPEN_KERNEL_SIZE = 4    # 원본 해상도 기준 마스크 opening disk 반지름
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+_inferencer = None
+_inferencer_lock = threading.Lock()
+
+
+def get_inferencer():
+    """
+        메모리에 상주하는 EfficientAd inferencer를 반환합니다. 처음 호출될 때 체크포인트를 로드합니다.
+
+        Return
+            - inferencer (anomalib.deploy.EfficientAdInferencer)
+    """
+
+    global _inferencer
+    with _inferencer_lock:
+        if _inferencer is None:
+            config = get_configurable_parameters("efficient_ad")
+            ckpt = os.path.join(add_path, 'services', 'weights', 'model.ckpt')
+            _inferencer = EfficientAdInferencer(ckpt, config=config, device="auto", batch_size=TILE_BATCH_SIZE)
+    return _inferencer
+
 
 @router.post(
     "/anomaly/inference",
@@ -49,13 +68,17 @@ async def anomaly_inference(request_body: SegRequest):
             - result_path (str): 이상탐지 결과가 저장된 파일 경로
     """
 
-    result_path = ad_slice_inference(request_body.frame_path, request_body.slices_path, request_body.output_path, request_body.patch_size, request_body.overlap_ratio) 
+    result_path = ad_slice_inference(request_body.frame_path, request_body.slices_path, request_body.output_path, request_body.patch_size, request_body.overlap_ratio)
     return result_path
 
 def ad_slice_inference(frame_path, slices_path, output_path, patch_size, overlap_ratio):
     """
         이상탐지 모델에 인퍼런스를 수행한 결과를 반환합니다.
 
+        슬라이스 폴더와 이름이 같은 원본 프레임이 frame_path에 있으면 프레임을 메모리에서 바로 패치로 나누고,
+        없으면 슬라이스 폴더의 패치 파일을 읽습니다. FRAME_BATCH_SIZE개 프레임의 패치를 묶어 배치로 모델에 넣습니다.
+        anomaly map은 모델 출력 해상도로 병합하여 후처리하고, bbox 좌표만 원본 해상도로 변환합니다.
+
         Args
             - frame_path (str): 이상탐지를 수행할 프레임 파일경로
             - slices_path (str): 이상탐지를 수행할 프레임 파일이 슬라이싱된 디렉터리 경로
@@ -64,107 +87,43 @@ def ad_slice_inference(frame_path, slices_path, output_path, patch_size, overlap
         Return
             - result_path (str): 이상탐지 결과가 저장된 파일 경로
     """
-    
-    config = get_configurable_parameters("efficient_ad")
-    config.trainer.resume_from_checkpoint = os.path.join(add_path, 'services', 'weights', 'model.ckpt')
-
-    efficient_ad = get_model(config)
-    callbacks = get_callbacks(config)
-    trainer = Trainer(callbacks=callbacks, **config.trainer)
-
-    transform_config = (
-        config.dataset.transform_config.eval
-        if "transform_config" in config.dataset.keys()
-        else None
-    )
-    
-    image_size = (config.dataset.image_size[0], config.dataset.image_size[1])
-    center_crop = config.dataset.get("center_crop")
-    if center_crop is not None:
-        center_crop = tuple(center_crop)
-    normalization = InputNormalizationMethod(config.dataset.normalization)
-    transform = get_transforms(
-        config=transform_config,
-        image_size=image_size,
-        center_crop=center_crop,
-        normalization=normalization,
-    )
+
+    inferencer = get_inferencer()
+
+    # 프레임 파일명(확장자 제외) -> 프레임 파일 경로
+    frames = {os.path.splitext(file)[0]: os.path.join(frame_path, file) for file in sorted(os.listdir(frame_path))
+              if file.lower().endswith(IMAGE_EXTENSIONS)}
 
     # original frame path에서 1개 파일 임의로 가져오도록 수정; image size(h, w) 추출
-    frame = os.listdir(frame_path)
-    first_file = os.path.join(frame_path, frame[0])
-    frame_img = cv2.imread(first_file)
+    frame_img = cv2.imread(next(iter(frames.values())))
     h, w = frame_img.shape[:2]
 
     # Replace local variable(request body input value)
-    patch_size = patch_size
-    overlap = overlap_ratio
-    step = 1 - overlap
-    resize_rate = 1
+    step = 1 - overlap_ratio
+    scale = inferencer.output_scale(patch_size)
+    kernel_size = max(1, round(OPEN_KERNEL_SIZE * scale))
 
     # SHAI folder : sahi_path > frame > slices('filename_0000n_*.png'라고 가정)
     sahi_path = slices_path
-        
+    frame_folders = sorted(os.listdir(sahi_path))
+
     output_list = []
-    for frame_number, frame_folder in enumerate(sorted(os.listdir(sahi_path))):
-        frame_path = os.path.join(sahi_path, frame_folder)
-
-        inf = []
-        output_bbox = []
-        dataset = InferenceDataset(
-            frame_path, 
-            image_size=tuple(config.dataset.image_size), 
-            transform=transform  # type: ignore
-            )
-        dataloader = DataLoader(dataset)
-        result = trainer.predict(model=efficient_ad, dataloaders=[dataloader])
-
-        for i in range(len(result)):
-            inf.append(result[i]["anomaly_maps"][0])
-
-        ''' merge slices ''' 
-        merge_result = merge_tensors_max(inf, h, w, resize_rate, patch_size, step)    # -> torch.Tensor
-        
-        ''' anomaly map -> mask '''
-        anomaly_map = merge_result.squeeze()
-        mask: np.ndarray = np.zeros_like(anomaly_map).astype(np.uint8)
-        mask[anomaly_map > 0.5] = 1
-        kernel = morphology.disk(4)
-        mask = morphology.opening(mask, kernel)
-        mask *= 255
-
-        ''' score map '''
-        score_map = anomaly_map.clone()
-        score_map[anomaly_map <= 0.5] = 0
-        score_map = score_map.numpy()
-        
-        ''' output '''
-        output_mask = cv2.resize(mask, (w, h))
-        output_score_mask = cv2.resize(score_map, (w, h))
-        mask_contours, _ = cv2.findContours(output_mask.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contour in mask_contours:
-            x1, y1, w1, h1 = cv2.boundingRect(contour)
-            class_id = 1
-            
-            ''' anomaly score '''
-            anomaly_region = output_score_mask[y1:y1+h1, x1:x1+w1]
-            anomaly_score = np.mean(anomaly_region[anomaly_region != 0])
-            
-            output_bbox.append((frame_number, class_id, x1, y1, w1, h1, anomaly_score))
-        output_list.append(output_bbox) 
-
-        ''' visualization  '''   # 정상구동 확인용
-        background_image = np.zeros_like(output_mask)
-        background_image[output_mask == 255] = 128
-        for bbox in output_bbox:
-            _, _, x2, y2, w2, h2, _ = bbox
-            cv2.rectangle(background_image, (x2, y2), (x2 + w2, y2 + h2), (255, 255, 255), 2)  
-        #cv2.imwrite(f"results/output_bbox_{frame_number}.jpg", background_image)
-
-        v = mark_boundaries(frame_img, mask, color=(1, 0, 0), mode="thick")
-        output_img = (v * 255).astype(np.uint8)    # -> numpy.ndarray
-        #cv2.imwrite(f"results/output_img_{frame_number}.jpg", output_img)
-        
+    for chunk_start in range(0, len(frame_folders), FRAME_BATCH_SIZE):
+        chunk = frame_folders[chunk_start:chunk_start + FRAME_BATCH_SIZE]
+
+        ''' in-memory tiling -> batched inference -> merge slices '''
+        in_memory = [folder for folder in chunk if folder in frames]
+        images = [read_image(frames[folder]) for folder in in_memory]
+        merged = dict(zip(in_memory, inferencer.predict_frames(images, patch_size, overlap_ratio, scale=scale)))
+
+        for folder in chunk:
+            if folder not in merged:
+                grid = get_tile_grid(h, w, patch_size, step).scaled(scale)
+                tiles = [read_image(path) for path in sorted(get_image_filenames(os.path.join(sahi_path, folder)))]
+                merged[folder] = grid.merge(inferencer.predict_tiles(tiles, size=(grid.tile_height, grid.tile_width)))
+
+        for frame_number, frame_folder in enumerate(chunk, start=chunk_start):
+            output_list.append(anomaly_map_to_bbox(merged[frame_folder], frame_number, (h, w), kernel_size))
 
     ''' save output '''
     save_path = os.path.join(output_path, 'anomaly.csv')
@@ -179,3 +138,24 @@ def ad_slice_inference(frame_path, slices_path, output_path, patch_size, overlap
     return save_path
 
 
+def anomaly_map_to_bbox(merge_result, frame_number, image_size, kernel_size=OPEN_KERNEL_SIZE):
+    """
+        병합된 anomaly map을 마스크로 변환한 뒤 영역별 bbox와 anomaly score를 구합니다.
+
+        마스크의 연결 요소는 anomaly map 해상도에서 구하며, anomaly score는 영역에 속한 픽셀의 평균 값입니다.
+
+        Args
+            - merge_result (torch.Tensor): 1 x 1 x h x w 크기의 정규화된 anomaly map
+            - frame_number (int): 프레임 번호
+            - image_size (tuple): bbox 좌표를 변환할 원본 프레임 크기 (H, W)
+            - kernel_size (int): anomaly map 해상도 기준 마스크 opening disk 반지름
+
+        Return
+            - output_bbox (list): N x (frame_number, class_id, x1, y1, w1, h1, anomaly_score)
+    """
+
+    class_id = 1
+    boxes, scores = anomaly_map_to_boxes(merge_result.numpy(), threshold=0.5, kernel_size=kernel_size,
+                                         image_size=image_size)
+    return [(frame_number, class_id, x1, y1, w1, h1, score)
+            for (x1, y1, w1, h1), score in zip(boxes.tolist(), scores.tolist())]
@@ -4,9 +4,10 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .export import ExportMode, export, get_metadata, get_model_metadata
-from .inferencers import Inferencer, OpenVINOInferencer, TorchInferencer
+from .inferencers import EfficientAdInferencer, Inferencer, OpenVINOInferencer, TorchInferencer
 
 __all__ = [
+    "EfficientAdInferencer",
     "ExportMode",
     "Inferencer",
     "OpenVINOInferencer",
@@ -4,7 +4,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .base_inferencer import Inferencer
+from .efficient_ad_inferencer import EfficientAdInferencer
 from .openvino_inferencer import OpenVINOInferencer
 from .torch_inferencer import TorchInferencer
 
-__all__ = ["Inferencer", "OpenVINOInferencer", "TorchInferencer"]
+__all__ = ["EfficientAdInferencer", "Inferencer", "OpenVINOInferencer", "TorchInferencer"]
@@ -0,0 +1,199 @@
+"""Resident EfficientAd inferencer that predicts whole frames from in-memory tiles."""
+
+# Copyright (C) 2022 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from omegaconf import DictConfig, ListConfig
+from torch import Tensor, nn
+
+from anomalib.data import TaskType
+from anomalib.data.utils import InputNormalizationMethod, get_transforms
+from anomalib.post_processing.normalization.min_max import normalize as normalize_min_max
+from anomalib.utils import get_tile_grid
+
+from ..export import get_model_metadata
+from .torch_inferencer import TorchInferencer
+
+
+class EfficientAdInferencer(TorchInferencer):
+    """EfficientAd inferencer which keeps the model in memory and runs the tiles of whole frames in batches.
+
+    Frames are cut into ``patch_size`` tiles in memory, the tiles of one or more frames are stacked and passed
+    through ``EfficientAdModel`` in batches of ``batch_size`` without the Lightning trainer, and the normalized
+    tile maps are merged back to frame size by taking the maximum over the overlapping regions.
+
+    Args:
+        path (str | Path): Path to an exported ``.pt`` model or to a Lightning ``.ckpt`` checkpoint.
+        config (DictConfig | ListConfig | None): Model config. Required when ``path`` is a Lightning checkpoint.
+            Defaults to None.
+        device (str): Device to use for inference. Options are auto, cpu, cuda. Defaults to "auto".
+        batch_size (int): Maximum number of tiles per forward pass. Defaults to 16.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        config: DictConfig | ListConfig | None = None,
+        device: str = "auto",
+        batch_size: int = 16,
+    ) -> None:
+        self.config = config
+        self.batch_size = batch_size
+
+        if Path(path).suffix == ".ckpt":
+            if config is None:
+                raise ValueError("config is required to load a Lightning checkpoint.")
+            self.device = self._get_device(device)
+            self.model, self.metadata = self._load_checkpoint(path)
+            self.transform = self._get_transform(config)
+        else:
+            super().__init__(path, device)
+
+    def _load_checkpoint(self, path: str | Path) -> tuple[nn.Module, dict]:
+        """Rebuild the Lightning module from the config and load the checkpoint weights once.
+
+        Args:
+            path (str | Path): Path to the Lightning checkpoint.
+
+        Returns:
+            tuple[nn.Module, dict]: Torch model in eval mode and its thresholds and normalization statistics.
+        """
+        from anomalib.models import get_model  # pylint: disable=import-outside-toplevel
+
+        module = get_model(self.config)
+        checkpoint = torch.load(path, map_location="cpu")
+        module.load_state_dict(checkpoint["state_dict"], strict=False)
+
+        metadata = {key: float(value) for key, value in get_model_metadata(module).items()}
+        metadata["task"] = TaskType(self.config.dataset.task)
+
+        model = module.model
+        model.eval()
+        return model.to(self.device), metadata
+
+    @staticmethod
+    def _get_transform(config: DictConfig | ListConfig):
+        """Build the eval transform the same way as the training data module."""
+        transform_config = config.dataset.transform_config.eval if "transform_config" in config.dataset.keys() else None
+        center_crop = config.dataset.get("center_crop")
+        return get_transforms(
+            config=transform_config,
+            image_size=tuple(config.dataset.image_size),
+            center_crop=tuple(center_crop) if center_crop is not None else None,
+            normalization=InputNormalizationMethod(config.dataset.normalization),
+        )
+
+    def pre_process(self, image: np.ndarray | Sequence[np.ndarray]) -> Tensor:
+        """Transform one RGB image or a list of RGB tiles into a batch tensor.
+
+        Args:
+            image (np.ndarray | Sequence[np.ndarray]): Input image or tiles.
+
+        Returns:
+            Tensor: pre-processed batch.
+        """
+        if isinstance(image, np.ndarray):
+            return super().pre_process(image)
+        return torch.stack([self.transform(image=tile)["image"] for tile in image]).to(self.device)
+
+    def forward(self, image: Tensor) -> Tensor:
+        """Forward-Pass a batch to the model and return the combined anomaly maps.
+
+        Args:
+            image (Tensor): Input batch.
+
+        Returns:
+            Tensor: Raw anomaly maps of shape (N, 1, H, W).
+        """
+        with torch.no_grad():
+            output = self.model(image)
+        return output["anomaly_map_combined"] if isinstance(output, dict) else output
+
+    def output_scale(self, patch_size: int) -> float:
+        """Ratio of the model input size to ``patch_size``, i.e. the resolution of a tile map before resizing.
+
+        Args:
+            patch_size (int): Tile size.
+
+        Returns:
+            float: Scale in (0, 1]. 1 when the model input size is unknown.
+        """
+        if self.config is None:
+            return 1.0
+        return min(1.0, min(self.config.dataset.image_size) / patch_size)
+
+    def predict_tiles(self, tiles: Sequence[np.ndarray], size: tuple[int, int] | None = None) -> Tensor:
+        """Predict normalized anomaly maps of RGB tiles in batches of ``batch_size``.
+
+        Args:
+            tiles (Sequence[np.ndarray]): RGB tiles of the same size.
+            size (tuple[int, int] | None): Height and width of the returned maps. Defaults to the tile size.
+
+        Returns:
+            Tensor: Normalized anomaly maps of shape (N, 1, height, width) on the cpu.
+        """
+        anomaly_maps = []
+        for start in range(0, len(tiles), self.batch_size):
+            batch = tiles[start : start + self.batch_size]
+            maps = self.forward(self.pre_process(batch))
+
+            if "min" in self.metadata and "max" in self.metadata:
+                maps = normalize_min_max(
+                    maps, self.metadata["pixel_threshold"], self.metadata["min"], self.metadata["max"]
+                )
+            map_size = tuple(size) if size is not None else batch[0].shape[:2]
+            if maps.shape[-2:] != map_size:
+                maps = F.interpolate(maps, size=map_size, mode="bilinear")
+            anomaly_maps.append(maps.cpu())
+
+        if not anomaly_maps:
+            return torch.empty(0, 1, 0, 0)
+        return torch.cat(anomaly_maps)
+
+    def predict_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        patch_size: int = 1024,
+        overlap_ratio: float = 0.2,
+        scale: float = 1.0,
+    ) -> list[Tensor]:
+        """Predict anomaly maps of RGB frames.
+
+        The tiles of all frames are pooled so that a batch may span several frames. Frames of the same size share
+        one ``TileGrid`` and are merged together in a single pass. With ``scale`` below 1 the tile maps are merged
+        on a grid scaled by ``scale``, e.g. ``output_scale(patch_size)`` keeps them at the model output resolution
+        instead of upsampling every tile to ``patch_size``. See ``TileGrid.scaled``.
+
+        Args:
+            frames (Sequence[np.ndarray]): RGB frames.
+            patch_size (int): Tile size. Defaults to 1024.
+            overlap_ratio (float): Overlap between neighbouring tiles. Defaults to 0.2.
+            scale (float): Resolution of the merged maps relative to the frames. Defaults to 1.0.
+
+        Returns:
+            list[Tensor]: Normalized anomaly map of shape (1, 1, H * scale, W * scale) for each frame.
+        """
+        tile_grids = [get_tile_grid(*frame.shape[:2], patch_size, 1 - overlap_ratio) for frame in frames]
+        grids = [grid.scaled(scale) for grid in tile_grids]
+        size = (grids[0].tile_height, grids[0].tile_width) if grids else None
+        anomaly_maps = self.predict_tiles(
+            [tile for frame, grid in zip(frames, tile_grids) for tile in grid.tiles(frame)], size=size
+        )
+
+        if all(grid is grids[0] for grid in grids):
+            return list(grids[0].merge(anomaly_maps).split(1)) if grids else []
+
+        merged = []
+        start = 0
+        for grid in grids:
+            merged.append(grid.merge(anomaly_maps[start : start + len(grid)]))
+            start += len(grid)
+        return merged
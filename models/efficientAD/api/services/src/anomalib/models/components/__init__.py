@@ -12,7 +12,7 @@ from .feature_extractors import (
 )
 from .filters import GaussianBlur2d
 from .sampling import KCenterGreedy
-from .stats import GaussianKDE, MultiVariateGaussian
+from .stats import GaussianKDE, HistogramQuantile, MultiVariateGaussian, RunningChannelMeanStd
 
 __all__ = [
     "AnomalyModule",
@@ -20,9 +20,11 @@ __all__ = [
     "FeatureExtractor",
     "GaussianKDE",
     "GaussianBlur2d",
+    "HistogramQuantile",
     "KCenterGreedy",
     "MultiVariateGaussian",
     "PCA",
+    "RunningChannelMeanStd",
     "SparseRandomProjection",
     "TimmFeatureExtractor",
     "TorchFXFeatureExtractor",
@@ -5,5 +5,6 @@
 
 from .kde import GaussianKDE
 from .multi_variate_gaussian import MultiVariateGaussian
+from .streaming import HistogramQuantile, RunningChannelMeanStd
 
-__all__ = ["GaussianKDE", "MultiVariateGaussian"]
+__all__ = ["GaussianKDE", "HistogramQuantile", "MultiVariateGaussian", "RunningChannelMeanStd"]
@@ -0,0 +1,216 @@
+"""Streaming statistics accumulated batch by batch in constant memory."""
+
+# Copyright (C) 2022 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+import torch
+from torch import Tensor, nn
+
+from anomalib.models.components.base import DynamicBufferModule
+
+
+class RunningChannelMeanStd(DynamicBufferModule):
+    """Per-channel mean and standard deviation of a stream of feature maps.
+
+    Each batch is reduced to its channel-wise count, mean and sum of squared deviations, which are merged into the
+    running statistics with Chan's parallel update. Only three buffers of size ``C`` are kept, regardless of how many
+    batches are seen, and two accumulators can be combined with :meth:`merge` (e.g. across processes).
+
+    Args:
+        channel_dim (int, optional): Dimension of the channels in the updated tensors. Defaults to 1.
+    """
+
+    def __init__(self, channel_dim: int = 1) -> None:
+        super().__init__()
+        self.channel_dim = channel_dim
+
+        self.register_buffer("count", torch.zeros((), dtype=torch.float64))
+        self.register_buffer("mean", Tensor())
+        self.register_buffer("m2", Tensor())
+
+        self.count: Tensor
+        self.mean: Tensor
+        self.m2: Tensor
+
+    def _merge(self, count: Tensor | float, mean: Tensor, m2: Tensor) -> None:
+        if self.mean.numel() == 0:
+            self.count = torch.as_tensor(count, dtype=torch.float64, device=mean.device)
+            self.mean = mean.clone()
+            self.m2 = m2.clone()
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * count / total)
+        self.count = total
+
+    @torch.no_grad()
+    def update(self, features: Tensor) -> None:
+        """Add a batch of features to the running statistics.
+
+        Args:
+            features (Tensor): Features whose channels lie along ``channel_dim``, e.g. ``[N, C, H, W]``.
+        """
+        num_channels = features.shape[self.channel_dim]
+        if features.numel() == 0:
+            return
+        dims = [dim for dim in range(features.dim()) if dim != self.channel_dim % features.dim()]
+        count = features.numel() // num_channels
+
+        var, mean = torch.var_mean(features, dim=dims, unbiased=False)
+        self._merge(count, mean.double(), var.double() * count)
+
+    def merge(self, other: RunningChannelMeanStd) -> RunningChannelMeanStd:
+        """Merge the statistics of another accumulator into this one.
+
+        Args:
+            other (RunningChannelMeanStd): Accumulator fitted on a disjoint part of the stream.
+
+        Returns:
+            RunningChannelMeanStd: This accumulator.
+        """
+        if other.mean.numel() > 0:
+            device = self.mean.device if self.mean.numel() > 0 else other.mean.device
+            self._merge(other.count.to(device), other.mean.to(device), other.m2.to(device))
+        return self
+
+    def compute(self) -> tuple[Tensor, Tensor]:
+        """Return the channel-wise mean and population standard deviation.
+
+        Returns:
+            tuple[Tensor, Tensor]: Mean and std, each of shape ``[C]`` and dtype float32.
+        """
+        if self.mean.numel() == 0:
+            raise ValueError("No samples were added to the running statistics.")
+        return self.mean.float(), torch.sqrt(self.m2 / self.count).float()
+
+
+class HistogramQuantile(nn.Module):
+    """Approximate quantiles of a stream of values with a fixed-bin histogram kept on device.
+
+    The histogram spans ``[low, low + width)`` with ``num_bins`` equal bins. The range is taken from the first update
+    and doubled (merging neighbouring bins) whenever a later value falls outside of it, so memory stays at
+    ``num_bins`` counters however many values are added. Quantiles are interpolated linearly inside a bin, so their
+    error is at most one bin width, ``width / num_bins``.
+
+    Args:
+        num_bins (int, optional): Number of bins; must be even. Defaults to 65536.
+    """
+
+    def __init__(self, num_bins: int = 65536) -> None:
+        super().__init__()
+        if num_bins < 2 or num_bins % 2:
+            raise ValueError(f"num_bins must be an even number larger than 1, got {num_bins}.")
+        self.num_bins = num_bins
+
+        self.register_buffer("counts", torch.zeros(num_bins, dtype=torch.int64))
+        self.register_buffer("low", torch.zeros((), dtype=torch.float64))
+        self.register_buffer("width", torch.zeros((), dtype=torch.float64))
+
+        self.counts: Tensor
+        self.low: Tensor
+        self.width: Tensor
+
+    @property
+    def total(self) -> int:
+        """Number of values added to the histogram."""
+        return int(self.counts.sum())
+
+    def _extend(self, min_value: float, max_value: float) -> None:
+        """Double the histogram range until it covers ``[min_value, max_value]``."""
+        low, width = float(self.low), float(self.width)
+        while min_value < low or max_value > low + width:
+            merged = self.counts.view(-1, 2).sum(dim=1)
+            self.counts.zero_()
+            if min_value < low:
+                self.counts[self.num_bins // 2 :] = merged
+                low -= width
+            else:
+                self.counts[: self.num_bins // 2] = merged
+            width *= 2
+        self.low.fill_(low)
+        self.width.fill_(width)
+
+    def _add(self, values: Tensor, weights: Tensor | None = None) -> None:
+        values = values.double()
+        index = ((values - self.low) * (self.num_bins / self.width)).long().clamp_(0, self.num_bins - 1)
+        self.counts += torch.bincount(index, weights=weights, minlength=self.num_bins).to(self.counts.dtype)
+
+    @torch.no_grad()
+    def update(self, values: Tensor) -> None:
+        """Add all elements of ``values`` to the histogram.
+
+        Args:
+            values (Tensor): Values of any shape. NaNs are ignored.
+        """
+        values = values.detach().flatten()
+        values = values[~torch.isnan(values)]
+        if values.numel() == 0:
+            return
+        values = values.to(self.counts.device)
+
+        min_value, max_value = torch.aminmax(values)
+        min_value, max_value = float(min_value), float(max_value)
+        if float(self.width) == 0:
+            width = max_value - min_value
+            self.low.fill_(min_value)
+            self.width.fill_(width if width > 0 else max(abs(min_value) * 1e-6, 1e-12))
+        else:
+            self._extend(min_value, max_value)
+        self._add(values)
+
+    @torch.no_grad()
+    def merge(self, other: HistogramQuantile) -> HistogramQuantile:
+        """Merge another histogram into this one.
+
+        The counts of ``other`` are re-binned at their bin centers, so the merged quantiles may move by up to one bin
+        width of ``other``.
+
+        Args:
+            other (HistogramQuantile): Histogram of a disjoint part of the stream.
+
+        Returns:
+            HistogramQuantile: This histogram.
+        """
+        if float(other.width) == 0:
+            return self
+        other_low, other_width = float(other.low), float(other.width)
+        if float(self.width) == 0:
+            self.low.fill_(other_low)
+            self.width.fill_(other_width)
+        else:
+            self._extend(other_low, other_low + other_width)
+
+        counts = other.counts.to(self.counts.device)
+        filled = counts.nonzero().squeeze(1)
+        centers = other_low + (filled.double() + 0.5) * (other_width / other.num_bins)
+        self._add(centers, weights=counts[filled].double())
+        return self
+
+    def quantile(self, q: float) -> Tensor:
+        """Approximate the ``q``-quantile of the added values.
+
+        Uses the same position as ``torch.quantile`` with linear interpolation, ``q * (total - 1)``.
+
+        Args:
+            q (float): Quantile in ``[0, 1]``.
+
+        Returns:
+            Tensor: Scalar quantile (float32) on the device of the histogram.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q must be in [0, 1], got {q}.")
+        total = self.total
+        if total == 0:
+            raise ValueError("No values were added to the histogram.")
+
+        cdf = torch.cumsum(self.counts, dim=0)
+        target = torch.tensor(q * (total - 1), dtype=torch.float64, device=cdf.device)
+        index = torch.searchsorted(cdf.double(), target, right=True).clamp_(max=self.num_bins - 1)
+        below = cdf[index] - self.counts[index]
+        fraction = ((target - below + 0.5) / self.counts[index].clamp(min=1)).clamp_(0, 1)
+        bin_width = self.width / self.num_bins
+        return (self.low + (index + fraction) * bin_width).float()
@@ -22,9 +22,9 @@ from torch.utils.data import DataLoader
 from torchvision.datasets import ImageFolder
 
 from anomalib.data.utils import DownloadInfo, download_and_extract
-from anomalib.models.components import AnomalyModule
+from anomalib.models.components import AnomalyModule, HistogramQuantile, RunningChannelMeanStd
 
-from .torch_model import EfficientAdModel, EfficientAdModelSize, reduce_tensor_elems
+from .torch_model import EfficientAdModel, EfficientAdModelSize
 
 logger = logging.getLogger(__name__)
 
@@ -126,36 +126,31 @@ class EfficientAd(AnomalyModule):
     def teacher_channel_mean_std(self, dataloader: DataLoader) -> dict[str, Tensor]:
         """Calculate the mean and std of the teacher models activations.
 
+        The statistics are accumulated batch by batch, so the teacher outputs are not kept in memory.
+
         Args:
             dataloader (DataLoader): Dataloader of the respective dataset.
 
         Returns:
             dict[str, Tensor]: Dictionary of channel-wise mean and std
         """
-        y_means = []
-        teacher_outputs = []
-        means_distance = []
+        stats = RunningChannelMeanStd().to(self.device)
 
         logger.info("Calculate teacher channel mean and std")
-        for batch in tqdm.tqdm(dataloader, desc="Calculate teacher channel mean", position=0, leave=True):
+        for batch in tqdm.tqdm(dataloader, desc="Calculate teacher channel mean and std", position=0, leave=True):
             y = self.model.teacher(batch["image"].to(self.device))
-            y_means.append(torch.mean(y, dim=[0, 2, 3]))
-            teacher_outputs.append(y)
-
-        channel_mean = torch.mean(torch.stack(y_means), dim=0)[None, :, None, None]
-
-        for y in tqdm.tqdm(teacher_outputs, desc="Calculate teacher channel std", position=0, leave=True):
-            distance = (y - channel_mean) ** 2
-            means_distance.append(torch.mean(distance, dim=[0, 2, 3]))
+            stats.update(y)
 
-        channel_var = torch.mean(torch.stack(means_distance), dim=0)[None, :, None, None]
-        channel_std = torch.sqrt(channel_var)
-        return {"mean": channel_mean, "std": channel_std}
+        channel_mean, channel_std = stats.compute()
+        return {"mean": channel_mean[None, :, None, None], "std": channel_std[None, :, None, None]}
 
     @torch.no_grad()
     def map_norm_quantiles(self, dataloader: DataLoader) -> dict[str, Tensor]:
         """Calculate 90% and 99.5% quantiles of the student(st) and autoencoder(ae).
 
+        The maps are added to histogram sketches on the device instead of being kept in memory, so the quantiles are
+        approximate within one histogram bin.
+
         Args:
             dataloader (DataLoader): Dataloader of the respective dataset.
 
@@ -163,39 +158,31 @@ class EfficientAd(AnomalyModule):
             dict[str, Tensor]: Dictionary of both the 90% and 99.5% quantiles
             of both the student and autoencoder feature maps.
         """
-        maps_st = []
-        maps_ae = []
+        sketch_st = HistogramQuantile().to(self.device)
+        sketch_ae = HistogramQuantile().to(self.device)
         logger.info("Calculate Validation Dataset Quantiles")
         for batch in tqdm.tqdm(dataloader, desc="Calculate Validation Dataset Quantiles", position=0, leave=True):
             for img, label in zip(batch["image"], batch["label"]):
                 if label == 0:  # only use good images of validation set!
                     output = self.model(img.to(self.device))
-                    map_st = output["map_st"]
-                    map_ae = output["map_ae"]
-                    maps_st.append(map_st)
-                    maps_ae.append(map_ae)
+                    sketch_st.update(output["map_st"])
+                    sketch_ae.update(output["map_ae"])
 
-        qa_st, qb_st = self._get_quantiles_of_maps(maps_st)
-        qa_ae, qb_ae = self._get_quantiles_of_maps(maps_ae)
+        qa_st, qb_st = self._get_quantiles_of_maps(sketch_st)
+        qa_ae, qb_ae = self._get_quantiles_of_maps(sketch_ae)
         return {"qa_st": qa_st, "qa_ae": qa_ae, "qb_st": qb_st, "qb_ae": qb_ae}
 
-    def _get_quantiles_of_maps(self, maps: list[Tensor]) -> tuple[Tensor, Tensor]:
-        """Calculate 90% and 99.5% quantiles of the given anomaly maps.
-
-        If the total number of elements in the given maps is larger than 16777216
-        the returned quantiles are computed on a random subset of the given
-        elements.
+    def _get_quantiles_of_maps(self, sketch: HistogramQuantile) -> tuple[Tensor, Tensor]:
+        """Calculate 90% and 99.5% quantiles of the anomaly maps added to the given sketch.
 
         Args:
-            maps (list[Tensor]): List of anomaly maps.
+            sketch (HistogramQuantile): Histogram sketch of the anomaly maps.
 
         Returns:
             tuple[Tensor, Tensor]: Two scalars - the 90% and the 99.5% quantile.
         """
-
-        maps_flat = reduce_tensor_elems(torch.cat(maps))
-        qa = torch.quantile(maps_flat, q=0.9).to(self.device)
-        qb = torch.quantile(maps_flat, q=0.995).to(self.device)
+        qa = sketch.quantile(0.9).to(self.device)
+        qb = sketch.quantile(0.995).to(self.device)
         return qa, qb
 
     def configure_optimizers(self) -> optim.Optimizer:
@@ -8,6 +8,7 @@ from .post_process import (
     ThresholdMethod,
     add_anomalous_label,
     add_normal_label,
+    anomaly_map_to_boxes,
     anomaly_map_to_color_map,
     compute_mask,
     superimpose_anomaly_map,
@@ -17,6 +18,7 @@ from .visualizer import ImageResult, VisualizationMode, Visualizer
 __all__ = [
     "add_anomalous_label",
     "add_normal_label",
+    "anomaly_map_to_boxes",
     "anomaly_map_to_color_map",
     "superimpose_anomaly_map",
     "compute_mask",
@@ -168,6 +168,58 @@ def compute_mask(anomaly_map: np.ndarray, threshold: float, kernel_size: int = 4
     return mask
 
 
+def anomaly_map_to_boxes(
+    anomaly_map: np.ndarray,
+    threshold: float = 0.5,
+    kernel_size: int = 4,
+    image_size: tuple[int, int] | None = None,
+    return_mask: bool = False,
+) -> tuple[np.ndarray, np.ndarray] | tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert an anomaly map into bounding boxes of its anomalous regions and their mean anomaly scores.
+
+    The map is thresholded, opened with a disk and labelled with ``cv2.connectedComponentsWithStats`` at its own
+    resolution, which is usually the resolution of the model output. The mean score of every component is computed
+    in a single ``np.bincount`` over the labels, and only the box coordinates are scaled to ``image_size``.
+
+    Args:
+        anomaly_map (np.ndarray): Anomaly map of shape (H, W), with any leading singleton dimensions.
+        threshold (float): Value to threshold anomaly scores into 0-1 range. Defaults to 0.5.
+        kernel_size (int): Radius of the disk used to open the mask. Defaults to 4.
+        image_size (tuple[int, int] | None): Height and width the boxes are scaled to. Defaults to the map size.
+        return_mask (bool): Also return the opened mask (0 or 255) at map resolution for visualization.
+            Defaults to False.
+
+    Returns:
+        Boxes of shape (N, 4) as integer (x, y, w, h), mean anomaly scores of shape (N,) and, if ``return_mask``,
+        the mask.
+    """
+    anomaly_map = np.asarray(anomaly_map, dtype=np.float32).squeeze()
+    height, width = anomaly_map.shape
+
+    mask = (anomaly_map > threshold).astype(np.uint8)
+    if kernel_size > 0:
+        kernel = morphology.disk(kernel_size).astype(np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    sums = np.bincount(labels.ravel(), weights=anomaly_map.ravel(), minlength=num_labels)[1:]
+    scores = sums / np.maximum(areas, 1)
+
+    boxes = stats[1:, : cv2.CC_STAT_AREA].astype(np.float64)
+    if image_size is not None and tuple(image_size) != (height, width):
+        scale_y, scale_x = image_size[0] / height, image_size[1] / width
+        x_1, y_1 = np.floor(boxes[:, 0] * scale_x), np.floor(boxes[:, 1] * scale_y)
+        x_2 = np.ceil((boxes[:, 0] + boxes[:, 2]) * scale_x)
+        y_2 = np.ceil((boxes[:, 1] + boxes[:, 3]) * scale_y)
+        boxes = np.stack([x_1, y_1, x_2 - x_1, y_2 - y_1], axis=1)
+    boxes = boxes.astype(np.int64)
+
+    if return_mask:
+        return boxes, scores, mask * 255
+    return boxes, scores
+
+
 def draw_boxes(image: np.ndarray, boxes: np.ndarray, color: tuple[int, int, int]) -> np.ndarray:
     """Draw bounding boxes on an image.
 
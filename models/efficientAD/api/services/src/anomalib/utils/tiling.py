@@ -0,0 +1,172 @@
+"""Fixed tile geometry to slice frames into overlapping patches and merge the patch maps back."""
+
+# Copyright (C) 2022 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+from __future__ import annotations
+
+import copy
+from functools import lru_cache
+from math import ceil
+from typing import Sequence
+
+import numpy as np
+import torch
+from torch import Tensor
+
+
+def _tile_starts(size: int, patch: int, step: int) -> np.ndarray:
+    """Start offsets along one axis. The last tile is aligned to the end of the axis."""
+    if size <= patch:
+        return np.zeros(1, dtype=np.int64)
+    num = ceil((size - patch) / step + 1)
+    starts = np.arange(num, dtype=np.int64) * step
+    starts[-1] = size - patch
+    return starts
+
+
+class TileGrid:
+    """Tile coordinates of a ``height`` x ``width`` frame, computed once and reused for every frame of that size.
+
+    Tiles are laid out row-major with a stride of ``int(patch * step_ratio)``. The last row and column are
+    aligned to the bottom and right border, which is the layout ``slicing`` and ``merge_tensors_max`` use.
+
+    Args:
+        height (int): Frame height.
+        width (int): Frame width.
+        patch (int): Tile size. Tiles are clipped to the frame when it is smaller than ``patch``.
+        step_ratio (float): Tile stride as a fraction of ``patch``, i.e. ``1 - overlap_ratio``.
+    """
+
+    def __init__(self, height: int, width: int, patch: int = 1024, step_ratio: float = 0.5) -> None:
+        self.height = height
+        self.width = width
+        self.patch = patch
+        self.step = int(patch * step_ratio)
+
+        self._set_layout(
+            min(patch, height),
+            min(patch, width),
+            _tile_starts(height, patch, self.step),
+            _tile_starts(width, patch, self.step),
+        )
+
+    def _set_layout(self, tile_height: int, tile_width: int, ys: np.ndarray, xs: np.ndarray) -> None:
+        self.tile_height = tile_height
+        self.tile_width = tile_width
+        self.ys = ys
+        self.xs = xs
+
+        # Destination row / column of every tile pixel, used to scatter the tiles back in two 1-D passes.
+        self._row_index = (self.ys[:, None] + np.arange(self.tile_height)).reshape(-1)
+        self._col_index = (self.xs[:, None] + np.arange(self.tile_width)).reshape(-1)
+        self._index_cache: dict[torch.device, tuple[Tensor, Tensor]] = {}
+        self._scaled: dict[float, TileGrid] = {}
+
+    def __len__(self) -> int:
+        return len(self.ys) * len(self.xs)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Number of tile rows and columns."""
+        return len(self.ys), len(self.xs)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """Tile boxes (x1, y1, x2, y2) in row-major order, shape (N, 4)."""
+        ys, xs = np.meshgrid(self.ys, self.xs, indexing="ij")
+        return np.stack(
+            [xs.ravel(), ys.ravel(), xs.ravel() + self.tile_width, ys.ravel() + self.tile_height], axis=1
+        )
+
+    def scaled(self, scale: float) -> TileGrid:
+        """Return the same tile layout on the frame resized by ``scale``, to merge tile maps at a lower resolution.
+
+        Sizes and tile offsets are rounded, so the scaled grid always has as many tiles as this one.
+
+        Args:
+            scale (float): Resolution of the scaled grid relative to this one.
+
+        Returns:
+            TileGrid: Scaled grid, cached per ``scale``.
+        """
+        if scale == 1:
+            return self
+        if scale not in self._scaled:
+            grid = copy.copy(self)
+            grid.height = max(1, round(self.height * scale))
+            grid.width = max(1, round(self.width * scale))
+            grid.patch = max(1, round(self.patch * scale))
+            grid.step = max(1, round(self.step * scale))
+            tile_height = min(max(1, round(self.tile_height * scale)), grid.height)
+            tile_width = min(max(1, round(self.tile_width * scale)), grid.width)
+            ys = np.minimum(np.rint(self.ys * scale).astype(np.int64), grid.height - tile_height)
+            xs = np.minimum(np.rint(self.xs * scale).astype(np.int64), grid.width - tile_width)
+            grid._set_layout(tile_height, tile_width, ys, xs)
+            self._scaled[scale] = grid
+        return self._scaled[scale]
+
+    def tiles(self, image: np.ndarray | Tensor) -> list[np.ndarray | Tensor]:
+        """Cut an image into tiles. The tiles are views of ``image``, nothing is copied.
+
+        Args:
+            image (np.ndarray | Tensor): ``(H, W, ...)`` array or ``(..., H, W)`` tensor.
+
+        Returns:
+            list[np.ndarray | Tensor]: Tiles in row-major order.
+        """
+        th, tw = self.tile_height, self.tile_width
+        if isinstance(image, Tensor):
+            return [image[..., y : y + th, x : x + tw] for y in self.ys for x in self.xs]
+        return [image[y : y + th, x : x + tw] for y in self.ys for x in self.xs]
+
+    def _indices(self, device: torch.device) -> tuple[Tensor, Tensor]:
+        if device not in self._index_cache:
+            self._index_cache[device] = (
+                torch.from_numpy(self._row_index).to(device),
+                torch.from_numpy(self._col_index).to(device),
+            )
+        return self._index_cache[device]
+
+    def merge(self, tiles: Tensor | Sequence[Tensor]) -> Tensor:
+        """Merge tile maps of one or more frames by taking the maximum over the overlapping regions.
+
+        The maximum is taken with two ``scatter_reduce`` passes, first along the columns of every tile row and
+        then along the rows, so no full-size tensor is allocated per tile.
+
+        Args:
+            tiles (Tensor | Sequence[Tensor]): ``(B * N, C, h, w)`` tensor, or a list of ``(C, h, w)`` tensors,
+                with the N tiles of each of the B frames in row-major order. Maps larger than the tile are cropped.
+
+        Returns:
+            Tensor: Merged maps of shape (B, C, H, W). Pixels start at 0 as in ``merge_tensors_max``.
+        """
+        if not isinstance(tiles, Tensor):
+            tiles = torch.stack(list(tiles))
+        tiles = tiles[..., : self.tile_height, : self.tile_width]
+        if tiles.dim() == 3:
+            tiles = tiles.unsqueeze(1)
+
+        rows, cols = self.shape
+        channels, th, tw = tiles.shape[1:]
+        batch = tiles.shape[0] // len(self)
+        row_index, col_index = self._indices(tiles.device)
+
+        # (B, rows, cols, C, th, tw) -> (B, rows, C, th, cols * tw) -> max into (B, rows, C, th, W)
+        src = tiles.reshape(batch, rows, cols, channels, th, tw).permute(0, 1, 3, 4, 2, 5)
+        src = src.reshape(batch, rows, channels, th, cols * tw)
+        bands = src.new_zeros(batch, rows, channels, th, self.width)
+        bands.scatter_reduce_(-1, col_index.expand_as(src), src, reduce="amax")
+
+        # (B, rows, C, th, W) -> (B, C, W, rows * th) -> max into (B, C, W, H)
+        src = bands.permute(0, 2, 4, 1, 3).reshape(batch, channels, self.width, rows * th)
+        merged = src.new_zeros(batch, channels, self.width, self.height)
+        merged.scatter_reduce_(-1, row_index.expand_as(src), src, reduce="amax")
+
+        return merged.transpose(-1, -2).contiguous()
+
+
+@lru_cache(maxsize=16)
+def get_tile_grid(height: int, width: int, patch: int = 1024, step_ratio: float = 0.5) -> TileGrid:
+    """Return the cached ``TileGrid`` of a frame size, so the geometry is planned once per video."""
+    return TileGrid(height, width, patch, step_ratio)
@@ -2,17 +2,52 @@ import csv
 import glob
 import json
 import os
+import re
 
 import cv2
 import numpy as np
 import requests
 from fastapi import APIRouter, Depends, status
 
-from api.services import Refiner
+from api.services import Refiner, ShipMeasurer
 from interface.request import DataRequest, ShipRequest
 
 router = APIRouter(tags=["data"])
 
+# SAM 모델과 이미지 임베딩 캐시, FastSAM 모델은 첫 요청 시 한 번만 만들어 유지
+_refiner = None
+_ship_measurer = None
+
+_FRAME_NAME_PATTERN = re.compile(r"_(\d+)\.jpg$", re.IGNORECASE)
+
+
+def get_refiner():
+    """
+        메모리에 상주하는 SAM Refiner를 반환합니다. 처음 호출될 때 모델을 로드합니다.
+
+        Return
+            - refiner (api.services.Refiner)
+    """
+
+    global _refiner
+    if _refiner is None:
+        _refiner = Refiner("cuda")
+    return _refiner
+
+
+def get_ship_measurer():
+    """
+        메모리에 상주하는 FastSAM 선박 측정기를 반환합니다. 처음 호출될 때 모델을 로드합니다.
+
+        Return
+            - ship_measurer (api.services.ShipMeasurer)
+    """
+
+    global _ship_measurer
+    if _ship_measurer is None:
+        _ship_measurer = ShipMeasurer("cuda")
+    return _ship_measurer
+
 
 @router.post(
     "/refinement",
@@ -34,7 +69,7 @@ async def inference(request_body: DataRequest):
             - updated_data (json): 세그먼트 마스크로 세밀화된 레이블이 포함된 JSON 데이터입니다.
     """
 
-    refiner = Refiner("cuda")
+    refiner = get_refiner()
 
     imgs_path = request_body.img_path
     json_path = request_body.json_file
@@ -62,13 +97,17 @@ async def inference(request_body: ShipRequest):
             - ships_info (list): N x [frame_no, point[0][0], point[0][1], point[1][0], point[1][0]]
     """
 
-    refiner = Refiner("cuda", fastsam=True)
-    # refiner = Refiner("cuda")
+    ship_measurer = get_ship_measurer()
 
     # TODO@jh: user가 여러대의 선박에 대한 입력을 저장할 경우 처리 필요
     user_frame_no, mean_x, mean_y = check_user_input(request_body.user_input)
 
-    frames = glob.glob(os.path.join(request_body.frame_path, "*.jpg"))
+    # 프레임 번호 -> 프레임 경로 (파일명 규칙: *_{frame_no}.jpg)
+    frames = {}
+    for x in glob.glob(os.path.join(request_body.frame_path, "*.jpg")):
+        frame_no = parse_frame_number(x)
+        if frame_no is not None:
+            frames[frame_no] = x
     tracking_result = request_body.tracking_result
     objs = read_file(
         tracking_result
@@ -83,23 +122,20 @@ async def inference(request_body: ShipRequest):
 
     ships_info = []
     if len(ship_id):
-        target_results = [x for x in objs if int(x[1]) == int(ship_id[0])]
-        for idx, result in enumerate(target_results):
-            try:
+        # TODO@jh: 이미지가 읽히지 않는 프레임이 있는 것 같음. 추후 확인 필요
+        target_results = [
+            x for x in objs if int(x[1]) == int(ship_id[0]) and int(x[0]) in frames
+        ]
+        points = ship_measurer.measure(
+            [frames[int(x[0])] for x in target_results],
+            [Refiner.convert_to_xyxy(x[3:7]) for x in target_results],
+        )
+        for result, point in zip(target_results, points):
+            if point is not None:
                 frame_no = result[0]
-                # TODO@jh: 매번 찾지 않고, 네이밍 규칙으로 읽도록 수정 필요
-                frame = [
-                    x for x in frames if frame_no == int(x.split("_")[-1].split(".")[0])
-                ][0]
-                bbox_xyxy = refiner.convert_to_xyxy(result[3:7])
-                mask = refiner._do_seg_fast(cv2.imread(frame), [bbox_xyxy])
-                _, _, point = refiner.find_rotated_bounding_box_and_max_length(mask)
                 ships_info.append(
                     [frame_no, point[0][0], point[0][1], point[1][0], point[1][1]]
                 )
-            except Exception as e:
-                # TODO@jh: 이미지가 읽히지 않는 프레임이 있는 것 같음. 추후 확인 필요
-                print(e)
     ships_info = [list(map(int, sublist)) for sublist in ships_info]
 
     return ships_info
@@ -143,6 +179,21 @@ def read_file(file_path):
     return detections
 
 
+def parse_frame_number(frame_file):
+    """
+        '*_{frame_no}.jpg' 형식의 프레임 파일명에서 프레임 번호를 읽습니다.
+
+        Args
+            - frame_file (str): 프레임 파일 경로
+
+        Return
+            - frame_no (int | None): 프레임 번호, 파일명 형식이 다르면 None
+    """
+
+    match = _FRAME_NAME_PATTERN.search(os.path.basename(frame_file))
+    return int(match.group(1)) if match else None
+
+
 def is_point_in_bbox(x, y, bbox):
     """
         한 점이 bbox안에 있는지 여부를 반환합니다.
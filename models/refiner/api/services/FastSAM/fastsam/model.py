@@ -45,8 +45,11 @@ class FastSAM(YOLO):
         overrides['mode'] = kwargs.get('mode', 'predict')
         assert overrides['mode'] in ['track', 'predict']
         overrides['save'] = kwargs.get('save', False)  # do not save by default if called in Python
-        self.predictor = FastSAMPredictor(overrides=overrides)
-        self.predictor.setup_model(model=self.model, verbose=False)
+        # keep the predictor (and its model setup) while the options do not change
+        if self.predictor is None or getattr(self, '_predictor_overrides', None) != overrides:
+            self.predictor = FastSAMPredictor(overrides=overrides)
+            self.predictor.setup_model(model=self.model, verbose=False)
+            self._predictor_overrides = overrides
         try:
             return self.predictor(source, stream=stream)
         except Exception as e:
@@ -1 +1,2 @@
 from .inference_service import Refiner
+from .ship_service import ShipMeasurer
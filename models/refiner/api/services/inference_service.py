@@ -1,5 +1,6 @@
 import json
 import os
+from collections import OrderedDict, defaultdict
 
 import cv2
 import matplotlib.pyplot as plt
@@ -12,12 +13,15 @@ from .FastSAM.fastsam import FastSAM, FastSAMPrompt
 
 
 class Refiner:
-    def __init__(self, device, fastsam=False):
+    def __init__(self, device, fastsam=False, embedding_cache_size=8, max_boxes=64):
         """
             SAM (Segmentation-Aware Model)을 사용하여 이미지의 객체를 세그먼트화하는 Refiner 클래스의 생성자입니다.
 
             Args
                 - device (str): 모델을 실행할 장치 ('cuda' 또는 'cpu').
+                - fastsam (bool): SAM 대신 FastSAM을 사용할지 여부.
+                - embedding_cache_size (int): 메모리에 유지할 이미지 임베딩 수 (LRU).
+                - max_boxes (int): 한 번의 디코더 호출에 넣을 최대 박스 수.
 
             Note
                 - `self.model`과 `self.processor`는 Facebook의 'sam-vit-huge' 모델을 사용하여 초기화됩니다.
@@ -25,6 +29,9 @@ class Refiner:
         """
         self.device = device
         self.rgb_img = None
+        self.embedding_cache_size = embedding_cache_size
+        self.max_boxes = max_boxes
+        self._embeddings = OrderedDict()  # (image_path, mtime) -> (image_embeddings, original_sizes, reshaped_input_sizes)
 
         if fastsam:
             self.model = FastSAM("./FastSAM-x.pt")
@@ -64,6 +71,9 @@ class Refiner:
         """
             지정된 JSON 파일과 이미지 폴더를 사용하여 바운딩 박스를 세그먼트 마스크로 세밀화합니다.
 
+            어노테이션을 image_id별로 묶어 이미지마다 한 번만 읽고 SAM 이미지 임베딩을 한 번만 계산한 뒤,
+            그 이미지의 모든 박스를 한 번의 디코더 호출로 처리합니다.
+
             Args
                 - json_path (str): COCO 형식의 어노테이션 데이터가 담긴 JSON 파일 경로.
                 - image_folder (str): 이미지 파일들이 있는 폴더 경로.
@@ -72,30 +82,48 @@ class Refiner:
                 - coco_data (json): 세그먼트 마스크로 업데이트된 어노테이션 데이터.
         """
 
-        loader = self._get_loader(json_path, image_folder)
-
         with open(json_path, "r") as file:
             coco_data = json.load(file)
 
-        for idx, (img, bbox, anno_id) in tqdm.tqdm(enumerate(loader)):
-            int_bbox = [int(coord) for coord in self.convert_to_xyxy(bbox)]
-            mask = self._do_seg(img, [int_bbox])
-            updated_bbox = self.update_bbox_with_mask(mask, bbox)
-
-            for i, anno in enumerate(coco_data["annotations"]):
-                if anno["id"] == anno_id:
-                    coco_data["annotations"][i]["bbox"] = updated_bbox
-
-            if idx == 1:
-                self.show_mask_bbox(
-                    [mask],
-                    [int_bbox],
-                    [self.convert_to_xyxy(updated_bbox)],
-                    random_color=False,
-                    save="test_single_box.jpg",
-                )
+        images = {image["id"]: image["file_name"] for image in coco_data["images"]}
+        anno_index = {anno["id"]: i for i, anno in enumerate(coco_data["annotations"])}
+
+        image_annos = defaultdict(list)
+        for anno in coco_data["annotations"]:
+            image_annos[anno["image_id"]].append(anno["id"])
+
+        for image_id, anno_ids in tqdm.tqdm(image_annos.items()):
+            image_path = os.path.join(image_folder, images[image_id])
+            bboxes = [coco_data["annotations"][anno_index[anno_id]]["bbox"] for anno_id in anno_ids]
+
+            updated_bboxes = self.refine_image(image_path, bboxes)
+            for anno_id, updated_bbox in zip(anno_ids, updated_bboxes):
+                coco_data["annotations"][anno_index[anno_id]]["bbox"] = updated_bbox
+
         return coco_data
 
+    def refine_image(self, image_path, bboxes):
+        """
+            한 이미지의 바운딩 박스들을 세그먼트 마스크에 맞게 세밀화합니다.
+
+            Args
+                - image_path (str): 이미지 파일 경로.
+                - bboxes (list): 원래 바운딩 박스 좌표 목록 N x [x_min, y_min, width, height].
+
+            Return
+                - updated_bboxes (list): 업데이트된 바운딩 박스 좌표 목록 N x [x_min, y_min, width, height].
+        """
+
+        embedding = self._get_image_embedding(image_path)
+
+        updated_bboxes = []
+        for start in range(0, len(bboxes), self.max_boxes):
+            chunk = bboxes[start:start + self.max_boxes]
+            int_bboxes = [[int(coord) for coord in self.convert_to_xyxy(bbox)] for bbox in chunk]
+            masks = self._do_seg_batch(embedding, int_bboxes)
+            updated_bboxes.extend(self._get_horizontal_bboxes_from_masks(masks, chunk))
+        return updated_bboxes
+
     def save_update(self, coco_data, save_path):
         """
             업데이트된 어노테이션 데이터를 JSON 파일로 저장합니다.
@@ -176,6 +204,96 @@ class Refiner:
         else:
             return None
 
+    def _get_image_embedding(self, image_path):
+        """
+            이미지의 SAM 이미지 임베딩을 반환합니다. 최근 사용한 embedding_cache_size개의 임베딩은 메모리에 유지합니다.
+
+            Args
+                - image_path (str): 이미지 파일 경로.
+
+            Return
+                - embedding (tuple): (image_embeddings, original_sizes, reshaped_input_sizes)
+        """
+
+        key = (image_path, os.path.getmtime(image_path))
+        if key in self._embeddings:
+            self._embeddings.move_to_end(key)
+            return self._embeddings[key]
+
+        self.rgb_img = cv2.cvtColor(cv2.imread(image_path), cv2.COLOR_BGR2RGB)
+        inputs = self.processor(self.rgb_img, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            image_embeddings = self.model.get_image_embeddings(inputs["pixel_values"])
+
+        embedding = (image_embeddings, inputs["original_sizes"].cpu(), inputs["reshaped_input_sizes"].cpu())
+        self._embeddings[key] = embedding
+        while len(self._embeddings) > self.embedding_cache_size:
+            self._embeddings.popitem(last=False)
+        return embedding
+
+    def _do_seg_batch(self, embedding, boxes):
+        """
+            미리 계산한 이미지 임베딩에 대해 여러 바운딩 박스의 세그먼트화를 한 번의 디코더 호출로 수행합니다.
+
+            Args
+                - embedding (tuple): _get_image_embedding의 반환값.
+                - boxes (list): 세그먼트화할 영역의 바운딩 박스 좌표 목록 N x [x1, y1, x2, y2].
+
+            Return
+                - masks (torch.Tensor): N x 1 x H x W 세그먼트 마스크.
+        """
+
+        image_embeddings, original_sizes, reshaped_input_sizes = embedding
+
+        # processor와 같은 방식으로 박스를 모델 입력 크기에 맞게 변환
+        scale = reshaped_input_sizes[0].float() / original_sizes[0].float()
+        input_boxes = torch.tensor(boxes, dtype=torch.float32)
+        input_boxes[:, 0::2] *= scale[1]
+        input_boxes[:, 1::2] *= scale[0]
+
+        with torch.no_grad():
+            outputs = self.model(
+                image_embeddings=image_embeddings,
+                input_boxes=input_boxes[None].to(self.device),
+                multimask_output=False,
+            )
+
+        masks = self.processor.image_processor.post_process_masks(
+            outputs.pred_masks.cpu(), original_sizes, reshaped_input_sizes
+        )
+        return masks[0]
+
+    @staticmethod
+    def _get_horizontal_bboxes_from_masks(masks, bboxes):
+        """
+            마스크들을 기반으로 수평 바운딩 박스 좌표를 한 번에 계산합니다.
+
+            Args
+                - masks (torch.Tensor): N x 1 x H x W 세그먼트 마스크.
+                - bboxes (list): 원래 바운딩 박스 좌표 목록 N x [x_min, y_min, width, height].
+
+            Return
+                - bboxes (list): 마스크에 기반한 새로운 바운딩 박스 좌표 목록. 빈 마스크는 원래 좌표를 유지합니다.
+        """
+
+        masks = masks[:, 0, :, :]
+        height, width = masks.shape[-2:]
+        cols = masks.any(dim=1).to(torch.uint8)  # N x W
+        rows = masks.any(dim=2).to(torch.uint8)  # N x H
+
+        x_min = cols.argmax(dim=1)
+        x_max = width - 1 - cols.flip(dims=(1,)).argmax(dim=1)
+        y_min = rows.argmax(dim=1)
+        y_max = height - 1 - rows.flip(dims=(1,)).argmax(dim=1)
+        has_mask = cols.any(dim=1)
+
+        return [
+            [int(x1), int(y1), int(x2 - x1), int(y2 - y1)] if found else bbox
+            for x1, y1, x2, y2, found, bbox in zip(
+                x_min.tolist(), y_min.tolist(), x_max.tolist(), y_max.tolist(), has_mask.tolist(), bboxes
+            )
+        ]
+
     def _do_seg_fast(self, bgr_img, boxes):
         """
         주어진 이미지와 바운딩 박스에 대해 세그먼트화를 수행합니다.
@@ -257,7 +375,8 @@ class Refiner:
             cv2.rectangle(self.rgb_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
         self.show_mask(masks, random_color, save)
 
-    def convert_to_xyxy(self, bbox):
+    @staticmethod
+    def convert_to_xyxy(bbox):
         """
             COCO 형식의 바운딩 박스 좌표를 [x_min, y_min, x_max, y_max] 형식으로 변환합니다.
 
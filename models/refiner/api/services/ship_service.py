@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import torch
+
+from .FastSAM.fastsam import FastSAM
+from .inference_service import Refiner
+
+
+class ShipMeasurer:
+    def __init__(self, device, model_path="./FastSAM-x.pt", batch_size=4, imgsz=1024, conf=0.4, iou=0.9):
+        """
+            FastSAM 모델을 메모리에 유지하면서 추적된 선박의 프레임들을 배치로 세그먼트화하여 선박 길이를 측정하는 클래스입니다.
+
+            Args
+                - device (str): 모델을 실행할 장치 ('cuda' 또는 'cpu').
+                - model_path (str): FastSAM 가중치 파일 경로.
+                - batch_size (int): 한 번에 FastSAM에 넣을 프레임 수.
+                - imgsz (int): FastSAM 입력 크기.
+                - conf (float): FastSAM confidence threshold.
+                - iou (float): FastSAM NMS IoU threshold.
+        """
+        self.device = device
+        self.batch_size = batch_size
+        self.predict_args = dict(device=device, retina_masks=True, imgsz=imgsz, conf=conf, iou=iou, verbose=False)
+        self.model = FastSAM(model_path)
+
+    def measure(self, frames, bboxes):
+        """
+            프레임별 선박 bbox를 프롬프트로 FastSAM 마스크를 고르고, 마스크의 회전된 바운딩 박스에서 가장 긴 변을 구합니다.
+
+            다음 배치의 프레임은 현재 배치를 추론하는 동안 별도 스레드에서 읽습니다.
+
+            Args
+                - frames (list): 프레임 파일 경로 목록.
+                - bboxes (list): 프레임별 선박 bbox 목록 N x [x1, y1, x2, y2].
+
+            Return
+                - results (list): 프레임별 가장 긴 변의 두 꼭짓점 ((x1, y1), (x2, y2)). 마스크를 찾지 못한 프레임은 None.
+        """
+
+        results = []
+        batches = [
+            (frames[start:start + self.batch_size], bboxes[start:start + self.batch_size])
+            for start in range(0, len(frames), self.batch_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_images = executor.submit(self._read_images, batches[0][0]) if batches else None
+            for i, (_, batch_bboxes) in enumerate(batches):
+                images = next_images.result()
+                if i + 1 < len(batches):
+                    next_images = executor.submit(self._read_images, batches[i + 1][0])
+
+                masks = self._segment_batch(images, batch_bboxes)
+                for mask in masks:
+                    results.append(self._longest_edge(mask))
+
+        return results
+
+    @staticmethod
+    def _read_images(frame_paths):
+        """
+            프레임 파일들을 읽어 RGB 이미지 목록으로 반환합니다. 읽지 못한 프레임은 None입니다.
+        """
+
+        images = []
+        for frame_path in frame_paths:
+            image = cv2.imread(frame_path)
+            images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image is not None else None)
+        return images
+
+    def _segment_batch(self, images, bboxes):
+        """
+            여러 프레임을 한 번의 FastSAM 추론으로 세그먼트화하고 프레임별 bbox에 가장 잘 맞는 마스크를 고릅니다.
+
+            Args
+                - images (list): RGB 이미지 목록 (읽지 못한 프레임은 None).
+                - bboxes (list): 프레임별 bbox 목록 N x [x1, y1, x2, y2].
+
+            Return
+                - masks (list): 프레임별 선택된 마스크 (np.ndarray, H x W). 찾지 못한 경우 None.
+        """
+
+        valid = [i for i, image in enumerate(images) if image is not None]
+        masks = [None] * len(images)
+        if not valid:
+            return masks
+
+        with torch.no_grad():
+            everything_results = self.model([images[i] for i in valid], **self.predict_args)
+
+        # 배치의 모든 프레임에서 객체가 없으면 빈 목록이 반환됨
+        if not everything_results or len(everything_results) != len(valid):
+            return masks
+
+        for i, result in zip(valid, everything_results):
+            if result.masks is None or not len(result.masks.data):
+                continue
+            index = self.select_masks(result.masks.data, [bboxes[i]], images[i].shape[:2])[0]
+            masks[i] = result.masks.data[index].cpu().numpy()
+        return masks
+
+    @staticmethod
+    def select_masks(masks, bboxes, image_shape):
+        """
+            bbox 프롬프트마다 IoU가 가장 큰 마스크의 인덱스를 구합니다. FastSAMPrompt.box_prompt와 같은 기준이며,
+            bbox 행/열 지시 벡터와의 행렬곱으로 모든 마스크와 모든 프롬프트의 교집합 면적을 한 번에 계산합니다.
+
+            Args
+                - masks (torch.Tensor): M x h x w 마스크.
+                - bboxes (list): 프롬프트 bbox 목록 P x [x1, y1, x2, y2] (원본 이미지 좌표).
+                - image_shape (tuple): 원본 이미지 크기 (height, width).
+
+            Return
+                - indices (list): 프롬프트별 선택된 마스크 인덱스.
+        """
+
+        masks = masks.float()
+        h, w = masks.shape[-2:]
+        target_height, target_width = image_shape
+
+        boxes = torch.as_tensor(bboxes, dtype=torch.float64).reshape(-1, 4)
+        if h != target_height or w != target_width:
+            boxes[:, 0::2] = (boxes[:, 0::2] * w / target_width).trunc()
+            boxes[:, 1::2] = (boxes[:, 1::2] * h / target_height).trunc()
+        boxes = boxes.round().long()
+        boxes[:, 0::2] = boxes[:, 0::2].clamp(0, w)
+        boxes[:, 1::2] = boxes[:, 1::2].clamp(0, h)
+        boxes = boxes.to(masks.device)
+        x1, y1, x2, y2 = boxes.unbind(dim=1)
+
+        # box indicator rows / columns: masks_area[m, p] = row[p] @ masks[m] @ col[p]^T
+        rows = torch.arange(h, device=masks.device)
+        cols = torch.arange(w, device=masks.device)
+        row_ind = ((rows >= y1[:, None]) & (rows < y2[:, None])).to(masks.dtype)  # P x h
+        col_ind = ((cols >= x1[:, None]) & (cols < x2[:, None])).to(masks.dtype)  # P x w
+
+        masks_area = torch.einsum("mhp,ph->mp", masks @ col_ind.T, row_ind)  # M x P
+        orig_masks_area = masks.sum(dim=(1, 2)).unsqueeze(1)  # M x 1
+        bbox_area = ((y2 - y1) * (x2 - x1)).unsqueeze(0)  # 1 x P
+
+        ious = masks_area / (bbox_area + orig_masks_area - masks_area)
+        return ious.argmax(dim=0).tolist()
+
+    @staticmethod
+    def _longest_edge(mask):
+        if mask is None:
+            return None
+        try:
+            _, _, longest_edge_points = Refiner.find_rotated_bounding_box_and_max_length(mask)
+            return longest_edge_points
+        except Exception as e:
+            print(e)
+            return None
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 import argparse
 import os
 import os.path as osp
 import cv2
 import csv
 import time
+from contextlib import ExitStack
 import torch
 import numpy as np
+from PIL import Image
 
 from loguru import logger
-from interface.request import SahiRequest
+from interface.request import SahiRequest, ModelRequest
 from typing import List
 
 
@@ -19,8 +21,9 @@ from ..services import fuse_model, get_model_info, postprocess
 from ..services import plot_tracking
 from ..services import Timer
 from ..services import YoloxDetectionModel
-from ..services import get_sliced_prediction
+from ..services import get_sliced_prediction, get_sliced_predictions
 from ..services import AutoDetectionModel
+from ..services import model_registry
 from ..services import config as cfg
 
 # from models.sahi_detection.api.services import preproc
@@ -29,8 +32,9 @@ from ..services import config as cfg
 # from models.sahi_detection.api.services import plot_tracking
 # from models.sahi_detection.api.services import Timer
 # from models.sahi_detection.api.services import YoloxDetectionModel
-# from models.sahi_detection.api.services import get_sliced_prediction
+# from models.sahi_detection.api.services import get_sliced_prediction, get_sliced_predictions
 # from models.sahi_detection.api.services import AutoDetectionModel
+# from models.sahi_detection.api.services import model_registry
 # from models.sahi_detection.api.services import config as cfg
 
 IMAGE_EXT = [".jpg", ".jpeg", ".webp", ".bmp", ".png"]
@@ -64,6 +68,8 @@ def make_parser():
     parser.add_argument("--fps", default=5, type=int, help="frame rate (fps)")
     parser.add_argument("--fp16", dest="fp16", default=False, action="store_true", help="Adopting mix precision evaluating.")
     parser.add_argument("--fuse", dest="fuse", default=False, action="store_true", help="Fuse conv and bn for testing.")
+    parser.add_argument("--batch_size", default=8, type=int, help="number of slices per forward pass")
+    parser.add_argument("--frame_batch", default=2, type=int, help="number of consecutive frames whose slices share batches")
 
     return parser
 
@@ -117,26 +123,44 @@ class Predictor(object):
                 det_outputs (list): 객체 탐지 결과 bbox입니다.
         """
 
-        img_info = {"id": frame_id}
-        img_path = img
-        if isinstance(img, str):
-            img_info["file_name"] = osp.basename(img)
-            img = cv2.imread(img)
-        else:
-            img_info["file_name"] = None
+        return self.inference_batch([img], [frame_id])[0]
 
-        height, width = img.shape[:2]
-        img_info["height"] = height
-        img_info["width"] = width
-        img_info["raw_img"] = img
-        
+    def inference_batch(self, imgs, frame_ids):
+        """
+            여러 프레임에 SAHI를 적용하고 객체탐지를 수행합니다. 연속된 프레임의 슬라이스를 모아 배치 단위로 추론합니다.
+
+            Args:
+                - imgs (list): 이미지 경로 또는 이미지를 읽은 넘파이 배열의 리스트입니다.
+                - frame_ids (list): 프레임 번호 리스트입니다.
+
+            Return:
+                det_outputs_list (list): 프레임별 객체 탐지 결과 bbox 리스트입니다.
+        """
+
+        img_paths = imgs
+        shapes = []
+        for img in imgs:
+            if isinstance(img, str):
+                # Only the header is read here; the image itself is decoded once while slicing
+                width, height = Image.open(img).size
+                shapes.append((height, width))
+            else:
+                shapes.append(img.shape[:2])
+
+        batch_size = self.args.batch_size if self.args is not None else 1
         if self.sliced_path != None:
             logger.info("in here")
-            file_name_without_extension, _ = os.path.splitext(os.path.basename(img_path))
-            result = get_sliced_prediction(img_path, self.det_model, slice_height=1024, slice_width=1024, output_file_name=file_name_without_extension, interim_dir = self.sliced_path)
+            file_names_without_extension = [os.path.splitext(os.path.basename(img_path))[0] for img_path in img_paths]
+            results = get_sliced_predictions(img_paths, self.det_model, output_file_names=file_names_without_extension, interim_dir=self.sliced_path, slice_height=1024, slice_width=1024, batch_size=batch_size)
         else:
-            result = get_sliced_prediction(img_path, self.det_model, slice_height=1024, slice_width=1024)
-        
+            results = get_sliced_predictions(img_paths, self.det_model, slice_height=1024, slice_width=1024, batch_size=batch_size)
+
+        return [
+            self._to_det_outputs(result, frame_id, height, width)
+            for result, frame_id, (height, width) in zip(results, frame_ids, shapes)
+        ]
+
+    def _to_det_outputs(self, result, frame_id, height, width):
         det_outputs = []
         for ann in result.to_coco_annotations():
             bbox = ann['bbox']
@@ -180,12 +204,16 @@ def image_demo(predictor, current_time, args):
     files.sort()
     timer = Timer()
     det_results = []
-    for frame_id, img_path in enumerate(files, 1):
-        det_outputs = predictor.inference(img_path, frame_id)
-        det_results+=det_outputs
-
-        if frame_id % 20 == 0:
-            logger.info('Processing frame {} ({:.2f} fps)'.format(frame_id, 1. / max(1e-5, timer.average_time)))
+    frame_batch = max(1, args.frame_batch)
+    for batch_start in range(0, len(files), frame_batch):
+        img_paths = files[batch_start:batch_start + frame_batch]
+        frame_ids = list(range(batch_start + 1, batch_start + 1 + len(img_paths)))
+        for det_outputs in predictor.inference_batch(img_paths, frame_ids):
+            det_results+=det_outputs
+
+        for frame_id in frame_ids:
+            if frame_id % 20 == 0:
+                logger.info('Processing frame {} ({:.2f} fps)'.format(frame_id, 1. / max(1e-5, timer.average_time)))
     
     return det_results
 
@@ -216,7 +244,7 @@ def main(img_path=None, csv_path=None, sliced_path = None):
             - sliced_path (str): SAHI에 의해 슬라이싱 된 패치가 저장된 디렉터리 경로입니다.
     """
 
-    args = make_parser().parse_args()
+    args, _ = make_parser().parse_known_args()
 
     args.device = torch.device("cuda" if args.device == "gpu" else "cpu")
     # 임시로 args 유지할 때까지만 사용
@@ -242,56 +270,28 @@ def main(img_path=None, csv_path=None, sliced_path = None):
         if args.tsize is not None:
             exp.test_size = (args.tsize, args.tsize)
 
-    # Model define
-    if args.model == 'yolov5':
-        detection_model = AutoDetectionModel.from_pretrained(
-        model_type='yolov5',
-        confidence_threshold=0.3,
-        image_size = 1024,
-        model_path = args.ckpt ,
-        device='cuda:0', # or 'cpu'
-        )
-    elif args.model == 'yolov8':
-        detection_model = AutoDetectionModel.from_pretrained(
-        model_type='yolov8',
-        confidence_threshold=0.3,
-        image_size = 1024,
-        model_path= args.ckpt,
-        device='cuda:0', # or 'cpu'
-        )
-
-    elif args.model == 'trt':
-        """
-        2024.01.04
-        args.model = Tensorrt
-        model_type = trt
-        classes = classes list
-        """
-        detection_model = AutoDetectionModel.from_pretrained(
-        model_type='trt',
-        confidence_threshold=0.3,
-        image_size = 1024,
-        model_path= args.ckpt,
-        device='cuda:0', # or 'cpu'
-        classes = ['background','ship','dolphin'],
-        )
-
-
     cls_map = {}
     # det 모델과 anomaly 모델 머지 input class를 맞춰주기 위함
     for idx, cls in enumerate(cfg.OUT_CLASSES):
         m_cls_idx = cfg.CLASSES.index(cls)
         cls_map[m_cls_idx] = idx
-    
-    logger.info("sliced_path//////////////////", sliced_path)
-    predictor = Predictor(detection_model, cls_map, sliced_path, args.device, args.fp16, args)
 
-    current_time = time.localtime()
-    if args.demo == "image":
-        det_results = image_demo(predictor, current_time, args)
-        write_csv(csv_path, det_results)
-    else:
-        logger.exception("Please check input format")
+    with ExitStack() as stack:
+        # Model define: loaded once and kept warm by the registry, pinned until inference ends
+        if args.model in ('yolov5', 'yolov8', 'trt'):
+            detection_model = stack.enter_context(
+                model_registry.use(args.model, args.ckpt, image_size=1024, device='cuda:0', confidence_threshold=0.3)
+            )
+
+        logger.info("sliced_path//////////////////", sliced_path)
+        predictor = Predictor(detection_model, cls_map, sliced_path, args.device, args.fp16, args)
+
+        current_time = time.localtime()
+        if args.demo == "image":
+            det_results = image_demo(predictor, current_time, args)
+            write_csv(csv_path, det_results)
+        else:
+            logger.exception("Please check input format")
 
 
 router = APIRouter(tags=["sahi"])
@@ -323,4 +323,70 @@ async def inference(request: SahiRequest.SahiRequest):
     sliced_path = request.sliced_path
 
     main(img_path, csv_path, sliced_path)
-    return img_path, csv_path, sliced_path
\ No newline at end of file
+    return img_path, csv_path, sliced_path
+
+
+@router.get(
+    "/sahi/models",
+    status_code=status.HTTP_200_OK,
+    summary="loaded detection models",
+)
+async def list_models():
+    """
+        메모리에 로드되어 있는 탐지 모델 목록을 반환합니다.
+
+        Return:
+            - models (list): 모델별 model_type, ckpt, image_size, device, memory(byte), loaded_at, last_used
+    """
+
+    return model_registry.list()
+
+
+@router.post(
+    "/sahi/models/load",
+    status_code=status.HTTP_200_OK,
+    summary="load detection model",
+)
+async def load_model(request: ModelRequest.ModelRequest):
+    """
+        탐지 모델을 미리 로드합니다. 이미 로드된 모델은 다시 로드하지 않습니다.
+
+        Args:
+            - request
+                - request.model_type (str): 모델 종류 (yolov5, yolov8, trt)
+                - request.ckpt (str): 모델 가중치 파일 경로
+                - request.image_size (int): 추론 입력 크기
+                - request.device (str): 모델을 올릴 장치
+
+        Raise:
+            - fastapi.HTTPException: 가중치 파일이 없는 경우 404, 로드에 실패한 경우 500
+
+        Return:
+            - info (dict): 로드된 모델 정보
+    """
+
+    if not os.path.exists(request.ckpt):
+        raise HTTPException(status_code=404, detail=f"ckpt not found: {request.ckpt}")
+    try:
+        return model_registry.load(request.model_type, request.ckpt, request.image_size, request.device)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load model: {e}")
+
+
+@router.post(
+    "/sahi/models/unload",
+    status_code=status.HTTP_200_OK,
+    summary="unload detection model",
+)
+async def unload_model(request: ModelRequest.ModelRequest):
+    """
+        탐지 모델을 메모리에서 내립니다.
+
+        Args:
+            - request: load와 동일
+
+        Return:
+            - unloaded (bool): 로드되어 있던 모델을 내렸으면 True
+    """
+
+    return {"unloaded": model_registry.unload(request.model_type, request.ckpt, request.image_size, request.device)}
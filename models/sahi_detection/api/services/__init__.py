@@ -13,8 +13,9 @@ from yolox.tracker.byte_tracker import BYTETracker
 from yolox.tracking_utils.timer import Timer
 
 from .sahi.models.yolox import YoloxDetectionModel
-from .sahi.predict import get_sliced_prediction
+from .sahi.predict import get_sliced_prediction, get_sliced_predictions
 from .sahi import AutoDetectionModel
+from .model_registry import registry as model_registry
 
 from .utils import config
 
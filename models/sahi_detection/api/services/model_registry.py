@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+import torch
+from loguru import logger
+
+from .sahi import AutoDetectionModel
+
+ModelKey = namedtuple("ModelKey", ["model_type", "ckpt", "image_size", "device"])
+
+# trt 모델은 category 정보를 엔진에서 읽을 수 없으므로 클래스 목록을 함께 전달
+TRT_CLASSES = ['background', 'ship', 'dolphin']
+
+
+class ModelRegistry:
+    """
+        탐지 모델을 한 번만 로드하여 메모리에 유지하는 레지스트리입니다.
+
+        모델은 (model_type, ckpt, image_size, device)로 구분되며 처음 사용할 때 또는 load 요청 시 로드됩니다.
+        새 모델을 로드할 때 모델들이 차지하는 메모리 합이 max_memory를 넘으면 가장 오래 사용하지 않은 모델부터 내립니다.
+        모델이 차지하는 메모리는 GPU 모델의 경우 로드 전후의 할당량 차이로, CPU 모델의 경우 가중치 파일 크기로 추정합니다.
+
+        추론에는 use로 모델을 사용 중으로 표시하여 받습니다. 사용 중인 모델은 메모리 확보를 위해 내리지 않으며,
+        unload 요청 시에는 레지스트리에서만 제거하고 마지막 사용이 끝난 뒤에 메모리에서 내립니다.
+
+            with registry.use('yolov8', ckpt) as detection_model:
+                ...
+
+        Args
+            - max_memory (int | None): 모델들이 사용할 수 있는 최대 메모리 (byte). None이면 GPU 전체 메모리의 80%
+            - max_models (int): 동시에 유지할 최대 모델 수
+    """
+
+    def __init__(self, max_memory=None, max_models=4):
+        self.max_memory = max_memory
+        self.max_models = max_models
+        self._models = OrderedDict()  # ModelKey -> {"model", "memory", "loaded_at", "last_used", "users", "retired"}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(model_type, ckpt, image_size=1024, device="cuda:0"):
+        return ModelKey(model_type, os.path.abspath(ckpt), image_size, str(device))
+
+    def get(self, model_type, ckpt, image_size=1024, device="cuda:0", confidence_threshold=0.3):
+        """
+            키에 해당하는 모델을 반환합니다. 로드되어 있지 않으면 로드합니다.
+            반환된 모델은 사용 중으로 표시되지 않아 다른 요청에 의해 내려질 수 있으므로, 추론에는 use를 사용합니다.
+
+            Args
+                - model_type (str): yolov5, yolov8, trt
+                - ckpt (str): 가중치 파일 경로
+                - image_size (int): 추론 입력 크기
+                - device (str): 모델을 올릴 장치
+                - confidence_threshold (float): 로드 시 사용할 confidence threshold
+
+            Return
+                - detection_model (sahi.models.base.DetectionModel)
+        """
+
+        key = self.make_key(model_type, ckpt, image_size, device)
+        with self._lock:
+            return self._get_entry(key, confidence_threshold)["model"]
+
+    @contextmanager
+    def use(self, model_type, ckpt, image_size=1024, device="cuda:0", confidence_threshold=0.3):
+        """
+            키에 해당하는 모델을 with 블록 동안 사용 중으로 표시하여 반환합니다. 로드되어 있지 않으면 로드합니다.
+
+            Args
+                - get과 같습니다.
+
+            Return
+                - detection_model (sahi.models.base.DetectionModel)
+        """
+
+        key = self.make_key(model_type, ckpt, image_size, device)
+        with self._lock:
+            entry = self._get_entry(key, confidence_threshold)
+            entry["users"] += 1
+        try:
+            yield entry["model"]
+        finally:
+            with self._lock:
+                entry["users"] -= 1
+                entry["last_used"] = time.time()
+                if entry["retired"] and entry["users"] == 0:
+                    self._release(key, entry)
+
+    def _get_entry(self, key, confidence_threshold):
+        entry = self._models.get(key)
+        if entry is None:
+            entry = self._load(key, confidence_threshold)
+        self._models.move_to_end(key)
+        entry["last_used"] = time.time()
+        return entry
+
+    def load(self, model_type, ckpt, image_size=1024, device="cuda:0", confidence_threshold=0.3):
+        """
+            모델을 미리 로드합니다. 이미 로드된 경우 그대로 둡니다.
+
+            Return
+                - info (dict): 로드된 모델 정보
+        """
+
+        self.get(model_type, ckpt, image_size, device, confidence_threshold)
+        return self.info(self.make_key(model_type, ckpt, image_size, device))
+
+    def unload(self, model_type, ckpt, image_size=1024, device="cuda:0"):
+        """
+            모델을 메모리에서 내립니다. 사용 중인 모델은 마지막 사용이 끝난 뒤에 내립니다.
+
+            Return
+                - unloaded (bool): 로드되어 있던 모델을 내렸으면 True
+        """
+
+        key = self.make_key(model_type, ckpt, image_size, device)
+        with self._lock:
+            entry = self._models.pop(key, None)
+            if entry is None:
+                return False
+            self._release(key, entry)
+            return True
+
+    def unload_all(self):
+        with self._lock:
+            while self._models:
+                key, entry = self._models.popitem(last=False)
+                self._release(key, entry)
+
+    def info(self, key):
+        entry = self._models[key]
+        return {
+            **key._asdict(),
+            "memory": entry["memory"],
+            "loaded_at": entry["loaded_at"],
+            "last_used": entry["last_used"],
+            "users": entry["users"],
+        }
+
+    def list(self):
+        with self._lock:
+            return [self.info(key) for key in self._models]
+
+    def used_memory(self):
+        return sum(entry["memory"] for entry in self._models.values())
+
+    def memory_budget(self, device):
+        if self.max_memory is not None:
+            return self.max_memory
+        if str(device).startswith("cuda") and torch.cuda.is_available():
+            _, total = torch.cuda.mem_get_info(torch.device(device))
+            return int(total * 0.8)
+        return None
+
+    def _load(self, key, confidence_threshold):
+        # Make room for a model of about the size of its weights before loading it
+        self._evict(key.device, os.path.getsize(key.ckpt) if os.path.exists(key.ckpt) else 0)
+
+        is_cuda = key.device.startswith("cuda") and torch.cuda.is_available()
+        if is_cuda:
+            torch.cuda.synchronize(torch.device(key.device))
+            allocated = torch.cuda.memory_allocated(torch.device(key.device))
+
+        s_time = time.time()
+        kwargs = {"classes": TRT_CLASSES} if key.model_type == "trt" else {}
+        model = AutoDetectionModel.from_pretrained(
+            model_type=key.model_type,
+            confidence_threshold=confidence_threshold,
+            image_size=key.image_size,
+            model_path=key.ckpt,
+            device=key.device,
+            **kwargs,
+        )
+
+        memory = os.path.getsize(key.ckpt) if os.path.exists(key.ckpt) else 0
+        if is_cuda:
+            torch.cuda.synchronize(torch.device(key.device))
+            memory = max(memory, torch.cuda.memory_allocated(torch.device(key.device)) - allocated)
+        logger.info(f"model loaded: {key} ({memory / 1024 ** 2:.1f} MB, {time.time() - s_time:.1f} sec)")
+
+        now = time.time()
+        entry = {"model": model, "memory": memory, "loaded_at": now, "last_used": now, "users": 0, "retired": False}
+        self._models[key] = entry
+        return entry
+
+    def _evict(self, device, required):
+        budget = self.memory_budget(device)
+        while self._models and (
+            len(self._models) >= self.max_models
+            or (budget is not None and self.used_memory() + required > budget)
+        ):
+            # 사용 중인 모델은 건너뛰고 가장 오래 사용하지 않은 모델부터 내립니다.
+            key = next((key for key, entry in self._models.items() if entry["users"] == 0), None)
+            if key is None:
+                logger.warning("all loaded models are in use, loading a model over the registry limits")
+                return
+            entry = self._models.pop(key)
+            logger.info(f"model evicted: {key}")
+            self._release(key, entry)
+
+    def _release(self, key, entry):
+        if entry["users"] > 0:
+            # 사용 중인 요청이 끝나면 use에서 내립니다.
+            entry["retired"] = True
+            return
+        model = entry["model"]
+        if model is None:
+            return
+        entry["model"] = None
+        model.unload_model()
+
+
+registry = ModelRegistry()
@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
 
 from sahi.utils.import_utils import is_available
+from sahi.utils.torch import empty_cuda_cache, is_torch_cuda_available as cuda_is_available
 from sahi.utils.torch import select_device as select_torch_device
 
 class DetectionModel:
@@ -99,6 +100,25 @@ class DetectionModel:
         """
         NotImplementedError()
 
+    def perform_batch_inference(self, images: List[np.ndarray]):
+        """
+        This function should be implemented in a way that prediction is performed on all images
+        in a single forward pass and the result is set to self._original_predictions, one entry
+        per image, so that convert_original_predictions can be called with shift_amount and
+        full_shape lists. Models that do not support batching keep max_batch_size = 1.
+        Args:
+            images: List[np.ndarray]
+                Images of the same size to be predicted. 3 channel images should be in RGB order.
+        """
+        raise NotImplementedError()
+
+    @property
+    def max_batch_size(self):
+        """
+        Returns the largest number of images perform_batch_inference accepts, None if unlimited.
+        """
+        return 1
+
     def _create_object_prediction_list_from_original_predictions(
         self,
         image: np.ndarray = None,
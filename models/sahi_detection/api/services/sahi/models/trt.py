@@ -42,6 +42,8 @@ class TensorRTDetectionModel(DetectionModel):
         trt.init_libnvinfer_plugins(logger,'')
         engine = runtime.deserialize_cuda_engine(serialized_engine)
         self.imgsz = engine.get_binding_shape(0)[2:]
+        # Engines built with an explicit batch dimension > 1 can take several slices per execution
+        self._max_batch_size = max(1, int(engine.get_binding_shape(0)[0]))
         self.context = engine.create_execution_context()
         self.inputs, self.outputs, self.bindings = [], [], []
         self.stream = cuda.Stream()
@@ -103,6 +105,42 @@ class TensorRTDetectionModel(DetectionModel):
 
         self._original_predictions = [out['host'] for out in self.outputs]
 
+    def perform_batch_inference(self, images: List[np.ndarray]):
+        """
+        Prediction is performed on up to max_batch_size images in one execution of the engine and the
+        prediction result is set to self._original_predictions. Unused batch entries are zero filled.
+        Args:
+            images: List[np.ndarray]
+                Images to be predicted. 3 channel images should be in RGB order.
+        """
+        if len(images) > self._max_batch_size:
+            raise ValueError(f"engine batch size is {self._max_batch_size} but {len(images)} images were given")
+
+        batch = np.zeros((self._max_batch_size, 3, self.imgsz[0], self.imgsz[1]), dtype=np.float32)
+        ratios = []
+        for image_ind, image in enumerate(images):
+            preprocessed, ratio = self._preproc(image, self.slice_size, None, None)
+            batch[image_ind] = preprocessed
+            ratios.append(ratio)
+        self._ratio = ratios
+
+        self.inputs[0]['host'] = np.ravel(batch)
+        for inp in self.inputs:
+            cuda.memcpy_htod_async(inp['device'], inp['host'], self.stream)
+        self.context.execute_async_v2(
+            bindings=self.bindings,
+            stream_handle=self.stream.handle
+        )
+        for out in self.outputs:
+            cuda.memcpy_dtoh_async(out['host'], out['device'], self.stream)
+        self.stream.synchronize()
+
+        self._original_predictions = [out['host'] for out in self.outputs]
+
+    @property
+    def max_batch_size(self):
+        return self._max_batch_size
+
     @property
     def num_categories(self):
         """
@@ -189,7 +227,8 @@ class TensorRTDetectionModel(DetectionModel):
                 List[[height, width],[height, width],...]
         """
         original_predictions = self._original_predictions
-        ratio = self._ratio
+        # perform_inference sets a single ratio, perform_batch_inference one ratio per image
+        ratios = self._ratio if isinstance(self._ratio, list) else [self._ratio]
         dets = []
 
         shift_amount_list = fix_shift_amount_list(shift_amount_list)
@@ -198,8 +237,13 @@ class TensorRTDetectionModel(DetectionModel):
         # handle all predictions
         object_prediction_list_per_image = []
         num, final_boxes, final_scores, final_cls_inds = original_predictions
-        final_boxes = np.reshape(final_boxes / ratio, (-1, 4))
-        dets.append(np.concatenate([final_boxes[:num[0]], np.array(final_scores)[:num[0]].reshape(-1, 1), np.array(final_cls_inds)[:num[0]].reshape(-1, 1)], axis=-1))
+        batch_size = len(num)
+        final_boxes = np.reshape(final_boxes, (batch_size, -1, 4))
+        final_scores = np.reshape(final_scores, (batch_size, -1))
+        final_cls_inds = np.reshape(final_cls_inds, (batch_size, -1))
+        for image_ind, ratio in enumerate(ratios):
+            n = int(num[image_ind])
+            dets.append(np.concatenate([final_boxes[image_ind, :n] / ratio, final_scores[image_ind, :n].reshape(-1, 1), final_cls_inds[image_ind, :n].reshape(-1, 1)], axis=-1))
 
         for image_ind, value in enumerate(dets):
             shift_amount = shift_amount_list[image_ind]
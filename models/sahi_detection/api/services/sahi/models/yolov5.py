@@ -68,6 +68,28 @@ class Yolov5DetectionModel(DetectionModel):
             prediction_result = self.model(image)
         self._original_predictions = prediction_result
 
+    def perform_batch_inference(self, images: List[np.ndarray]):
+        """
+        Prediction is performed on all images in one forward pass and the prediction result is set to
+        self._original_predictions, whose xyxy has one tensor per image.
+        Args:
+            images: List[np.ndarray]
+                Images to be predicted. 3 channel images should be in RGB order.
+        """
+
+        # Confirm model is loaded
+        if self.model is None:
+            raise ValueError("Model is not loaded, load it by calling .load_model()")
+        if self.image_size is not None:
+            prediction_result = self.model(images, size=self.image_size, augment=True)
+        else:
+            prediction_result = self.model(images)
+        self._original_predictions = prediction_result
+
+    @property
+    def max_batch_size(self):
+        return None
+
     @property
     def num_categories(self):
         """
@@ -72,6 +72,33 @@ class Yolov8DetectionModel(DetectionModel):
 
         self._original_predictions = prediction_result
 
+    def perform_batch_inference(self, images: List[np.ndarray]):
+        """
+        Prediction is performed on all images in one forward pass and the prediction result is set to
+        self._original_predictions, one tensor per image.
+        Args:
+            images: List[np.ndarray]
+                Images to be predicted. 3 channel images should be in RGB order.
+        """
+
+        # Confirm model is loaded
+        if self.model is None:
+            raise ValueError("Model is not loaded, load it by calling .load_model()")
+        images = [image[:, :, ::-1] for image in images]  # YOLOv8 expects numpy arrays to have BGR
+        if self.image_size is not None:
+            prediction_result = self.model(images, imgsz=self.image_size, verbose=False, device=self.device)
+        else:
+            prediction_result = self.model(images, verbose=False, device=self.device)
+        prediction_result = [
+            result.boxes.data[result.boxes.data[:, 4] >= self.confidence_threshold] for result in prediction_result
+        ]
+
+        self._original_predictions = prediction_result
+
+    @property
+    def max_batch_size(self):
+        return None
+
     @property
     def category_names(self):
         return self.model.names.values()
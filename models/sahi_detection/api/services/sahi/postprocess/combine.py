@@ -6,6 +6,7 @@ from typing import List
 
 import torch
 
+from sahi.postprocess.grid_combine import grid_greedy_nmm, grid_nmm, grid_nms
 from sahi.postprocess.utils import ObjectPredictionList, has_match, merge_object_prediction_pair
 from sahi.prediction import ObjectPrediction
 from sahi.utils.import_utils import check_requirements
@@ -476,15 +477,13 @@ class NMSPostprocess(PostprocessPredictions):
         object_predictions: List[ObjectPrediction],
     ):
         object_prediction_list = ObjectPredictionList(object_predictions)
-        object_predictions_as_torch = object_prediction_list.totensor()
-        if self.class_agnostic:
-            keep = nms(
-                object_predictions_as_torch, match_threshold=self.match_threshold, match_metric=self.match_metric
-            )
-        else:
-            keep = batched_nms(
-                object_predictions_as_torch, match_threshold=self.match_threshold, match_metric=self.match_metric
-            )
+        object_predictions_as_numpy = object_prediction_list.tonumpy()
+        keep = grid_nms(
+            object_predictions_as_numpy,
+            match_threshold=self.match_threshold,
+            match_metric=self.match_metric,
+            class_agnostic=self.class_agnostic,
+        )
 
         selected_object_predictions = object_prediction_list[keep].tolist()
         if not isinstance(selected_object_predictions, list):
@@ -499,19 +498,13 @@ class NMMPostprocess(PostprocessPredictions):
         object_predictions: List[ObjectPrediction],
     ):
         object_prediction_list = ObjectPredictionList(object_predictions)
-        object_predictions_as_torch = object_prediction_list.totensor()
-        if self.class_agnostic:
-            keep_to_merge_list = nmm(
-                object_predictions_as_torch,
-                match_threshold=self.match_threshold,
-                match_metric=self.match_metric,
-            )
-        else:
-            keep_to_merge_list = batched_nmm(
-                object_predictions_as_torch,
-                match_threshold=self.match_threshold,
-                match_metric=self.match_metric,
-            )
+        object_predictions_as_numpy = object_prediction_list.tonumpy()
+        keep_to_merge_list = grid_nmm(
+            object_predictions_as_numpy,
+            match_threshold=self.match_threshold,
+            match_metric=self.match_metric,
+            class_agnostic=self.class_agnostic,
+        )
 
         selected_object_predictions = []
         for keep_ind, merge_ind_list in keep_to_merge_list.items():
@@ -536,19 +529,13 @@ class GreedyNMMPostprocess(PostprocessPredictions):
         object_predictions: List[ObjectPrediction],
     ):
         object_prediction_list = ObjectPredictionList(object_predictions)
-        object_predictions_as_torch = object_prediction_list.totensor()
-        if self.class_agnostic:
-            keep_to_merge_list = greedy_nmm(
-                object_predictions_as_torch,
-                match_threshold=self.match_threshold,
-                match_metric=self.match_metric,
-            )
-        else:
-            keep_to_merge_list = batched_greedy_nmm(
-                object_predictions_as_torch,
-                match_threshold=self.match_threshold,
-                match_metric=self.match_metric,
-            )
+        object_predictions_as_numpy = object_prediction_list.tonumpy()
+        keep_to_merge_list = grid_greedy_nmm(
+            object_predictions_as_numpy,
+            match_threshold=self.match_threshold,
+            match_metric=self.match_metric,
+            class_agnostic=self.class_agnostic,
+        )
 
         selected_object_predictions = []
         for keep_ind, merge_ind_list in keep_to_merge_list.items():
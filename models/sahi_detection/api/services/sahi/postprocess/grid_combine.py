@@ -0,0 +1,279 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2021.
+
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+from sahi.utils.import_utils import is_available
+
+logger = logging.getLogger(__name__)
+
+if is_available("numba"):
+    from numba import njit
+else:
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+# upper bound of grid cells along one axis, so that a few huge boxes do not explode the cell count
+MAX_CELLS_PER_AXIS = 64
+
+
+def _as_numpy(predictions: Union[torch.Tensor, np.ndarray]) -> np.ndarray:
+    if isinstance(predictions, torch.Tensor):
+        predictions = predictions.detach().cpu().numpy()
+    return np.asarray(predictions).reshape(-1, 6)
+
+
+def candidate_pairs(boxes: np.ndarray, cell_size: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the pairs of boxes which may overlap with a uniform grid spatial index.
+    Every box is registered in all grid cells it covers and only boxes sharing a cell are paired.
+    Args:
+        boxes: (ndarray) Boxes in x1, y1, x2, y2 format, Shape: [num_boxes, 4].
+        cell_size: (float) Grid cell size. Defaults to twice the median box size.
+    Returns:
+        first, second: (ndarray) Indices of the candidate pairs, with first < second and no duplicates.
+    """
+    num_boxes = len(boxes)
+    if num_boxes < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    origin_x, origin_y = x1.min(), y1.min()
+    if cell_size is None:
+        extent = max(x2.max() - origin_x, y2.max() - origin_y)
+        cell_size = max(2 * float(np.median(np.maximum(x2 - x1, y2 - y1))), extent / MAX_CELLS_PER_AXIS, 1e-6)
+
+    # cells covered by every box
+    cx0 = np.floor((x1 - origin_x) / cell_size).astype(np.int64)
+    cy0 = np.floor((y1 - origin_y) / cell_size).astype(np.int64)
+    nx = np.floor((x2 - origin_x) / cell_size).astype(np.int64) - cx0 + 1
+    ny = np.floor((y2 - origin_y) / cell_size).astype(np.int64) - cy0 + 1
+    counts = nx * ny
+
+    # one (box, cell) entry per covered cell
+    box_ids = np.repeat(np.arange(num_boxes), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell_x = np.repeat(cx0, counts) + local % np.repeat(nx, counts)
+    cell_y = np.repeat(cy0, counts) + local // np.repeat(nx, counts)
+    cell_ids = cell_y * (cell_x.max() + 1) + cell_x
+
+    entry_order = np.lexsort((box_ids, cell_ids))
+    box_ids, cell_ids = box_ids[entry_order], cell_ids[entry_order]
+
+    # pair every entry with the entries after it in the same cell
+    positions = np.arange(len(cell_ids))
+    group_starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(cell_ids)])
+    num_pairs = np.repeat(group_starts + group_sizes, group_sizes) - positions - 1
+
+    first = np.repeat(positions, num_pairs)
+    second = np.arange(num_pairs.sum()) - np.repeat(np.cumsum(num_pairs) - num_pairs, num_pairs) + first + 1
+
+    keys = np.unique(box_ids[first] * num_boxes + box_ids[second])
+    return keys // num_boxes, keys % num_boxes
+
+
+def match_pairs(
+    predictions: Union[torch.Tensor, np.ndarray],
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    class_agnostic: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the IOU/IOS of the candidate pairs once and return the matching pairs.
+    Args:
+        predictions: (tensor/ndarray) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,6].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        class_agnostic: (bool) If False, only boxes of the same category are matched.
+    Returns:
+        first, second: (ndarray) Indices of the matching pairs.
+    """
+    predictions = _as_numpy(predictions)
+    boxes = predictions[:, :4]
+
+    if match_threshold > 0:
+        first, second = candidate_pairs(boxes)
+    else:
+        # every pair matches, including the ones without any overlap
+        first, second = np.triu_indices(len(boxes), k=1)
+
+    if not class_agnostic:
+        same_category = predictions[first, 5] == predictions[second, 5]
+        first, second = first[same_category], second[same_category]
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    w = np.clip(np.minimum(x2[first], x2[second]) - np.maximum(x1[first], x1[second]), 0.0, None)
+    h = np.clip(np.minimum(y2[first], y2[second]) - np.maximum(y1[first], y1[second]), 0.0, None)
+    inter = w * h
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if match_metric == "IOU":
+            match_metric_value = inter / ((areas[second] - inter) + areas[first])
+        elif match_metric == "IOS":
+            match_metric_value = inter / np.minimum(areas[first], areas[second])
+        else:
+            raise ValueError()
+
+    # same comparison as nms/greedy_nmm, so nan values count as a match there as well
+    matched = ~(match_metric_value < match_threshold)
+    return first[matched], second[matched]
+
+
+@njit(cache=True)
+def _merge_kernel(order, indptr, indices, greedy):
+    num_boxes = len(order)
+    owner = np.full(num_boxes, -1, dtype=np.int64)
+    keeps = np.empty(num_boxes, dtype=np.int64)
+    member_owners = np.empty(num_boxes, dtype=np.int64)
+    members = np.empty(num_boxes, dtype=np.int64)
+    num_keeps = 0
+    num_members = 0
+
+    for ind in order:
+        if owner[ind] == -1:
+            owner[ind] = ind
+            keeps[num_keeps] = ind
+            num_keeps += 1
+        elif greedy:
+            continue
+
+        # boxes matched by a merged box join the box it was merged into
+        keep = owner[ind]
+        for k in range(indptr[ind], indptr[ind + 1]):
+            matched_ind = indices[k]
+            if owner[matched_ind] == -1:
+                owner[matched_ind] = keep
+                member_owners[num_members] = keep
+                members[num_members] = matched_ind
+                num_members += 1
+
+    return keeps[:num_keeps], member_owners[:num_members], members[:num_members]
+
+
+def _grid_merge(
+    predictions: Union[torch.Tensor, np.ndarray],
+    match_metric: str,
+    match_threshold: float,
+    class_agnostic: bool,
+    greedy: bool,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    predictions = _as_numpy(predictions)
+    num_boxes = len(predictions)
+    scores = predictions[:, 4]
+
+    # boxes are visited by descending score, per category when not class agnostic
+    if class_agnostic:
+        order = np.argsort(-scores, kind="stable")
+    else:
+        order = np.lexsort((-scores, predictions[:, 5]))
+    rank = np.empty(num_boxes, dtype=np.int64)
+    rank[order] = np.arange(num_boxes)
+
+    first, second = match_pairs(predictions, match_metric, match_threshold, class_agnostic)
+    rows = np.concatenate([first, second])
+    cols = np.concatenate([second, first])
+
+    # greedy_nmm lists matches by descending score, nmm by ascending score
+    neighbour_rank = rank[cols] if greedy else -rank[cols]
+    adjacency_order = np.lexsort((neighbour_rank, rows))
+    indices = cols[adjacency_order].astype(np.int64)
+    indptr = np.zeros(num_boxes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_boxes), out=indptr[1:])
+
+    keeps, member_owners, members = _merge_kernel(order.astype(np.int64), indptr, indices, greedy)
+    return keeps, member_owners, members, scores
+
+
+def _to_keep_to_merge_list(keeps, member_owners, members) -> Dict[int, List[int]]:
+    keep_to_merge_list = {keep: [] for keep in keeps.tolist()}
+    for keep, member in zip(member_owners.tolist(), members.tolist()):
+        keep_to_merge_list[keep].append(member)
+    return keep_to_merge_list
+
+
+def grid_greedy_nmm(
+    object_predictions_as_tensor: Union[torch.Tensor, np.ndarray],
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    class_agnostic: bool = True,
+) -> Dict[int, List[int]]:
+    """
+    Same result as greedy_nmm (class_agnostic=True) or batched_greedy_nmm (class_agnostic=False),
+    computed from the matching pairs of a grid spatial index in a single pass.
+    Args:
+        object_predictions_as_tensor: (tensor/ndarray) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,6].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        class_agnostic: (bool) If False, boxes are only merged within their category.
+    Returns:
+        keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
+        to keep to a list of prediction indices to be merged.
+    """
+    keeps, member_owners, members, _ = _grid_merge(
+        object_predictions_as_tensor, match_metric, match_threshold, class_agnostic, greedy=True
+    )
+    return _to_keep_to_merge_list(keeps, member_owners, members)
+
+
+def grid_nmm(
+    object_predictions_as_tensor: Union[torch.Tensor, np.ndarray],
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    class_agnostic: bool = True,
+) -> Dict[int, List[int]]:
+    """
+    Same result as nmm (class_agnostic=True) or batched_nmm (class_agnostic=False),
+    computed from the matching pairs of a grid spatial index in a single pass.
+    Args:
+        object_predictions_as_tensor: (tensor/ndarray) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,6].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        class_agnostic: (bool) If False, boxes are only merged within their category.
+    Returns:
+        keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
+        to keep to a list of prediction indices to be merged.
+    """
+    keeps, member_owners, members, _ = _grid_merge(
+        object_predictions_as_tensor, match_metric, match_threshold, class_agnostic, greedy=False
+    )
+    return _to_keep_to_merge_list(keeps, member_owners, members)
+
+
+def grid_nms(
+    predictions: Union[torch.Tensor, np.ndarray],
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    class_agnostic: bool = True,
+) -> List[int]:
+    """
+    Same result as nms (class_agnostic=True) or batched_nms (class_agnostic=False),
+    computed from the matching pairs of a grid spatial index in a single pass.
+    Args:
+        predictions: (tensor/ndarray) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,6].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        class_agnostic: (bool) If False, boxes are only suppressed within their category.
+    Returns:
+        A list of filtered indexes sorted by descending score, Shape: [ ,]
+    """
+    keeps, _, _, scores = _grid_merge(predictions, match_metric, match_threshold, class_agnostic, greedy=True)
+    if not class_agnostic:
+        keeps = keeps[np.argsort(-scores[keeps], kind="stable")]
+    return keeps.tolist()
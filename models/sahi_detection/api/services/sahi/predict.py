@@ -122,6 +122,75 @@ def get_prediction(
     )
 
 
+def get_batch_prediction(
+    images: List,
+    detection_model,
+    shift_amount_list: List[List[int]],
+    full_shape_list: Optional[List[List[int]]] = None,
+    postprocess: Optional[PostprocessPredictions] = None,
+) -> List[PredictionResult]:
+    """
+    Function for performing prediction for a batch of images in a single forward pass of detection_model.
+    Falls back to get_prediction per image if the model does not support batching.
+
+    Arguments:
+        images: list of str or np.ndarray
+            Images of the same size to be predicted
+        detection_model: model.DetectionModel
+        shift_amount_list: List[List[int]]
+            Shift amount of each image, in the form of [[shift_x, shift_y], ...]
+        full_shape_list: List[List[int]]
+            Size of the full image of each image, in the form of [[height, width], ...]
+        postprocess: sahi.postprocess.combine.PostprocessPredictions
+
+    Returns:
+        A list of PredictionResult, one per image
+    """
+    if full_shape_list is None:
+        full_shape_list = [None] * len(images)
+
+    if len(images) == 1 or detection_model.max_batch_size == 1:
+        return [
+            get_prediction(
+                image=image,
+                detection_model=detection_model,
+                shift_amount=shift_amount,
+                full_shape=full_shape,
+                postprocess=postprocess,
+            )
+            for image, shift_amount, full_shape in zip(images, shift_amount_list, full_shape_list)
+        ]
+
+    durations_in_seconds = dict()
+
+    # get prediction
+    time_start = time.time()
+    detection_model.perform_batch_inference([np.ascontiguousarray(read_image_as_pil(image)) for image in images])
+    durations_in_seconds["prediction"] = time.time() - time_start
+
+    # process prediction
+    time_start = time.time()
+    detection_model.convert_original_predictions(
+        shift_amount=shift_amount_list,
+        full_shape=None if full_shape_list[0] is None else full_shape_list,
+    )
+    object_prediction_list_per_image = detection_model.object_prediction_list_per_image
+
+    # postprocess matching predictions
+    if postprocess is not None:
+        object_prediction_list_per_image = [
+            postprocess(object_prediction_list) for object_prediction_list in object_prediction_list_per_image
+        ]
+    durations_in_seconds["postprocess"] = time.time() - time_start
+
+    return [
+        PredictionResult(
+            image=image, object_prediction_list=object_prediction_list, durations_in_seconds=durations_in_seconds
+        )
+        for image, object_prediction_list in zip(images, object_prediction_list_per_image)
+    ]
+
+
 def get_sliced_prediction(
     image,
     detection_model=None,
@@ -139,6 +208,7 @@ def get_sliced_prediction(
     verbose: int = 1,
     merge_buffer_length: int = None,
     auto_slice_resolution: bool = True,
+    batch_size: int = 1,
 ) -> PredictionResult:
     """
     Function for slice image + get predicion for each slice + combine predictions in full image.
@@ -184,6 +254,8 @@ def get_sliced_prediction(
         auto_slice_resolution: bool
             if slice parameters (slice_height, slice_width) are not given,
             it enables automatically calculate these params from image resolution and orientation.
+        batch_size: int
+            Number of slices run through detection_model in one forward pass. Default: 1.
 
     Returns:
         A Dict with fields:
@@ -191,25 +263,89 @@ def get_sliced_prediction(
             durations_in_seconds: a dict containing elapsed times for profiling
     """
 
-    # for profiling
-    durations_in_seconds = dict()
-
-    # currently only 1 batch supported
-    num_batch = 1
-
-    # create slices from full image
-    time_start = time.time()
-    slice_image_result = slice_image(
-        image=image,
-        output_file_name=output_file_name,  # ADDED OUTPUT FILE NAME TO (OPTIONALLY) SAVE SLICES
-        output_dir=interim_dir,  # ADDED INTERIM DIRECTORY TO (OPTIONALLY) SAVE SLICES
+    return get_sliced_predictions(
+        images=[image],
+        detection_model=detection_model,
+        output_file_names=[output_file_name],
+        interim_dir=interim_dir,
         slice_height=slice_height,
         slice_width=slice_width,
         overlap_height_ratio=overlap_height_ratio,
         overlap_width_ratio=overlap_width_ratio,
+        perform_standard_pred=perform_standard_pred,
+        postprocess_type=postprocess_type,
+        postprocess_match_metric=postprocess_match_metric,
+        postprocess_match_threshold=postprocess_match_threshold,
+        postprocess_class_agnostic=postprocess_class_agnostic,
+        verbose=verbose,
+        merge_buffer_length=merge_buffer_length,
         auto_slice_resolution=auto_slice_resolution,
-    )
-    num_slices = len(slice_image_result)
+        batch_size=batch_size,
+    )[0]
+
+
+def get_sliced_predictions(
+    images: List,
+    detection_model=None,
+    output_file_names: Optional[List[str]] = None,
+    interim_dir=None,
+    slice_height: int = None,
+    slice_width: int = None,
+    overlap_height_ratio: float = 0.2,
+    overlap_width_ratio: float = 0.2,
+    perform_standard_pred: bool = True,
+    postprocess_type: str = "GREEDYNMM",
+    postprocess_match_metric: str = "IOS",
+    postprocess_match_threshold: float = 0.5,
+    postprocess_class_agnostic: bool = False,
+    verbose: int = 1,
+    merge_buffer_length: int = None,
+    auto_slice_resolution: bool = True,
+    batch_size: int = 1,
+) -> List[PredictionResult]:
+    """
+    Multi-image version of get_sliced_prediction. Slices of all images (e.g. consecutive video frames)
+    are pooled, so a batch may hold slices of several images and the last batch of one image does
+    not run half empty.
+
+    Args:
+        images: list of str or np.ndarray
+            Locations of images or numpy image matrices to slice
+        output_file_names: list of str
+            File names used to (optionally) save the slices of each image into interim_dir
+        batch_size: int
+            Number of slices run through detection_model in one forward pass, capped by
+            detection_model.max_batch_size. Default: 1.
+        Other arguments are the same as get_sliced_prediction.
+
+    Returns:
+        A list of PredictionResult, one per image
+    """
+
+    # for profiling
+    durations_in_seconds = dict()
+
+    if output_file_names is None:
+        output_file_names = [None] * len(images)
+    if detection_model.max_batch_size is not None:
+        batch_size = min(batch_size, detection_model.max_batch_size)
+    batch_size = max(1, batch_size)
+
+    # create slices from full images
+    time_start = time.time()
+    slice_image_results = [
+        slice_image(
+            image=image,
+            output_file_name=output_file_name,  # ADDED OUTPUT FILE NAME TO (OPTIONALLY) SAVE SLICES
+            output_dir=interim_dir,  # ADDED INTERIM DIRECTORY TO (OPTIONALLY) SAVE SLICES
+            slice_height=slice_height,
+            slice_width=slice_width,
+            overlap_height_ratio=overlap_height_ratio,
+            overlap_width_ratio=overlap_width_ratio,
+            auto_slice_resolution=auto_slice_resolution,
+        )
+        for image, output_file_name in zip(images, output_file_names)
+    ]
     time_end = time.time() - time_start
     durations_in_seconds["slice"] = time_end
 
@@ -228,52 +364,53 @@ def get_sliced_prediction(
         class_agnostic=postprocess_class_agnostic,
     )
 
-    # create prediction input
-    num_group = int(num_slices / num_batch)
+    # create prediction input: (image index, slice, shift amount, full shape) of every slice
+    slices = []
+    for image_ind, slice_image_result in enumerate(slice_image_results):
+        full_shape = [slice_image_result.original_image_height, slice_image_result.original_image_width]
+        for sliced_image, starting_pixel in zip(slice_image_result.images, slice_image_result.starting_pixels):
+            slices.append((image_ind, sliced_image, starting_pixel, full_shape))
+    num_slices = len(slices)
     if verbose == 1 or verbose == 2:
         tqdm.write(f"Performing prediction on {num_slices} number of slices.")
-    object_prediction_list = []
+    object_prediction_lists = [[] for _ in images]
     # perform sliced prediction
-    for group_ind in range(num_group):
-        # prepare batch (currently supports only 1 batch)
-        image_list = []
-        shift_amount_list = []
-        for image_ind in range(num_batch):
-            image_list.append(slice_image_result.images[group_ind * num_batch + image_ind])
-            shift_amount_list.append(slice_image_result.starting_pixels[group_ind * num_batch + image_ind])
+    for batch_start in range(0, num_slices, batch_size):
+        batch = slices[batch_start : batch_start + batch_size]
         # perform batch prediction
-        prediction_result = get_prediction(
-            image=image_list[0],
+        prediction_results = get_batch_prediction(
+            images=[sliced_image for _, sliced_image, _, _ in batch],
             detection_model=detection_model,
-            shift_amount=shift_amount_list[0],
-            full_shape=[
-                slice_image_result.original_image_height,
-                slice_image_result.original_image_width,
-            ],
+            shift_amount_list=[starting_pixel for _, _, starting_pixel, _ in batch],
+            full_shape_list=[full_shape for _, _, _, full_shape in batch],
         )
         # convert sliced predictions to full predictions
-        for object_prediction in prediction_result.object_prediction_list:
-            if object_prediction:  # if not empty
-                object_prediction_list.append(object_prediction.get_shifted_object_prediction())
+        for (image_ind, _, _, _), prediction_result in zip(batch, prediction_results):
+            object_prediction_list = object_prediction_lists[image_ind]
+            for object_prediction in prediction_result.object_prediction_list:
+                if object_prediction:  # if not empty
+                    object_prediction_list.append(object_prediction.get_shifted_object_prediction())
 
-        # merge matching predictions during sliced prediction
-        if merge_buffer_length is not None and len(object_prediction_list) > merge_buffer_length:
-            object_prediction_list = postprocess(object_prediction_list)
+            # merge matching predictions during sliced prediction
+            if merge_buffer_length is not None and len(object_prediction_list) > merge_buffer_length:
+                object_prediction_lists[image_ind] = postprocess(object_prediction_list)
 
     # perform standard prediction
-    if num_slices > 1 and perform_standard_pred:
-        prediction_result = get_prediction(
-            image=image,
-            detection_model=detection_model,
-            shift_amount=[0, 0],
-            full_shape=None,
-            postprocess=None,
-        )
-        object_prediction_list.extend(prediction_result.object_prediction_list)
+    for image_ind, (image, slice_image_result) in enumerate(zip(images, slice_image_results)):
+        if len(slice_image_result) > 1 and perform_standard_pred:
+            prediction_result = get_prediction(
+                image=image,
+                detection_model=detection_model,
+                shift_amount=[0, 0],
+                full_shape=None,
+                postprocess=None,
+            )
+            object_prediction_lists[image_ind].extend(prediction_result.object_prediction_list)
 
     # merge matching predictions
-    if len(object_prediction_list) > 1:
-        object_prediction_list = postprocess(object_prediction_list)
+    for image_ind, object_prediction_list in enumerate(object_prediction_lists):
+        if len(object_prediction_list) > 1:
+            object_prediction_lists[image_ind] = postprocess(object_prediction_list)
 
     time_end = time.time() - time_start
     durations_in_seconds["prediction"] = time_end
@@ -290,9 +427,12 @@ def get_sliced_prediction(
             "seconds.",
         )
 
-    return PredictionResult(
-        image=image, object_prediction_list=object_prediction_list, durations_in_seconds=durations_in_seconds
-    )
+    return [
+        PredictionResult(
+            image=image, object_prediction_list=object_prediction_list, durations_in_seconds=durations_in_seconds
+        )
+        for image, object_prediction_list in zip(images, object_prediction_lists)
+    ]
 
 
 def bbox_sort(a, b, thresh):
@@ -0,0 +1,100 @@
+import time
+
+import fire
+import numpy as np
+import torch
+
+from sahi.postprocess.combine import batched_greedy_nmm, batched_nmm, batched_nms, greedy_nmm, nmm, nms
+from sahi.postprocess.grid_combine import grid_greedy_nmm, grid_nmm, grid_nms
+
+
+def dense_scene(
+    num_boxes: int,
+    image_width: int = 3840,
+    image_height: int = 2160,
+    pod_size: int = 20,
+    num_categories: int = 2,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Synthetic sliced prediction result: objects packed in pods, as dolphins are, and every object
+    predicted several times with a little jitter, as by the full frame and the overlapping slices.
+    Returns:
+        np.ndarray of size N x [x1, y1, x2, y2, score, category_id]
+    """
+    rng = np.random.default_rng(seed)
+    num_pods = max(num_boxes // pod_size, 1)
+    pods = rng.uniform(0, [image_width, image_height], (num_pods, 2))
+    centers = pods[rng.integers(0, num_pods, num_boxes)] + rng.normal(0, 60, (num_boxes, 2))
+    sizes = rng.uniform(20, 80, (num_boxes, 2))
+
+    predictions = np.zeros((num_boxes, 6), dtype=np.float32)
+    predictions[:, :2] = centers - sizes / 2
+    predictions[:, 2:4] = centers + sizes / 2
+    predictions[:, 4] = rng.uniform(0.3, 1.0, num_boxes)
+    predictions[:, 5] = rng.integers(0, num_categories, num_boxes)
+    return predictions
+
+
+def _timeit(func, repeat):
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def benchmark(
+    num_boxes=(100, 500, 1000, 2000),
+    match_metric: str = "IOS",
+    match_threshold: float = 0.5,
+    repeat: int = 3,
+    seed: int = 0,
+):
+    """
+    Compare the grid spatial index based postprocess functions with the current loop based ones
+    on synthetic dense scenes, and check that both return the same result.
+    Args:
+        num_boxes: (int or tuple) Number of predictions per scene.
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for match metric.
+        repeat: (int) Number of timed runs per function.
+        seed: (int) Random seed of the scenes.
+    """
+    if isinstance(num_boxes, int):
+        num_boxes = (num_boxes,)
+
+    cases = [
+        ("greedy_nmm", greedy_nmm, lambda p: grid_greedy_nmm(p, match_metric, match_threshold, class_agnostic=True)),
+        (
+            "batched_greedy_nmm",
+            batched_greedy_nmm,
+            lambda p: grid_greedy_nmm(p, match_metric, match_threshold, class_agnostic=False),
+        ),
+        ("nmm", nmm, lambda p: grid_nmm(p, match_metric, match_threshold, class_agnostic=True)),
+        ("batched_nmm", batched_nmm, lambda p: grid_nmm(p, match_metric, match_threshold, class_agnostic=False)),
+        ("nms", nms, lambda p: grid_nms(p, match_metric, match_threshold, class_agnostic=True)),
+        ("batched_nms", batched_nms, lambda p: grid_nms(p, match_metric, match_threshold, class_agnostic=False)),
+    ]
+
+    print(f"{'function':<20}{'boxes':>8}{'current (ms)':>15}{'grid (ms)':>12}{'speedup':>10}{'same':>7}")
+    for num in num_boxes:
+        predictions = dense_scene(num, seed=seed)
+        predictions_as_tensor = torch.from_numpy(predictions)
+        for name, current_func, grid_func in cases:
+            expected, current_time = _timeit(
+                lambda: current_func(predictions_as_tensor, match_metric, match_threshold), repeat
+            )
+            result, grid_time = _timeit(lambda: grid_func(predictions), repeat)
+            if isinstance(expected, dict):
+                same = list(expected.items()) == list(result.items())
+            else:
+                same = list(expected) == list(result)
+            print(
+                f"{name:<20}{num:>8}{current_time * 1000:>15.2f}{grid_time * 1000:>12.2f}"
+                f"{current_time / max(grid_time, 1e-9):>9.1f}x{str(same):>7}"
+            )
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
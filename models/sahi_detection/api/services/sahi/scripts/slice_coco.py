@@ -2,7 +2,7 @@ import os
 
 import fire
 
-from sahi.slicing import slice_coco
+from sahi.slicing import slice_coco_parallel
 from sahi.utils.file import Path, save_json
 
 
@@ -14,6 +14,7 @@ def slice(
     ignore_negative_samples: bool = False,
     output_dir: str = "runs/slice_coco",
     min_area_ratio: float = 0.1,
+    num_workers: int = None,
 ):
     """
     Args:
@@ -26,6 +27,7 @@ def slice(
         min_area_ratio (float): If the cropped annotation area to original
             annotation ratio is smaller than this value, the annotation
             is filtered out. Default 0.1.
+        num_workers (int): number of slicing processes, defaults to the number of CPUs
     """
 
     # assure slice_size is list
@@ -44,7 +46,7 @@ def slice(
         sliced_coco_name = Path(dataset_json_path).name.replace(
             ".json", f"_{str(slice_size)}_{str(overlap_ratio).replace('.','')}"
         )
-        coco_dict, coco_path = slice_coco(
+        coco_dict, coco_path = slice_coco_parallel(
             coco_annotation_file_path=dataset_json_path,
             image_dir=image_dir,
             output_coco_annotation_file_name="",
@@ -56,6 +58,7 @@ def slice(
             overlap_height_ratio=overlap_ratio,
             overlap_width_ratio=overlap_ratio,
             out_ext=".jpg",
+            num_workers=num_workers,
             verbose=False,
         )
         output_coco_annotation_file_path = os.path.join(output_dir, sliced_coco_name + ".json")
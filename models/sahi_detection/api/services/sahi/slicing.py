@@ -2,6 +2,7 @@
 # Code written by Fatih C Akyon, 2020.
 
 import concurrent.futures
+import json
 import logging
 import os
 import time
@@ -14,7 +15,7 @@ from shapely.errors import TopologicalError
 from tqdm import tqdm
 
 from sahi.annotation import BoundingBox, Mask
-from sahi.utils.coco import Coco, CocoAnnotation, CocoImage, create_coco_dict
+from sahi.utils.coco import Coco, CocoAnnotation, CocoImage, create_coco_dict, get_imageid2annotationlist_mapping
 from sahi.utils.cv import IMAGE_EXTENSIONS_LOSSLESS, IMAGE_EXTENSIONS_LOSSY, read_image_as_pil
 from sahi.utils.file import load_json, save_json
 
@@ -509,6 +510,411 @@ def slice_coco(
     return coco_dict, save_path
 
 
+def get_sliced_bbox_annotations(
+    bboxes: np.ndarray, slice_bboxes: Sequence[Sequence[int]], min_area_ratio: float = 0.1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Clips all bbox annotations of an image against all slice windows at once.
+    Equivalent to calling `process_coco_annotations` for every slice when the
+    annotations have no segmentation.
+
+    Args:
+        bboxes (np.ndarray): N x 4 annotation boxes in [x_min, y_min, width, height] format.
+        slice_bboxes (List[List[int]]): Generated from `get_slice_bboxes`.
+            Format for each slice bbox: [x_min, y_min, x_max, y_max].
+        min_area_ratio (float): If the cropped annotation area to original
+            annotation ratio is smaller than this value, the annotation is
+            filtered out. Default 0.1.
+
+    Returns:
+        slice_indices (np.ndarray): K slice indices, sorted by slice then annotation.
+        annotation_indices (np.ndarray): K annotation indices.
+        sliced_bboxes (np.ndarray): K x 4 cropped boxes in [x_min, y_min, x_max, y_max]
+            format, relative to the slice origin.
+        areas (np.ndarray): K cropped annotation areas (truncated to int like CocoAnnotation.area).
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    slices = np.asarray(slice_bboxes, dtype=np.float64).reshape(-1, 4)
+
+    # annotations along axis 1, slices along axis 0
+    x_min, y_min = bboxes[:, 0], bboxes[:, 1]
+    x_max, y_max = x_min + bboxes[:, 2], y_min + bboxes[:, 3]
+    slice_x_min, slice_y_min = slices[:, 0:1], slices[:, 1:2]
+    slice_x_max, slice_y_max = slices[:, 2:3], slices[:, 3:4]
+
+    inside = (x_min < slice_x_max) & (y_min < slice_y_max) & (x_max > slice_x_min) & (y_max > slice_y_min)
+    crop_x_min = np.maximum(x_min, slice_x_min)
+    crop_y_min = np.maximum(y_min, slice_y_min)
+    crop_x_max = np.minimum(x_max, slice_x_max)
+    crop_y_max = np.minimum(y_max, slice_y_max)
+
+    area = np.trunc(bboxes[:, 2] * bboxes[:, 3])
+    crop_area = np.trunc(np.clip(crop_x_max - crop_x_min, 0, None) * np.clip(crop_y_max - crop_y_min, 0, None))
+    area_ratio = np.divide(crop_area, area, out=np.zeros_like(crop_area), where=area > 0)
+    keep = inside & (area > 0) & (area_ratio >= min_area_ratio)
+
+    slice_indices, annotation_indices = np.nonzero(keep)
+    sliced_bboxes = np.stack(
+        [
+            crop_x_min[keep] - slices[slice_indices, 0],
+            crop_y_min[keep] - slices[slice_indices, 1],
+            crop_x_max[keep] - slices[slice_indices, 0],
+            crop_y_max[keep] - slices[slice_indices, 1],
+        ],
+        axis=1,
+    )
+    return slice_indices, annotation_indices, sliced_bboxes, crop_area[keep].astype(np.int64)
+
+
+def _get_slice_suffix(image_path: str, out_ext: Optional[str] = None) -> str:
+    if out_ext:
+        return out_ext
+    suffix = Path(image_path).suffix
+    if suffix in IMAGE_EXTENSIONS_LOSSLESS:
+        return suffix
+    return ".png"
+
+
+_slice_writer: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def _get_slice_writer(num_writers: int) -> concurrent.futures.ThreadPoolExecutor:
+    # one background writer pool per slicing process
+    global _slice_writer
+    if _slice_writer is None:
+        _slice_writer = concurrent.futures.ThreadPoolExecutor(max_workers=num_writers)
+    return _slice_writer
+
+
+def _export_slice(image: np.ndarray, slice_file_path: str):
+    image_pil = Image.fromarray(image)
+    if Path(slice_file_path).suffix in IMAGE_EXTENSIONS_LOSSY:
+        image_pil.save(slice_file_path, quality=95)
+    else:
+        image_pil.save(slice_file_path)
+    image_pil.close()
+
+
+def _slice_coco_image(task: Dict) -> List[Dict]:
+    """Slices a single dataset image and its annotations, and writes the slices
+    through the background writer pool. Returns one record per slice with
+    file_name, height, width and COCO formatted annotations.
+    """
+    image_path = task["image_path"]
+    output_file_name = task["output_file_name"]
+    output_dir = task["output_dir"]
+
+    image_pil = read_image_as_pil(image_path)
+    image_width, image_height = image_pil.size
+    if not (image_width != 0 and image_height != 0):
+        raise RuntimeError(f"invalid image size: {image_pil.size} for 'slice_coco_parallel'.")
+    image_arr = np.asarray(image_pil)
+    slice_bboxes = get_slice_bboxes(
+        image_height=image_height,
+        image_width=image_width,
+        slice_height=task["slice_height"],
+        slice_width=task["slice_width"],
+        overlap_height_ratio=task["overlap_height_ratio"],
+        overlap_width_ratio=task["overlap_width_ratio"],
+    )
+    suffix = _get_slice_suffix(image_path, task["out_ext"])
+
+    annotation_dicts = task["annotations"]
+    slice_annotations: List[List[Dict]] = [[] for _ in slice_bboxes]
+    bbox_only = all(
+        not annotation_dict.get("segmentation") or not isinstance(annotation_dict["segmentation"], list)
+        for annotation_dict in annotation_dicts
+    )
+    if bbox_only and annotation_dicts:
+        bboxes = np.array([annotation_dict["bbox"][:4] for annotation_dict in annotation_dicts], dtype=np.float64)
+        slice_indices, annotation_indices, sliced_bboxes, areas = get_sliced_bbox_annotations(
+            bboxes, slice_bboxes, task["min_area_ratio"]
+        )
+        # same polygon the shapely path exports for a box: 4 corners, truncated to int
+        corners = np.trunc(sliced_bboxes).astype(np.int64)
+        segmentations = corners[:, [0, 3, 2, 3, 2, 1, 0, 1]].tolist()
+        for slice_index, annotation_index, sliced_bbox, area, segmentation in zip(
+            slice_indices.tolist(), annotation_indices.tolist(), sliced_bboxes.tolist(), areas.tolist(), segmentations
+        ):
+            x_min, y_min, x_max, y_max = sliced_bbox
+            slice_annotations[slice_index].append(
+                {
+                    "bbox": [x_min, y_min, x_max - x_min, y_max - y_min],
+                    "segmentation": [segmentation],
+                    "category_id": annotation_dicts[annotation_index]["category_id"],
+                    "area": area,
+                }
+            )
+    elif annotation_dicts:
+        coco_annotation_list = [
+            CocoAnnotation.from_coco_annotation_dict(annotation_dict=annotation_dict)
+            for annotation_dict in annotation_dicts
+        ]
+        for slice_index, slice_bbox in enumerate(slice_bboxes):
+            for sliced_coco_annotation in process_coco_annotations(
+                coco_annotation_list, slice_bbox, task["min_area_ratio"]
+            ):
+                slice_annotations[slice_index].append(
+                    {
+                        "bbox": sliced_coco_annotation.bbox,
+                        "segmentation": sliced_coco_annotation.segmentation,
+                        "category_id": sliced_coco_annotation.category_id,
+                        "area": sliced_coco_annotation.area,
+                    }
+                )
+
+    if output_dir is not None:
+        Path(output_dir, output_file_name).mkdir(parents=True, exist_ok=True)
+        writer = _get_slice_writer(task["num_writers"])
+
+    records = []
+    write_futures = []
+    for idx, slice_bbox in enumerate(slice_bboxes, 1):
+        slice_suffixes = "_".join(map(str, slice_bbox))
+        if output_dir is not None:
+            slice_file_name = f"{output_file_name}/{str(idx).zfill(4)}_{slice_suffixes}{suffix}"
+            tlx, tly, brx, bry = slice_bbox
+            write_futures.append(
+                writer.submit(_export_slice, image_arr[tly:bry, tlx:brx], str(Path(output_dir) / slice_file_name))
+            )
+        else:
+            slice_file_name = f"{output_file_name}_{str(idx).zfill(4)}_{slice_suffixes}{suffix}"
+        records.append(
+            {
+                "file_name": slice_file_name,
+                "height": slice_bbox[3] - slice_bbox[1],
+                "width": slice_bbox[2] - slice_bbox[0],
+                "annotations": slice_annotations[idx - 1],
+            }
+        )
+
+    # the image is only reported (and recorded in the manifest) once its slices are on disk
+    for future in write_futures:
+        future.result()
+    return records
+
+
+def _read_slice_manifest(manifest_path: Path, params: Dict) -> Dict[int, List[Dict]]:
+    if not manifest_path.exists():
+        return {}
+
+    done: Dict[int, List[Dict]] = {}
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        lines = manifest_file.read().splitlines()
+    try:
+        header = json.loads(lines[0]) if lines else {}
+    except json.JSONDecodeError:
+        header = {}
+    if header.get("params") != params:
+        logger.warning(f"Slicing parameters changed, ignoring manifest: {manifest_path}")
+        return {}
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:  # last line of an interrupted run
+            continue
+        done[entry["index"]] = entry["slices"]
+    return done
+
+
+def slice_coco_parallel(
+    coco_annotation_file_path: str,
+    image_dir: str,
+    output_coco_annotation_file_name: str,
+    output_dir: Optional[str] = None,
+    ignore_negative_samples: bool = False,
+    slice_height: int = 512,
+    slice_width: int = 512,
+    overlap_height_ratio: float = 0.2,
+    overlap_width_ratio: float = 0.2,
+    min_area_ratio: float = 0.1,
+    out_ext: Optional[str] = None,
+    num_workers: Optional[int] = None,
+    num_writers: int = 4,
+    resume: bool = True,
+    verbose: bool = False,
+) -> List[Union[Dict, str]]:
+    """
+    Same as `slice_coco`, but slices images across a process pool. Images whose
+    annotations are all bboxes are clipped against every slice window in a single
+    NumPy broadcast, images with polygon annotations fall back to the shapely path.
+    Slices are written through a background writer pool in each worker.
+
+    When output_dir is given, each finished image is appended to a manifest
+    (`slice_manifest.jsonl`) so an interrupted run can be resumed without
+    re-slicing finished images. An image that fails to slice (e.g. it cannot
+    be read) is logged and skipped; it is not recorded in the manifest, so a
+    resumed run retries it.
+
+    Args:
+        coco_annotation_file_path (str): Location of the coco annotation file
+        image_dir (str): Base directory for the images
+        output_coco_annotation_file_name (str): File name of the exported coco
+            datatset json.
+        output_dir (str, optional): Output directory
+        ignore_negative_samples (bool): If True, images without annotations
+            are ignored. Defaults to False.
+        slice_height (int): Height of each slice. Default 512.
+        slice_width (int): Width of each slice. Default 512.
+        overlap_height_ratio (float): Fractional overlap in height of each
+            slice (e.g. an overlap of 0.2 for a slice of size 100 yields an
+            overlap of 20 pixels). Default 0.2.
+        overlap_width_ratio (float): Fractional overlap in width of each
+            slice (e.g. an overlap of 0.2 for a slice of size 100 yields an
+            overlap of 20 pixels). Default 0.2.
+        min_area_ratio (float): If the cropped annotation area to original annotation
+            ratio is smaller than this value, the annotation is filtered out. Default 0.1.
+        out_ext (str, optional): Extension of saved images. Default is the
+            original suffix for lossless image formats and png for lossy formats.
+        num_workers (int, optional): Number of slicing processes. Default is the
+            number of CPUs, 1 slices in the calling process.
+        num_writers (int): Number of writer threads per slicing process. Default 4.
+        resume (bool): Skip images already recorded in the manifest. Default True.
+        verbose (bool, optional): Switch to print relevant values to screen.
+            Default 'False'.
+
+    Returns:
+        coco_dict: dict
+            COCO dict for sliced images and annotations
+        save_path: str
+            Path to the saved coco file
+    """
+    verboselog = logger.info if verbose else lambda *a, **k: None
+
+    coco_dict: Dict = load_json(coco_annotation_file_path)
+    image_id_to_annotation_list = get_imageid2annotationlist_mapping(coco_dict)
+
+    tasks = []
+    image_id_set = set()
+    for idx, image_dict in enumerate(coco_dict["images"]):
+        # https://github.com/obss/sahi/issues/98
+        if image_dict["id"] in image_id_set:
+            continue
+        image_id_set.add(image_dict["id"])
+        tasks.append(
+            {
+                "index": idx,
+                "image_path": os.path.join(image_dir, image_dict["file_name"]),
+                "output_file_name": f"{Path(image_dict['file_name']).stem}_{len(tasks)}",
+                "output_dir": output_dir,
+                "annotations": image_id_to_annotation_list[image_dict["id"]],
+                "slice_height": slice_height,
+                "slice_width": slice_width,
+                "overlap_height_ratio": overlap_height_ratio,
+                "overlap_width_ratio": overlap_width_ratio,
+                "min_area_ratio": min_area_ratio,
+                "out_ext": out_ext,
+                "num_writers": num_writers,
+            }
+        )
+
+    # resume from manifest
+    results: Dict[int, List[Dict]] = {}
+    manifest_file = None
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        manifest_path = Path(output_dir) / "slice_manifest.jsonl"
+        params = {
+            "coco_annotation_file_path": os.path.abspath(coco_annotation_file_path),
+            "slice_height": slice_height,
+            "slice_width": slice_width,
+            "overlap_height_ratio": overlap_height_ratio,
+            "overlap_width_ratio": overlap_width_ratio,
+            "min_area_ratio": min_area_ratio,
+            "out_ext": out_ext,
+        }
+        if resume:
+            results = _read_slice_manifest(manifest_path, params)
+            results = {task["index"]: results[task["index"]] for task in tasks if task["index"] in results}
+        if results:
+            verboselog(f"Resuming slicing, {len(results)} images already sliced")
+        # rewrite the manifest so a partially written last line is dropped
+        manifest_file = open(manifest_path, "w", encoding="utf-8")
+        manifest_file.write(json.dumps({"params": params}) + "\n")
+        for index, records in results.items():
+            manifest_file.write(json.dumps({"index": index, "slices": records}) + "\n")
+        manifest_file.flush()
+
+    def _record(task, records):
+        results[task["index"]] = records
+        if manifest_file is not None:
+            manifest_file.write(json.dumps({"index": task["index"], "slices": records}) + "\n")
+            manifest_file.flush()
+
+    failed = []
+
+    def _skip(task, error):
+        if isinstance(error, TopologicalError):
+            logger.warning(f"Invalid annotation found, skipping this image: {task['image_path']}")
+        else:
+            logger.error(f"Failed to slice {task['image_path']}, skipping this image: {error!r}")
+            failed.append(task["image_path"])
+
+    pending = [task for task in tasks if task["index"] not in results]
+    num_workers = num_workers or os.cpu_count() or 1
+    try:
+        if num_workers <= 1:
+            for task in tqdm(pending):
+                try:
+                    _record(task, _slice_coco_image(task))
+                except Exception as e:
+                    _skip(task, e)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(_slice_coco_image, task): task for task in pending}
+                try:
+                    for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures)):
+                        task = futures[future]
+                        try:
+                            _record(task, future.result())
+                        except concurrent.futures.process.BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            _skip(task, e)
+                except BaseException:
+                    # do not let the executor finish queued images whose results would be discarded
+                    for future in futures:
+                        future.cancel()
+                    raise
+    finally:
+        if manifest_file is not None:
+            manifest_file.close()
+    if failed:
+        logger.warning(f"{len(failed)} images could not be sliced and were skipped")
+
+    # create coco dict in image order, with the same ids as `create_coco_dict`
+    sliced_coco_dict = dict(images=[], annotations=[], categories=coco_dict["categories"])
+    image_id = 1
+    annotation_id = 1
+    for task in tasks:
+        for record in results.get(task["index"], []):
+            if ignore_negative_samples and not record["annotations"]:
+                continue
+            sliced_coco_dict["images"].append(
+                {"height": record["height"], "width": record["width"], "id": image_id, "file_name": record["file_name"]}
+            )
+            for annotation in record["annotations"]:
+                sliced_coco_dict["annotations"].append(
+                    {
+                        "iscrowd": 0,
+                        "image_id": image_id,
+                        "bbox": annotation["bbox"],
+                        "segmentation": annotation["segmentation"],
+                        "category_id": annotation["category_id"],
+                        "id": annotation_id,
+                        "area": annotation["area"],
+                    }
+                )
+                annotation_id += 1
+            image_id += 1
+
+    save_path = ""
+    if output_coco_annotation_file_name and output_dir:
+        save_path = Path(output_dir) / (output_coco_annotation_file_name + "_coco.json")
+        save_json(sliced_coco_dict, save_path)
+
+    return sliced_coco_dict, save_path
+
+
 def calc_ratio_and_slice(orientation, slide=1, ratio=0.1):
     """
     According to image resolution calculation overlap params
@@ -0,0 +1,31 @@
+from autologging import logged
+from pydantic import BaseModel, Field
+
+__all__ = ["ModelRequest"]
+
+
+@logged
+class ModelRequest(BaseModel):
+    """
+        탐지 모델을 로드하거나 내리기 위한 요청에 필요한 변수를 담은 클래스입니다.
+
+        Attribute
+            - model_type (str): 모델 종류 (yolov5, yolov8, trt)
+            - ckpt (str): 모델 가중치 파일 경로
+            - image_size (int): 추론 입력 크기
+            - device (str): 모델을 올릴 장치
+    """
+    model_type: str = Field("yolov8")
+    ckpt: str = Field("/mnt/models/v8_m_best.pt")
+    image_size: int = Field(1024)
+    device: str = Field("cuda:0")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "model_type": "yolov8",
+                "ckpt": "/mnt/models/v8_m_best.pt",
+                "image_size": 1024,
+                "device": "cuda:0",
+            }
+        }